@@ -5,6 +5,7 @@ import sys
 
 from tokenizer import Tokenizer
 from compilation_engine import CompilationEngine
+from xml_writer import XmlWriter
 
 
 SOURCE_EXT = 'jack'
@@ -43,10 +44,12 @@ def main():
         # create tokenizer instance for each source file
         tokenizer = Tokenizer(source_file)
 
-        # compile tokens
+        # parse the class, and write its tree
         if tokenizer.advance():
-            compilation_engine = CompilationEngine(tokenizer, f'{filename}.{TARGET_EXT}')
-            compilation_engine.compile_class()
+            tree = CompilationEngine(tokenizer).compile_class()
+            xml_writer = XmlWriter(f'{filename}.{TARGET_EXT}')
+            xml_writer.write(tree)
+            xml_writer.close()
 
 
 def _parse_filename(file):
@@ -0,0 +1,94 @@
+"""Corpus module of the benchmarks
+
+Functions:
+    write_class
+    load_modules
+"""
+
+import importlib
+import os
+import sys
+
+CLASS_HEADER = '''/**
+ * A square drawn on the screen, moved by many generated methods:
+ * the class only exists to be scanned and parsed by the benchmarks.
+ */
+class Square {
+    field int x, y;      // position of the top left corner
+    field int size;      // length of a side, in pixels
+    field Array cells;
+    static boolean visible;
+
+    /** Creates a square at the given position. */
+    constructor Square new(int ax, int ay, int asize) {
+        let x = ax;
+        let y = ay;
+        let size = asize;
+        let cells = Array.new(16);
+        let visible = true;
+        return this;
+    }
+'''
+
+METHOD = '''
+    /** Moves the square, and returns a checksum of the cells ({index}). */
+    method int move{index}(int dx, int dy) {{
+        var int i, sum;
+        var String label;
+        let label = "square {index}";   // a string constant
+        let i = 0;
+        let sum = {index};
+        while (i < 16) {{
+            let sum = sum + ((x + dx) * (y - dy) / 2);
+            if ((sum > 1000) | (sum < -1000)) {{
+                let sum = sum & 255;
+            }} else {{
+                let cells[i] = ~cells[i] + Math.max(i, size);
+            }}
+            let i = i + 1;
+        }}
+        if (visible & ~(label.length() = 0)) {{
+            do Screen.drawRectangle(x, y, x + size, y + size);
+        }}
+        do Output.printString(label);
+        return sum;
+    }}
+'''
+
+# directories the modules loaded so far come from
+_loaded = set()
+
+
+def write_class(path, size):
+    """Write a Jack class of at least size bytes, with comments, strings and
+    expressions of every kind, and return the number of bytes written
+    """
+    written = 0
+    index = 0
+    with open(path, 'w') as file:
+        written += file.write(CLASS_HEADER)
+        while written < size:
+            written += file.write(METHOD.format(index=index))
+            index += 1
+        written += file.write('}\n')
+    return written
+
+
+def load_modules(directory, *names):
+    """Import modules of a directory of the compiler or of an analyzer by
+    their bare names, as they import each other, and return them; the
+    modules of the directories loaded before are forgotten, as they share
+    the names
+    """
+    directory = os.path.abspath(directory)
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None) or ''
+        if any(path.startswith(loaded + os.sep) for loaded in _loaded):
+            del sys.modules[name]
+    _loaded.add(directory)
+
+    sys.path.insert(0, directory)
+    try:
+        return [importlib.import_module(name) for name in names]
+    finally:
+        sys.path.remove(directory)
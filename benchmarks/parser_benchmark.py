@@ -0,0 +1,72 @@
+"""Parser benchmark
+
+Measures the time the compilation engine of each compiler directory given
+takes to parse a large generated Jack class, from tokens scanned
+beforehand, and the time the code generator takes to generate the VM code
+of the class, the VM code being discarded. The runs of the directories
+alternate, so that they are measured under the same load, and the garbage
+collector is disabled while they run, as by timeit. To compare with
+an earlier revision whose parser builds a syntax tree, check it out next
+to the current one, e.g.
+
+    git worktree add /tmp/before <revision>
+    python benchmarks/parser_benchmark.py compiler /tmp/before/compiler
+"""
+
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from corpus import load_modules, write_class
+
+
+def main():
+    """Entrypoint of the parser benchmark"""
+    parser = argparse.ArgumentParser(usage='program [options] <compiler_dir>...')
+    parser.add_argument('directories', nargs='*', default=['compiler'],
+                        help='directories of the compilers to measure (default: compiler)')
+    parser.add_argument('--size', type=float, default=1,
+                        help='size of the class, in megabytes (default: 1)')
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='number of runs, of which the fastest is reported (default: 10)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        source = os.path.join(corpus_dir, 'Square.jack')
+        size = write_class(source, int(args.size * 1024 * 1024))
+
+        compilers = {directory: load_modules(directory, 'tokenizer', 'compilation_engine',
+                                             'code_generator', 'vm_writer')
+                     for directory in args.directories}
+        tokens = {directory: list(tokenizer.scan(tokenizer.read_source(source)))
+                  for directory, (tokenizer, *_) in compilers.items()}
+        print(f'class: {size / 1024 / 1024:.1f} MB, '
+              f'{len(tokens[args.directories[0]]):,} tokens')
+
+        timings = {directory: {'parse': [], 'generate': []} for directory in compilers}
+        for _ in range(args.repeat):
+            for directory, (tokenizer, engine, generator, writer) in compilers.items():
+                gc.collect()
+                gc.disable()
+                start = time.perf_counter()
+                tokens_tokenizer = tokenizer.Tokenizer.from_tokens(tokens[directory])
+                tokens_tokenizer.advance()
+                tree = engine.CompilationEngine(tokens_tokenizer).compile_class()
+                timings[directory]['parse'].append(time.perf_counter() - start)
+
+                vm_writer = writer.VmWriter(os.devnull)
+                start = time.perf_counter()
+                generator.CodeGenerator(vm_writer).generate(tree)
+                vm_writer.close()
+                timings[directory]['generate'].append(time.perf_counter() - start)
+                gc.enable()
+
+        for directory, timing in timings.items():
+            print(f'{directory}: ' + ', '.join(f'{name} {min(seconds) * 1000:.1f} ms'
+                                               for name, seconds in timing.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Tail call benchmark
+
+Compiles a program of tail recursive subroutines with the compiler of each
+directory given, with and without --tail-calls, runs the VM code of each
+on the VM emulator of the tests, and reports the calls it makes, their
+deepest nesting, the largest number of words on the stack, and the number
+of VM commands it runs. The emulator does not model what each command
+costs on the Hack computer: a call and a return count as one command
+each, like a push. To compare with an earlier revision, check it out next
+to the current one, e.g.
+
+    git worktree add /tmp/before <revision>
+    python benchmarks/tail_call_benchmark.py compiler /tmp/before/compiler
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+from corpus import load_modules
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.vm_emulator import VmEmulator, VmError  # noqa: E402
+
+MAIN_CLASS = '''class Main {
+    field int total;
+
+    constructor Main new() { let total = 0; return this; }
+
+    /** Returns the sum of the numbers up to n, plus acc. */
+    function int sumTo(int n, int acc) {
+        if (n < 1) { return acc; }
+        return Main.sumTo(n - 1, acc + n);
+    }
+
+    /** Returns the greatest common divisor of a and b, by subtraction. */
+    function int gcd(int a, int b) {
+        if (a = b) { return a; }
+        if (a > b) { return Main.gcd(a - b, b); }
+        return Main.gcd(a, b - a);
+    }
+
+    /** Adds the numbers up to n to the total of this object or of other. */
+    method int count(Main other, int n) {
+        var int next;
+        let total = total + n;
+        if (n < 1) { return total; }
+        let next = n - 1;
+        return other.count(this, next);
+    }
+
+    function void main() {
+        var Main a, b;
+        let a = Main.new();
+        let b = Main.new();
+        do Output.printInt(Main.sumTo(%(depth)d, 0));
+        do Output.println();
+        do Output.printInt(Main.gcd(%(depth)d, 1));
+        do Output.println();
+        do Output.printInt(a.count(b, %(depth)d));
+        return;
+    }
+}
+'''
+
+
+def main():
+    """Entrypoint of the tail call benchmark"""
+    parser = argparse.ArgumentParser(usage='program [options] <compiler_dir>...')
+    parser.add_argument('directories', nargs='*', default=['compiler'],
+                        help='directories of the compilers to measure (default: compiler)')
+    parser.add_argument('--depth', type=int, default=100,
+                        help='number of calls each subroutine makes of itself (default: 100)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        with open(os.path.join(source_dir, 'Main.jack'), 'w') as file:
+            file.write(MAIN_CLASS % {'depth': args.depth})
+
+        for directory in args.directories:
+            compiler, = load_modules(directory, 'compiler')
+            for flags in ([], ['--tail-calls']):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    compiler.main([*flags, source_dir])
+                emulator = VmEmulator(source_dir)
+                try:
+                    output = emulator.run()
+                except VmError as error:
+                    output = f'error: {error}'
+                print(f'{directory} {" ".join(flags) or "unoptimized"}: '
+                      f'{emulator.calls:,} calls, depth {emulator.max_depth}, '
+                      f'stack {emulator.max_stack} words, {emulator.steps:,} commands, '
+                      f'output {" ".join(output.split())}')
+
+
+if __name__ == '__main__':
+    main()
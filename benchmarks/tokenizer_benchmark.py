@@ -0,0 +1,60 @@
+"""Tokenizer benchmark
+
+Measures the tokens per second of the tokenizer of each directory given,
+scanning a generated Jack class of several megabytes. To compare with an
+earlier revision, check it out next to the current one, e.g.
+
+    git worktree add /tmp/before <revision>
+    python benchmarks/tokenizer_benchmark.py compiler /tmp/before/compiler
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from corpus import load_modules, write_class
+
+
+def main():
+    """Entrypoint of the tokenizer benchmark"""
+    parser = argparse.ArgumentParser(usage='program [options] <tokenizer_dir>...')
+    parser.add_argument('directories', nargs='*', default=['compiler'],
+                        help='directories of the tokenizers to measure (default: compiler)')
+    parser.add_argument('--size', type=float, default=4,
+                        help='size of the corpus, in megabytes (default: 4)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of runs, of which the fastest is reported (default: 3)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = os.path.join(corpus_dir, 'Square.jack')
+        size = write_class(corpus, int(args.size * 1024 * 1024))
+
+        first_tokens = None
+        for directory in args.directories:
+            tokenizer_module, = load_modules(directory, 'tokenizer')
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                tokens = _scan(tokenizer_module.Tokenizer(corpus))
+                seconds = time.perf_counter() - start
+                best = seconds if best is None else min(best, seconds)
+
+            if first_tokens is None:
+                first_tokens = tokens
+                print(f'corpus: {size / 1024 / 1024:.1f} MB, {len(tokens):,} tokens')
+            same = '' if tokens == first_tokens else ', tokens differ from the first directory'
+            print(f'{directory}: {len(tokens) / best:,.0f} tokens/s ({best:.2f} s){same}')
+
+
+def _scan(tokenizer):
+    """Return the tokens of the tokenizer"""
+    tokens = []
+    while tokenizer.advance():
+        tokens.append(tokenizer.get_token())
+    return tokens
+
+
+if __name__ == '__main__':
+    main()
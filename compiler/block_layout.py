@@ -0,0 +1,85 @@
+"""Block layout module of the compiler
+
+Classes:
+    BlockReorderer
+"""
+
+from control_flow import ControlFlowGraph
+
+
+class BlockReorderer:
+    """BlockReorderer class of the Jack compiler.
+
+    Pass of the InstructionBuffer, which lays out the basic blocks of a
+    function so that fewer jumps are taken. Each block is followed by:
+        the target of its goto, if it is the only way into that block,
+            which makes the goto unnecessary,
+        else the block it falls through to,
+        else the target of its conditional jump, if the jump can be inverted,
+        else the next block of the current layout.
+
+    A loop testing a negated comparison at its top, as the code generator
+    compiles while statements, is rotated: its test is laid out after its
+    body, which then reaches it without jumping, and jumps back to the
+    body if the comparison holds, so each iteration takes one jump instead
+    of two.
+
+    Properties:
+        moved: number of blocks moved so far
+        removed: number of instructions removed so far
+
+    Methods:
+        run(list) -> list
+    """
+
+    def __init__(self):
+        self.moved = 0
+        self.removed = 0
+
+    def run(self, instructions):
+        """Return the instructions with their blocks reordered"""
+        graph = ControlFlowGraph(instructions)
+        if not graph.blocks:
+            return instructions
+
+        order = [0]
+        placed = {0}
+        rotated = set()
+        unplaced = iter(range(len(graph.blocks)))
+        while len(order) < len(graph.blocks):
+            last = order[-1]
+            fall_through = graph.fall_through[last]
+            target = graph.successors[last][0] if graph.blocks[last][-1][0] in ('goto', 'if-goto') else None
+
+            if graph.blocks[last][-1][0] == 'goto' and target not in placed and (
+                    graph.predecessors[target] == [last] or target in rotated):
+                following = target
+            elif fall_through is not None and fall_through not in placed:
+                following = fall_through
+                if _is_rotatable(graph, fall_through) and graph.fall_through[fall_through] not in placed:
+                    rotated.add(fall_through)
+                    following = graph.fall_through[fall_through]
+            elif target is not None and target not in placed and graph.invertible(last):
+                following = target
+            else:
+                following = next(i for i in unplaced if i not in placed)
+            order.append(following)
+            placed.add(following)
+
+        if order == sorted(order):
+            return instructions
+        self.moved += sum(1 for position, i in enumerate(order) if position != i)
+        graph.reorder(order)
+        output = graph.instructions()
+        self.removed += len(instructions) - len(output)
+        return output
+
+
+def _is_rotatable(graph, i):
+    """Return True if the block is the test of a loop, jumping out of the
+    loop if its comparison does not hold, and reached again by a goto at
+    the end of the loop
+    """
+    return graph.invertible(i) and graph.fall_through[i] is not None and any(
+        predecessor > i and graph.blocks[predecessor][-1][0] == 'goto'
+        for predecessor in graph.predecessors[i])
@@ -0,0 +1,104 @@
+"""Call graph module of the compiler
+
+Classes:
+    CallGraph
+"""
+
+from syntax_tree import SubroutineCall
+
+
+# subroutines the program is started from
+ENTRY_POINTS = ('Sys.init', 'Main.main')
+
+
+class CallGraph:
+    """CallGraph class of the Jack compiler.
+
+    Whole program view of the syntax trees of all the classes of a program,
+    recording the subroutines each subroutine calls. Calls are resolved the
+    way the code generator emits them: the receiver of a method call is
+    looked up in the subroutine, then the class declarations, and a call
+    without receiver is a method call on the current object. Subroutines
+    of classes outside the program, such as the OS, are leaves.
+
+    Properties:
+        classes: syntax tree of each class of the program, by name
+        calls: full names of the subroutines each subroutine calls, by full name
+
+    Methods:
+        entry_points() -> list
+        reachable(list) -> set
+        unreachable(list) -> list
+        strip(list) -> list
+    """
+
+    def __init__(self, trees):
+        self.classes = {tree.name: tree for tree in trees}
+        self.calls = {}
+        for tree in trees:
+            class_types = {name: class_var_dec.type for class_var_dec in tree.class_var_decs
+                           for name in class_var_dec.names}
+            for subroutine in tree.subroutines:
+                types = dict(class_types)
+                types.update({parameter.name: parameter.type for parameter in subroutine.parameters})
+                types.update({name: var_dec.type for var_dec in subroutine.var_decs
+                              for name in var_dec.names})
+
+                self.calls[f'{tree.name}.{subroutine.name}'] = {
+                    _callee(call, tree.name, types) for call in _subroutine_calls(subroutine)
+                }
+
+    def entry_points(self):
+        """Return the entry points defined by the program"""
+        return [name for name in ENTRY_POINTS if name in self.calls]
+
+    def reachable(self, roots):
+        """Return the full names of the subroutines of the program
+        that can be called, directly or not, from the roots
+        """
+        reachable = set()
+        pending = [root for root in roots if root in self.calls]
+        while pending:
+            name = pending.pop()
+            if name not in reachable:
+                reachable.add(name)
+                pending.extend(callee for callee in self.calls[name] if callee in self.calls)
+        return reachable
+
+    def unreachable(self, roots):
+        """Return the full names of the subroutines of the program
+        that cannot be called from the roots
+        """
+        reachable = self.reachable(roots)
+        return [f'{tree.name}.{subroutine.name}' for tree in self.classes.values()
+                for subroutine in tree.subroutines
+                if f'{tree.name}.{subroutine.name}' not in reachable]
+
+    def strip(self, roots):
+        """Remove the subroutines that cannot be called from the roots
+        from the syntax trees, and return their full names
+        """
+        stripped = self.unreachable(roots)
+        for tree in self.classes.values():
+            tree.subroutines = [subroutine for subroutine in tree.subroutines
+                                if f'{tree.name}.{subroutine.name}' not in stripped]
+        return stripped
+
+
+def _subroutine_calls(subroutine):
+    """Return the subroutine calls in the statements of a subroutine"""
+    calls = []
+    pending = list(subroutine.statements)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, SubroutineCall):
+            calls.append(node)
+        pending.extend(node.children())
+    return calls
+
+
+def _callee(call, classname, types):
+    """Return the full name of the subroutine called"""
+    if call.receiver is None:
+        return f'{classname}.{call.name}'
+    return f'{types.get(call.receiver, call.receiver)}.{call.name}'
@@ -0,0 +1,36 @@
+"""Control flow graph exporter module of the compiler
+
+Classes:
+    CfgExporter
+"""
+
+from control_flow import ControlFlowGraph
+
+
+class CfgExporter:
+    """CfgExporter class of the Jack compiler.
+
+    Pass of the InstructionBuffer, which leaves the instructions of each
+    function unchanged, and records the control flow graph of the function,
+    so the graphs of a build can be written to a file for other tools.
+
+    Properties:
+        graphs: control flow graph of each function exported so far, as dicts
+
+    Methods:
+        run(list) -> list
+        report() -> dict
+    """
+
+    def __init__(self):
+        self.graphs = []
+
+    def run(self, instructions):
+        """Record the control flow graph of the function, and return its instructions"""
+        if instructions:
+            self.graphs.append(ControlFlowGraph(instructions).export())
+        return instructions
+
+    def report(self):
+        """Return the graphs of the functions exported, ready to be written as JSON"""
+        return {'functions': self.graphs}
@@ -0,0 +1,792 @@
+"""Code generator module of the compiler
+
+Classes:
+    CodeGenerator
+"""
+
+from functools import partial
+
+from enums.arithmetic_command import ArithmeticCommand
+from enums.segment import Segment
+from enums.variable_kind import VariableKind
+from name_table import NameTable
+from symbol_table import SymbolTable
+from syntax_tree import (
+    ArrayAccess,
+    BinaryOp,
+    IfStatement,
+    IntegerConstant,
+    KeywordConstant,
+    Node,
+    NodeVisitor,
+    ReturnStatement,
+    StringConstant,
+    SubroutineCall,
+    UnaryOp,
+    Variable,
+    WhileStatement,
+)
+
+
+BINARY_COMMANDS = {
+    '+': ArithmeticCommand.ADD,
+    '-': ArithmeticCommand.SUB,
+    '&': ArithmeticCommand.AND,
+    '|': ArithmeticCommand.OR,
+    '<': ArithmeticCommand.LT,
+    '>': ArithmeticCommand.GT,
+    '=': ArithmeticCommand.EQ,
+}
+BINARY_CALLS = {
+    '*': 'Math.multiply',
+    '/': 'Math.divide',
+}
+UNARY_COMMANDS = {
+    '-': ArithmeticCommand.NEG,
+    '~': ArithmeticCommand.NOT,
+}
+
+# strength reduction modes: never grow the code, or always avoid the OS call
+SIZE = 'size'
+SPEED = 'speed'
+STRENGTH_REDUCTION_MODES = (SIZE, SPEED)
+# comparison equivalent to the negation of a comparison with a constant,
+# by operator and side of the constant, as (operator, adjustment of the constant)
+INVERTED_COMPARISONS = {
+    ('<', 'right'): ('>', -1),  # ~(x < c) = x > c-1
+    ('>', 'right'): ('<', 1),  # ~(x > c) = x < c+1
+    ('<', 'left'): ('>', 1),  # ~(c < x) = c+1 > x
+    ('>', 'left'): ('<', -1),  # ~(c > x) = c-1 < x
+}
+
+# temp registers holding the operand and a scratch value of a reduced operation,
+# which are only live within its instruction sequence
+OPERAND_TEMP = 1
+SCRATCH_TEMP = 2
+# temp registers holding the array elements read more than once by an expression,
+# which are only live until the next call within the expression
+ARRAY_CACHE_TEMPS = (3, 4, 5, 6, 7)
+# uses of a temp register by an array element read
+STORE = 'store'
+LOAD = 'load'
+# number of static variables of a program, all classes together (RAM 16-255)
+STATIC_SEGMENT_SIZE = 240
+
+
+class CodeGenerator(NodeVisitor):
+    """CodeGenerator class of the Jack compiler.
+
+    Walks the syntax tree of a class built by the CompilationEngine,
+    and emits the corresponding VM code through a VmWriter.
+
+    Properties:
+        output: VM writer the code is emitted to
+        names: name table interning the names used in the compilation
+        symbol_tables: class level and subroutine level symbol tables
+        classname: name of the class being compiled
+        subroutine: name of the subroutine being compiled
+        subroutine_type: kind of the subroutine being compiled
+        label_count: counter used for generating unique labels
+        strength_reduction: SIZE or SPEED to lower multiplications and divisions
+            by constants into cheaper instructions, None not to
+        pool_strings: whether each distinct string constant is built only once
+        pool_limit: largest number of string constants the class may pool, as
+            each takes a static variable from the segment shared by all classes
+        string_pool: static variable index holding each pooled string constant
+        optimize_branches: whether the branches on boolean conditions jump
+            on the condition itself rather than on its negation
+        tail_calls: whether the self tail calls of functions and methods
+            are turned into jumps to the start of the subroutine
+        entry_label: label of the start of the subroutine being compiled,
+            None if it makes no self tail call
+        cache_arrays: whether the array elements an expression reads more
+            than once between calls are only read once
+        array_cache: whether each array element read of the expression being
+            compiled stores the element into a temp register or loads it from
+            one, as (STORE or LOAD, temp index), by node id
+        binary_commands: emitter of the command of each binary operator
+        unary_commands: emitter of the command of each unary operator
+
+    Methods:
+        generate(ClassDec) -> None
+    """
+
+    def __init__(self, vm_writer, names=None, strength_reduction=None, pool_strings=False,
+                 optimize_branches=False, tail_calls=False, cache_arrays=False,
+                 pool_limit=STATIC_SEGMENT_SIZE):
+        self.output = vm_writer
+        self.strength_reduction = strength_reduction
+        self.pool_strings = pool_strings
+        self.pool_limit = pool_limit
+        self.optimize_branches = optimize_branches
+        self.tail_calls = tail_calls
+        self.entry_label = None
+        self.cache_arrays = cache_arrays
+        self.array_cache = {}
+        self.string_pool = {}
+        self.names = names if names is not None else NameTable()
+        self.symbol_tables = {'class': SymbolTable(), 'subroutine': SymbolTable()}
+        self.classname = ''
+        self.subroutine = ''
+        self.subroutine_type = ''
+        self.label_count = 0
+
+        # emitter of the command of each operator
+        self.binary_commands = {op: partial(vm_writer.write_arithmetic, command)
+                                for op, command in BINARY_COMMANDS.items()}
+        self.binary_commands.update({op: partial(vm_writer.write_call, name, 2)
+                                     for op, name in BINARY_CALLS.items()})
+        self.unary_commands = {op: partial(vm_writer.write_arithmetic, command)
+                               for op, command in UNARY_COMMANDS.items()}
+
+    def generate(self, tree):
+        """Emit the VM code of a class"""
+        self.visit(tree)
+
+    def visit_ClassDec(self, node):
+        self.classname = node.name
+        self.symbol_tables['class'].reset()
+        self.string_pool = {}
+
+        for class_var_dec in node.class_var_decs:
+            self.visit(class_var_dec)
+        for subroutine in node.subroutines:
+            self.visit(subroutine)
+
+    def visit_ClassVarDec(self, node):
+        kind = VariableKind.STATIC if node.kind == 'static' else VariableKind.FIELD
+        for name in node.names:
+            self.symbol_tables['class'].define(name, node.type, kind)
+
+    def visit_SubroutineDec(self, node):
+        # reset subroutine level symbol table
+        self.symbol_tables['subroutine'].reset()
+
+        self.subroutine_type = node.kind
+        self.subroutine = self.names.intern(f'{self.classname}.{node.name}')
+
+        # if compiling a method, add 'this' reference to symbol table
+        if self.subroutine_type == 'method':
+            self.symbol_tables['subroutine'].define('this', self.classname, VariableKind.ARG)
+
+        for parameter in node.parameters:
+            self.symbol_tables['subroutine'].define(parameter.name, parameter.type, VariableKind.ARG)
+        for var_dec in node.var_decs:
+            for name in var_dec.names:
+                self.symbol_tables['subroutine'].define(name, var_dec.type, VariableKind.VAR)
+
+        num_vars = self.symbol_tables['subroutine'].var_count(VariableKind.VAR)
+        self.output.write_function(self.subroutine, num_vars)
+
+        # self tail calls jump back here, before 'this' is set from the new target object
+        self.entry_label = None
+        if self.tail_calls and any(self._is_self_tail_call(statement)
+                                   for statement in _return_statements(node.statements)):
+            self.entry_label = self._generate_label()
+            self.output.write_label(self.entry_label)
+
+        # generate object instantiation code if the subroutine is a constructor
+        if self.subroutine_type == 'constructor':
+            # get number of field variables in class to determine object size
+            num_field_vars = self.symbol_tables['class'].var_count(VariableKind.FIELD)
+            # allocate memory block of required size for the object
+            self.output.write_push(Segment.CONSTANT, num_field_vars)
+            self.output.write_call('Memory.alloc', 1)
+            # set THIS to point to the base address of the newly allocated memory block
+            self.output.write_pop(Segment.POINTER, 0)
+        # if subroutine is a method, generate code to map the target object to 'this' segment
+        elif self.subroutine_type == 'method':
+            self.output.write_push(Segment.ARGUMENT, 0)
+            self.output.write_pop(Segment.POINTER, 0)
+
+        self._visit_statements(node.statements)
+
+    def visit_LetStatement(self, node):
+        # get VM memory segment and index of the variable from symbol table
+        segment, index = self._variable_location(node.name)
+
+        if node.index is not None:  # array element assignment
+            self.output.write_push(segment, index)  # base address of array
+            self._visit_expression(node.index)  # index value
+            self.output.write_arithmetic(ArithmeticCommand.ADD)  # target address
+            self._visit_expression(node.value)
+            self.output.write_pop(Segment.TEMP, 0)  # backup expression value
+            self.output.write_pop(Segment.POINTER, 1)  # align target address with 'THAT' segment
+            self.output.write_push(Segment.TEMP, 0)
+            self.output.write_pop(Segment.THAT, 0)  # assign expression value to target address
+        else:  # variable assignment
+            self._visit_expression(node.value)
+            self.output.write_pop(segment, index)
+
+    def visit_IfStatement(self, node):
+        if self.optimize_branches and _is_boolean(node.condition):
+            self._visit_boolean_if(node)
+            return
+
+        self._visit_expression(node.condition)
+        self.output.write_arithmetic(ArithmeticCommand.NOT)
+        label_1 = self._generate_label()
+        self.output.write_if(label_1)
+        self._visit_statements(node.statements)
+
+        # handle optional else clause
+        if node.else_statements is not None:
+            label_2 = self._generate_label()
+            self.output.write_goto(label_2)
+            self.output.write_label(label_1)
+            self._visit_statements(node.else_statements)
+            self.output.write_label(label_2)
+        else:
+            self.output.write_label(label_1)
+
+    def _visit_boolean_if(self, node):
+        """Compile an if statement whose condition is known to be -1 or 0"""
+        if node.else_statements is None:
+            end_label = self._generate_label()
+            self._visit_branch(node.condition, False, end_label)
+            self._visit_statements(node.statements)
+            self.output.write_label(end_label)
+            return
+
+        # jump to the if clause, fall through to the else clause
+        if_label = self._generate_label()
+        end_label = self._generate_label()
+        self._visit_branch(node.condition, True, if_label)
+        self._visit_statements(node.else_statements)
+        self.output.write_goto(end_label)
+        self.output.write_label(if_label)
+        self._visit_statements(node.statements)
+        self.output.write_label(end_label)
+
+    def visit_WhileStatement(self, node):
+        if self.optimize_branches and _is_boolean(node.condition):
+            # test the condition at the bottom of the loop,
+            # so each iteration takes a single jump
+            test_label = self._generate_label()
+            body_label = self._generate_label()
+            self.output.write_goto(test_label)
+            self.output.write_label(body_label)
+            self._visit_statements(node.statements)
+            self.output.write_label(test_label)
+            self._visit_branch(node.condition, True, body_label)
+            return
+
+        label_1 = self._generate_label()
+        label_2 = self._generate_label()
+        self.output.write_label(label_1)
+        self._visit_expression(node.condition)
+        self.output.write_arithmetic(ArithmeticCommand.NOT)
+        self.output.write_if(label_2)
+        self._visit_statements(node.statements)
+        self.output.write_goto(label_1)
+        self.output.write_label(label_2)
+
+    def _visit_branch(self, condition, jump_if, label):
+        """Emit a jump to the label, taken if the boolean condition is jump_if.
+        A negation is emitted only when it cannot be folded into the condition.
+        """
+        # ~c jumps if c does not
+        while isinstance(condition, UnaryOp) and condition.op == '~':
+            condition = condition.operand
+            jump_if = not jump_if
+
+        if not jump_if:
+            inverted = _inverted_comparison(condition)
+            if inverted is not None:
+                condition, jump_if = inverted, True
+
+        self._visit_expression(condition)
+        if not jump_if:
+            self.output.write_arithmetic(ArithmeticCommand.NOT)
+        self.output.write_if(label)
+
+    def visit_DoStatement(self, node):
+        self._visit_expression(node.call)
+        # discard return value of void subroutine
+        self.output.write_pop(Segment.TEMP, 0)
+
+    def visit_ReturnStatement(self, node):
+        if self.entry_label is not None and self._is_self_tail_call(node):
+            self._jump_to_entry(node.value)
+            return
+
+        if node.value is not None:
+            self._visit_expression(node.value)
+        else:
+            self.output.write_push(Segment.CONSTANT, 0)
+        self.output.write_return()
+
+    def _is_self_tail_call(self, node):
+        """Return True if the return statement returns the result of a call
+        of the subroutine being compiled, with as many arguments as it has,
+        on the current object or another object of the class for a method
+        """
+        call = node.value
+        if not isinstance(call, SubroutineCall) or call.name != self.subroutine.split('.')[1]:
+            return False
+        num_args = len(call.arguments) + (1 if self.subroutine_type == 'method' else 0)
+        if num_args != self.symbol_tables['subroutine'].var_count(VariableKind.ARG):
+            return False
+
+        if call.receiver is None:
+            return self.subroutine_type == 'method'
+        table = self._symbol_table_lookup(call.receiver)
+        if table is None:
+            return self.subroutine_type == 'function' and call.receiver == self.classname
+        return (self.subroutine_type == 'method'
+                and self.symbol_tables[table].type_of(call.receiver) == self.classname)
+
+    def _jump_to_entry(self, call):
+        """Emit a self tail call as the reassignment of the arguments,
+        followed by a jump to the start of the subroutine
+        """
+        # the target object only changes if the call has a receiver
+        first_arg = 1 if self.subroutine_type == 'method' else 0
+        if self.subroutine_type == 'method' and call.receiver is not None:
+            self.output.write_push(*self._variable_location(call.receiver))
+            first_arg = 0
+
+        # all the new arguments are computed before any of the old ones is overwritten
+        for argument in call.arguments:
+            self._visit_expression(argument)
+        num_args = len(call.arguments) + (1 if self.subroutine_type == 'method' else 0)
+        for index in reversed(range(first_arg, num_args)):
+            self.output.write_pop(Segment.ARGUMENT, index)
+
+        # the locals are zeroed again, as by the function command
+        for index in range(self.symbol_tables['subroutine'].var_count(VariableKind.VAR)):
+            self.output.write_push(Segment.CONSTANT, 0)
+            self.output.write_pop(Segment.LOCAL, index)
+        self.output.write_goto(self.entry_label)
+
+    def visit_IntegerConstant(self, node):
+        # folded constants may be negative, which cannot be pushed directly
+        if node.value >= 0:
+            self.output.write_push(Segment.CONSTANT, node.value)
+        elif node.value == -0x8000:
+            self.output.write_push(Segment.CONSTANT, 0x7FFF)
+            self.output.write_arithmetic(ArithmeticCommand.NOT)
+        else:
+            self.output.write_push(Segment.CONSTANT, -node.value)
+            self.output.write_arithmetic(ArithmeticCommand.NEG)
+
+    def visit_StringConstant(self, node):
+        if self.pool_strings:
+            self._push_pooled_string(node.value)
+        else:
+            self._build_string(node.value)
+
+    def _push_pooled_string(self, string):
+        """Push a string constant kept in a hidden static variable of the class,
+        which is built the first time it is used, or build it every time if
+        the static segment has no room left for it
+        """
+        index = self.string_pool.get(string)
+        if index is None:
+            if len(self.string_pool) >= self.pool_limit:
+                self._build_string(string)
+                return
+            # hidden statics come after the declared ones
+            index = self.symbol_tables['class'].var_count(VariableKind.STATIC) + len(self.string_pool)
+            self.string_pool[string] = index
+
+        label = self._generate_label()
+        self.output.write_push(Segment.STATIC, index)
+        self.output.write_if(label)  # already built
+        self._build_string(string)
+        self.output.write_pop(Segment.STATIC, index)
+        self.output.write_label(label)
+        self.output.write_push(Segment.STATIC, index)
+
+    def _build_string(self, string):
+        # pass string length as an argument to String constructor
+        self.output.write_push(Segment.CONSTANT, len(string))
+        self.output.write_call('String.new', 1)
+        for char in string:  # initialize String with each character
+            self.output.write_push(Segment.CONSTANT, ord(char))
+            self.output.write_call('String.appendChar', 2)
+
+    def visit_KeywordConstant(self, node):
+        if node.value in ('false', 'null'):
+            self.output.write_push(Segment.CONSTANT, 0)
+        elif node.value == 'true':
+            self.output.write_push(Segment.CONSTANT, 1)
+            self.output.write_arithmetic(ArithmeticCommand.NEG)
+        elif node.value == 'this':
+            self.output.write_push(Segment.POINTER, 0)
+
+    def visit_Variable(self, node):
+        if self._symbol_table_lookup(node.name):
+            self.output.write_push(*self._variable_location(node.name))
+
+    def visit_ArrayAccess(self, node):
+        action, temp = self.array_cache.get(id(node), (None, None))
+        if action == LOAD:
+            self.output.write_push(Segment.TEMP, temp)
+            return None
+
+        self.output.write_push(*self._variable_location(node.name))  # base address of array
+        items = [
+            node.index,  # index value
+            self._read_array_element,
+        ]
+        if action == STORE:
+            # keep a copy of the element for its next reads
+            items += [self._pop_temp(temp), self._push_temp(temp)]
+        return items
+
+    def visit_SubroutineCall(self, node):
+        num_args = 0
+
+        if node.receiver is not None:
+            # check if the name before the dot is in a symbol table, and thus,
+            # an object, which indicates a method call. If not, it is a function call
+            if table := self._symbol_table_lookup(node.receiver):
+                # pass the target object as the first argument
+                self.output.write_push(*self._variable_location(node.receiver))
+                num_args = 1  # set argument count for method call to 1
+
+                # replace varName with className of object
+                var_type = self.symbol_tables[table].type_of(node.receiver)
+                subroutine_name = f'{var_type}.{node.name}'
+            else:
+                subroutine_name = f'{node.receiver}.{node.name}'
+
+        else:  # indicates a method call on the current object
+            # pass 'this' (current object) as the first argument
+            self.output.write_push(Segment.POINTER, 0)
+            num_args = 1  # set argument count for method call to 1
+            # prepend className to method call
+            subroutine_name = f'{self.classname}.{node.name}'
+
+        num_args += len(node.arguments)
+        return [
+            *node.arguments,
+            partial(self.output.write_call, self.names.intern(subroutine_name), num_args),
+        ]
+
+    def visit_UnaryOp(self, node):
+        return [node.operand, self.unary_commands[node.op]]
+
+    def visit_BinaryOp(self, node):
+        if self.strength_reduction and node.op in ('*', '/'):
+            items = self._reduce_strength(node)
+            if items is not None:
+                return items
+        return [node.left, node.right, self.binary_commands[node.op]]
+
+    def _reduce_strength(self, node):
+        """Return the items computing a multiplication or a division by a
+        constant without calling the OS, or None if it is not worth it.
+        """
+        if isinstance(node.right, IntegerConstant):
+            operand, constant = node.left, node.right.value
+        elif node.op == '*' and isinstance(node.left, IntegerConstant):
+            operand, constant = node.right, node.left.value
+        else:
+            return None
+
+        magnitude = abs(constant)
+        if not 2 <= magnitude <= 0x7FFF:
+            return None
+
+        if node.op == '/':
+            # only powers of two are cheaper, and never smaller than the call
+            if magnitude & (magnitude - 1) or self.strength_reduction != SPEED:
+                return None
+            items = [operand, self._pop_temp(OPERAND_TEMP)]
+            items += self._division_by_power_of_two(magnitude.bit_length() - 1)
+            call_size = 2
+        elif isinstance(operand, Variable) and self._symbol_table_lookup(operand.name):
+            # a variable can be pushed again instead of being kept in a temp
+            push_operand = partial(self.output.write_push, *self._variable_location(operand.name))
+            items = self._multiplication(push_operand, magnitude)
+            call_size = 3
+        else:
+            items = [operand, self._pop_temp(OPERAND_TEMP)]
+            items += self._multiplication(self._push_temp(OPERAND_TEMP), magnitude)
+            call_size = 2
+
+        if constant < 0:
+            items.append(self.unary_commands['-'])
+
+        # the emitters in the items are single instructions
+        size = sum(1 for item in items if not isinstance(item, Node))
+        if self.strength_reduction == SIZE and size > call_size:
+            return None
+        return items
+
+    def _multiplication(self, push_operand, multiplier):
+        """Return the emitters multiplying the operand by the multiplier,
+        by doubling the product for each bit of the multiplier, and adding
+        the operand for each bit set.
+        """
+        add = self.binary_commands['+']
+        emitters = [push_operand]
+
+        for i, bit in enumerate(bin(multiplier)[3:]):
+            if i == 0:
+                emitters += [push_operand, add]
+            else:
+                emitters += [self._pop_temp(SCRATCH_TEMP), self._push_temp(SCRATCH_TEMP),
+                             self._push_temp(SCRATCH_TEMP), add]
+            if bit == '1':
+                emitters += [push_operand, add]
+
+        return emitters
+
+    def _division_by_power_of_two(self, shift):
+        """Return the emitters dividing the operand in the operand temp by
+        2^shift, truncating towards zero like Math.divide. The absolute value of
+        the operand is shifted right by adding the value of each of its bits,
+        and the sign is restored afterwards.
+        """
+        add = self.binary_commands['+']
+        sub = self.binary_commands['-']
+        bitwise_and = self.binary_commands['&']
+        push_operand = self._push_temp(OPERAND_TEMP)
+        push_sign = self._push_temp(SCRATCH_TEMP)
+
+        # sign: -1 if the operand is negative, 0 otherwise,
+        # and |x| = x - (2x & sign)
+        emitters = [
+            push_operand, self._push_constant(0), self.binary_commands['<'], self._pop_temp(SCRATCH_TEMP),
+            push_operand, push_operand, push_operand, add, push_sign, bitwise_and, sub,
+            self._pop_temp(OPERAND_TEMP),
+            self._push_constant(0),
+        ]
+
+        # add 2^(i-shift) for each bit i of |x| that is set
+        for i in range(shift, 15):
+            emitters += [push_operand, self._push_constant(1 << i), bitwise_and,
+                         self._push_constant(0), self.binary_commands['>'],
+                         self._push_constant(1 << (i - shift)), bitwise_and, add]
+        # bit 15 is only set for |-32768|, which stays negative
+        emitters += [push_operand, self._push_constant(0), self.binary_commands['<'],
+                     self._push_constant(1 << (15 - shift)), bitwise_and, add]
+
+        # restore the sign: q - (2q & sign)
+        emitters += [self._pop_temp(OPERAND_TEMP), push_operand, push_operand, push_operand, add,
+                     push_sign, bitwise_and, sub]
+
+        return emitters
+
+    def _push_constant(self, value):
+        return partial(self.output.write_push, Segment.CONSTANT, value)
+
+    def _push_temp(self, index):
+        return partial(self.output.write_push, Segment.TEMP, index)
+
+    def _pop_temp(self, index):
+        return partial(self.output.write_pop, Segment.TEMP, index)
+
+    def _visit_statements(self, statements):
+        for statement in statements:
+            self.visit(statement)
+
+    def _visit_expression(self, node):
+        """Emit the code of an expression.
+
+        The visit methods of the nodes with subexpressions return the
+        subexpressions and the commands to emit after them, in order,
+        which are then processed with an explicit stack instead of
+        recursion, so the depth of an expression is not limited by the
+        recursion limit.
+        """
+        if self.cache_arrays:
+            self.array_cache = _array_cache(node)
+
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, Node):
+                items = self.visit(item)
+                if items:
+                    stack.extend(reversed(items))
+            else:
+                item()
+
+        self.array_cache = {}
+
+    def _read_array_element(self):
+        self.output.write_arithmetic(ArithmeticCommand.ADD)  # get target address
+        # align target address with 'THAT' segment
+        self.output.write_pop(Segment.POINTER, 1)
+        self.output.write_push(Segment.THAT, 0)  # get value of array element
+
+    def _variable_location(self, variable):
+        """Return the VM segment and index of the specified variable"""
+        table = self._symbol_table_lookup(variable)
+        segment = self._determine_var_segment(self.symbol_tables[table].kind_of(variable))
+        index = self.symbol_tables[table].index_of(variable)
+        return segment, index
+
+    def _symbol_table_lookup(self, variable):
+        """Return which symbol table (subroutine, class) contains the specified variable.
+        Return None if neither does.
+        """
+        if self.symbol_tables['subroutine'].index_of(variable) >= 0:
+            return 'subroutine'
+        elif self.symbol_tables['class'].index_of(variable) >= 0:
+            return 'class'
+        else:
+            return None
+
+    def _determine_var_segment(self, kind):
+        """Return VM segment that the variable kind corresponds to"""
+        if kind == VariableKind.STATIC:
+            return Segment.STATIC
+        if kind == VariableKind.FIELD:
+            return Segment.THIS
+        if kind == VariableKind.ARG:
+            return Segment.ARGUMENT
+        if kind == VariableKind.VAR:
+            return Segment.LOCAL
+
+    def _generate_label(self):
+        self.label_count += 1
+        return f'L{self.label_count}'
+
+
+def _return_statements(statements):
+    """Return the return statements among the statements and their nested statements"""
+    returns = []
+    pending = list(statements)
+    while pending:
+        statement = pending.pop()
+        if isinstance(statement, ReturnStatement):
+            returns.append(statement)
+        elif isinstance(statement, IfStatement):
+            pending += statement.statements
+            pending += statement.else_statements or []
+        elif isinstance(statement, WhileStatement):
+            pending += statement.statements
+    return returns
+
+
+def _array_cache(node):
+    """Return how the array element reads of an expression use the temp
+    registers, as (STORE or LOAD, temp index) by node id.
+
+    The expression is walked in evaluation order: a read of an element
+    already read since the last call loads it from the temp register the
+    first read stored it into, as long as there are temp registers left.
+    Calls end the reuse of the elements read before them, as the called
+    subroutine could write to the arrays or to the temp registers; this
+    includes the OS calls of the multiplications, divisions and string
+    constants.
+    """
+    numbers, calls = _value_numbers(node)
+    reuses = []
+    first_reads = {}  # first read of each element since the last call, by value number
+    stack = [(node, False, None)]
+
+    while stack:
+        node, exiting, key = stack.pop()
+        if exiting:
+            if key is not None:
+                first_reads.setdefault(key, node)
+            else:
+                first_reads = {}
+            continue
+
+        if isinstance(node, ArrayAccess) and not calls[id(node.index)]:
+            key = numbers[id(node)]
+            if key in first_reads:
+                reuses.append((first_reads[key], node, key))
+                continue  # the index is not evaluated again
+            stack.append((node, True, key))
+        elif _calls_subroutine(node):
+            stack.append((node, True, None))
+        stack.extend((child, False, None) for child in reversed(node.children()))
+
+    actions = {}
+    temps = {}
+    for first_read, reuse, key in reuses:
+        if key not in temps:
+            if len(temps) == len(ARRAY_CACHE_TEMPS):
+                continue
+            temps[key] = ARRAY_CACHE_TEMPS[len(temps)]
+        actions[id(first_read)] = (STORE, temps[key])
+        actions[id(reuse)] = (LOAD, temps[key])
+    return actions
+
+
+def _value_numbers(node):
+    """Return a number for each subexpression of an expression, equal for
+    equal subexpressions, and whether evaluating each calls a subroutine,
+    both by node id.
+
+    The expression is walked in postorder with an explicit stack, so each
+    node is numbered from the numbers of its children, in a time linear
+    in the size of the expression however deep it is.
+    """
+    numbers = {}
+    calls = {}
+    table = {}  # number of each subexpression, by type, fields and numbers of the children
+    stack = [(node, False)]
+
+    while stack:
+        node, children_numbered = stack.pop()
+        children = node.children()
+        if not children_numbered:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+            continue
+
+        key = [type(node).__name__]
+        for field in node.fields:
+            value = getattr(node, field)
+            if isinstance(value, list):
+                key.append(len(value))  # so that the key tells where the list ends
+            elif not isinstance(value, Node):
+                key.append(value)
+        key.extend(numbers[id(child)] for child in children)
+        numbers[id(node)] = table.setdefault(tuple(key), len(table))
+        calls[id(node)] = _calls_subroutine(node) or any(calls[id(child)] for child in children)
+
+    return numbers, calls
+
+
+def _calls_subroutine(node):
+    """Return True if evaluating the node itself, not its subexpressions,
+    calls a subroutine, including the OS
+    """
+    return (isinstance(node, (SubroutineCall, StringConstant))
+            or isinstance(node, BinaryOp) and node.op in BINARY_CALLS)
+
+
+def _is_boolean(node):
+    """Return True if the expression is known to evaluate to -1 or 0"""
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, BinaryOp) and node.op in ('&', '|'):
+            pending += [node.left, node.right]
+        elif isinstance(node, UnaryOp) and node.op == '~':
+            pending.append(node.operand)
+        elif not (isinstance(node, BinaryOp) and node.op in ('<', '>', '=')
+                  or isinstance(node, KeywordConstant) and node.value in ('true', 'false')
+                  or isinstance(node, IntegerConstant) and node.value in (-1, 0)):
+            return False
+    return True
+
+
+def _inverted_comparison(node):
+    """Return the comparison equivalent to the negation of a comparison
+    of an expression with a constant, or None if there is none
+    """
+    if not (isinstance(node, BinaryOp) and node.op in ('<', '>')):
+        return None
+
+    if isinstance(node.right, IntegerConstant):
+        op, adjustment = INVERTED_COMPARISONS[(node.op, 'right')]
+        constant = node.right.value + adjustment
+        if -0x8000 <= constant <= 0x7FFF:
+            return BinaryOp(op, node.left, IntegerConstant(constant))
+    elif isinstance(node.left, IntegerConstant):
+        op, adjustment = INVERTED_COMPARISONS[(node.op, 'left')]
+        constant = node.left.value + adjustment
+        if -0x8000 <= constant <= 0x7FFF:
+            return BinaryOp(op, IntegerConstant(constant), node.right)
+    return None
@@ -6,516 +6,435 @@ Classes:
 
 import sys
 
-from constants import TerminalElement, TokenType, keywords
-from enums.arithmetic_command import ArithmeticCommand
-from enums.segment import Segment
-from enums.symbol_table_field import SymbolTableField
-from enums.variable_kind import VariableKind
-from symbol_table import SymbolTable
+from constants import TokenType
+from syntax_tree import (
+    ArrayAccess,
+    BinaryOp,
+    ClassDec,
+    ClassVarDec,
+    DoStatement,
+    IfStatement,
+    IntegerConstant,
+    KeywordConstant,
+    LetStatement,
+    Parameter,
+    ReturnStatement,
+    StringConstant,
+    SubroutineCall,
+    SubroutineDec,
+    UnaryOp,
+    VarDec,
+    Variable,
+    WhileStatement,
+)
+
+
+BINARY_OPS = frozenset(('+', '-', '*', '/', '&', '|', '<', '>', '='))
+UNARY_OPS = frozenset(('-', '~'))
+KEYWORD_CONSTANTS = frozenset(('true', 'false', 'null', 'this'))
+
+# node of a constant term, by token type
+CONSTANT_NODES = {
+    TokenType.INT_CONST: lambda token: IntegerConstant(int(token.text), token.text),
+    TokenType.STRING_CONST: lambda token: StringConstant(token.value),
+    TokenType.KEYWORD: lambda token: KeywordConstant(token.text),
+}
+
+# kinds of the frames on the stack used for parsing nested expressions
+EXPRESSION, TERM, UNARY, PARENTHESES, ARRAY_INDEX, ARGUMENTS = range(6)
 
 
 class CompilationEngine:
     """CompilationEngine class of the Jack compiler.
 
-    Emits a structured representation of the input source code
-    wrapped in XML tags.
+    Parses the input source code into a syntax tree (see syntax_tree),
+    which is then handed to the code generator or any other pass.
 
-    Gets input from a Tokenizer and emits output to a file.
-    Output is generated by a series of compile_xxx functions, each designed to
+    Gets input from a Tokenizer and returns the nodes of the tree.
+    The tree is built by a series of compile_xxx functions, each designed to
     handle the compilation of a specific Jack langugage construct xxx.
     Each compile_xxx function should get from the input, and handle,
     all the tokens that make up xxx, advance the Tokenizer exactly beyond these
-    tokens, and output the parsing of xxx.
+    tokens, and return the node (or list of nodes) representing xxx.
 
     Properties:
         input: input stream of tokens
-        output: file object of the output
-        symbol_tables: class level and subroutine level symbol tables
-        classname: name of the class being compiled
-        subroutine: name of the subroutine being compiled
-        subroutine_num_vars: number of local variables in current subroutine
-        label_count: counter used for generating unique labels
+        statement_compilers: compile_xxx function of each statement, by its keyword
 
     Methods:
-        compile_class() -> None
-        compile_class_var_dec() -> None
-        compile_subroutine() -> None
-        compile_parameter_list() -> None
-        compile_subroutine_body() -> None
-        compile_var_dec() -> None
-        compile_statements() -> None
-        compile_let() -> None
-        compile_if() -> None
-        compile_while() -> None
-        compile_do() -> None
-        compile_return() -> None
-        compile_expression_list() -> int
+        compile_class() -> ClassDec
+        compile_class_var_dec() -> ClassVarDec
+        compile_subroutine() -> SubroutineDec
+        compile_parameter_list() -> list of Parameter
+        compile_subroutine_body() -> (list of VarDec, list of statements)
+        compile_var_dec() -> VarDec
+        compile_statements() -> list of statements
+        compile_let() -> LetStatement
+        compile_if() -> IfStatement
+        compile_while() -> WhileStatement
+        compile_do() -> DoStatement
+        compile_return() -> ReturnStatement
+        compile_expression() -> expression node
+        compile_term() -> expression node
+        compile_expression_list() -> list of expression nodes
     """
 
-    def __init__(self, tokenizer, vm_writer):
+    def __init__(self, tokenizer):
         self.input = tokenizer
-        self.symbol_tables = {'class': SymbolTable(), 'subroutine': SymbolTable()}
-        self.output = vm_writer
-        self.classname = ''
-        self.subroutine = ''
-        self.subroutine_num_vars = 0
-        self.subroutine_type = ''
-        self.label_count = 0
-
-    def __del__(self):
-        self.output.close()
 
     def _eat(self, token):
-        # can use token for logging purposes, otherwise this method is redundant
+        # advance over a token the grammar expects, e.g. a keyword or a symbol;
+        # names and constants, which are taken as they are, are simply advanced over
+        current = self.input.token
+        if current is None or current.text != token:
+            self._invalid(token)
         self.input.advance()
-        return
+
+    def _invalid(self, expected):
+        # report that the current token is not what the grammar expects
+        print(f'Invalid token: {expected} is not {self.input.current_token}.')
+        sys.exit(1)
 
     def compile_class(self):
         """Compile a complete class"""
         self._eat('class')
-        self.classname = self.input.current_token
-        self._eat(self.input.current_token)  # className
+        classname = self.input.current_token
+        self.input.advance()  # className
         self._eat('{')
 
+        class_var_decs = []
         while self.input.current_token in ('static', 'field'):
-            self.compile_class_var_dec()
+            class_var_decs.append(self.compile_class_var_dec())
+        subroutines = []
         while self.input.current_token in ('constructor', 'function', 'method'):
-            self.compile_subroutine()
+            subroutines.append(self.compile_subroutine())
 
         self._eat('}')
+        return ClassDec(classname, class_var_decs, subroutines)
 
     def compile_class_var_dec(self):
         """Compile a static or field variable declaration"""
-        var_props = {}  # data for populating the symbol table
-
-        # variable kind
-        if self.input.current_token == 'static':
-            var_props[SymbolTableField.KIND] = VariableKind.STATIC
-        else:
-            var_props[SymbolTableField.KIND] = VariableKind.FIELD
-        self._eat(self.input.current_token)  # 'static'|'field'
-
-        # variable type
-        var_props[SymbolTableField.TYPE] = self.input.current_token
-        self._eat(self.input.current_token)  # type
-
-        # variable name
-        self.symbol_tables["class"].define(
-            self.input.current_token,
-            var_props[SymbolTableField.TYPE],
-            var_props[SymbolTableField.KIND]
-        )  # populate symbol table
-        self._eat(self.input.current_token)  # varName
+        kind = self.input.current_token
+        self.input.advance()  # 'static'|'field'
+        var_type = self.input.current_token
+        self.input.advance()  # type
+        names = [self.input.current_token]
+        self.input.advance()  # varName
 
         # if a comma is present, that means there are more variables
         while self.input.current_token == ',':
             self._eat(',')
-            self.symbol_tables["class"].define(
-                self.input.current_token,
-                var_props[SymbolTableField.TYPE],
-                var_props[SymbolTableField.KIND]
-            )  # populate symbol table
-            self._eat(self.input.current_token)  # varName
+            names.append(self.input.current_token)
+            self.input.advance()  # varName
 
         self._eat(';')
+        return ClassVarDec(kind, var_type, names)
 
     def compile_subroutine(self):
         """Compile a complete method, function, or constructor"""
-        # reset subroutine level symbol table
-        self.symbol_tables['subroutine'].reset()
-        # reset number of local variables
-        self.subroutine_num_vars = 0
-
-        self.subroutine_type = self.input.current_token
-        self._eat(self.input.current_token)  # 'constructor'|'function'|'method'
-        self._eat(self.input.current_token)  # 'void'|type
-        self.subroutine = f'{self.classname}.{self.input.current_token}'
-        self._eat(self.input.current_token)  # subroutineName
+        kind = self.input.current_token
+        self.input.advance()  # 'constructor'|'function'|'method'
+        return_type = self.input.current_token
+        self.input.advance()  # 'void'|type
+        name = self.input.current_token
+        self.input.advance()  # subroutineName
         self._eat('(')
-
-        # if compiling a method, add 'this' reference to symbol table
-        if self.subroutine_type == 'method':
-            self.symbol_tables['subroutine'].define(
-                'this',
-                self.classname,
-                VariableKind.ARG
-            )
-
-        self.compile_parameter_list()
+        parameters = self.compile_parameter_list()
         self._eat(')')
-        self.compile_subroutine_body()
+        var_decs, statements = self.compile_subroutine_body()
+
+        return SubroutineDec(kind, return_type, name, parameters, var_decs, statements)
 
     def compile_parameter_list(self):
         """Compile a (possibly empty) parameter list"""
+        parameters = []
+
         if self.input.current_token != ')':
             arg_type = self.input.current_token
-            self._eat(self.input.current_token)  # type
-            self.symbol_tables['subroutine'].define(
-                self.input.current_token,
-                arg_type,
-                VariableKind.ARG
-            )  # populate symbol table
-            self._eat(self.input.current_token)  # varName
+            self.input.advance()  # type
+            parameters.append(Parameter(arg_type, self.input.current_token))
+            self.input.advance()  # varName
 
             # the presence of a comma means that there are more parameters
             while self.input.current_token == ',':
                 self._eat(',')
                 arg_type = self.input.current_token
-                self._eat(self.input.current_token)  # type
-                self.symbol_tables['subroutine'].define(
-                    self.input.current_token,
-                    arg_type,
-                    VariableKind.ARG
-                )  # populate symbol table
-                self._eat(self.input.current_token)  # varName
+                self.input.advance()  # type
+                parameters.append(Parameter(arg_type, self.input.current_token))
+                self.input.advance()  # varName
+
+        return parameters
 
     def compile_subroutine_body(self):
         """Compile a subroutine's body"""
         self._eat('{')
+        var_decs = []
         while self.input.current_token == 'var':
-            self.compile_var_dec()
-
-        # generate function command after variable declarations are compiled
-        self.output.write_function(self.subroutine, self.subroutine_num_vars)
-
-        # generate object instantiation code if the subroutine is a constructor
-        if self.subroutine_type == 'constructor':
-            # get number of field variables in class to determine object size
-            num_field_vars = self.symbol_tables['class'].var_count(VariableKind.FIELD)
-            # allocate memory block of required size for the object
-            self.output.write_push(Segment.CONSTANT, num_field_vars)
-            self.output.write_call('Memory.alloc', 1)
-            # set THIS to point to the base address of the newly allocated memory block
-            self.output.write_pop(Segment.POINTER, 0)
-        # if subroutine is a method, generate code to map the target object to 'this' segment
-        elif self.subroutine_type == 'method':
-            self.output.write_push(Segment.ARGUMENT, 0)
-            self.output.write_pop(Segment.POINTER, 0)
-
-        self.compile_statements()
+            var_decs.append(self.compile_var_dec())
+        statements = self.compile_statements()
         self._eat('}')
 
+        return var_decs, statements
+
     def compile_var_dec(self):
         """Compile a variable declaration"""
         self._eat('var')
         var_type = self.input.current_token
-        self._eat(self.input.current_token)  # type
-        self.symbol_tables['subroutine'].define(
-            self.input.current_token,
-            var_type,
-            VariableKind.VAR
-        )  # populate symbol table
-        self.subroutine_num_vars += 1  # increment local variable counter
-        self._eat(self.input.current_token)  # varName
+        self.input.advance()  # type
+        names = [self.input.current_token]
+        self.input.advance()  # varName
 
         # check for and compile more variable names
         while self.input.current_token == ',':
             self._eat(',')
-            self.symbol_tables['subroutine'].define(
-                self.input.current_token,
-                var_type,
-                VariableKind.VAR
-            )  # populate symbol table
-            self.subroutine_num_vars += 1  # increment local variable counter
-            self._eat(self.input.current_token)  # varName
+            names.append(self.input.current_token)
+            self.input.advance()  # varName
 
         self._eat(';')
+        return VarDec(var_type, names)
 
     def compile_statements(self):
         """Compile a sequence of statements"""
-        # self.output.write('<statements>\n')
+        statements = []
 
         while self.input.current_token != '}':
-            if self.input.current_token == 'let':
-                self.compile_let()
-            elif self.input.current_token == 'if':
-                self.compile_if()
-            elif self.input.current_token == 'while':
-                self.compile_while()
-            elif self.input.current_token == 'do':
-                self.compile_do()
-            elif self.input.current_token == 'return':
-                self.compile_return()
-
-        # self.output.write('</statements>\n')
+            compile_statement = self.statement_compilers.get(self.input.current_token)
+            if compile_statement is None:
+                print(f'Invalid statement: {self.input.current_token}')
+                sys.exit(1)
+            statements.append(compile_statement(self))
+
+        return statements
 
     def compile_let(self):
         """Compile a let statement"""
         self._eat('let')
         variable = self.input.current_token
-        self._eat(self.input.current_token)  # varName
-
-        # get VM memory segment and index of the variable from symbol table
-        table = self._symbol_table_lookup(variable)
-        segment = self._determine_var_segment(self.symbol_tables[table].kind_of(variable))
-        index = self.symbol_tables[table].index_of(variable)
+        self.input.advance()  # varName
 
         # check if array element assignment or variable assignment
+        index = None
         if self.input.current_token == '[':  # varName'['expression']'
             self._eat('[')
-            self.output.write_push(segment, index)  # base address of array
-            self.compile_expression()  # index value
-            self.output.write_arithmetic(ArithmeticCommand.ADD)  # target address
+            index = self.compile_expression()
             self._eat(']')
-            self._eat('=')
-            self.compile_expression()
-            self.output.write_pop(Segment.TEMP, 0)  # backup expression value
-            self.output.write_pop(Segment.POINTER, 1)  # align target address with 'THAT' segment
-            self.output.write_push(Segment.TEMP, 0)
-            self.output.write_pop(Segment.THAT, 0)  # assign expression value to target address
-        else:  # variable assignment
-            self._eat('=')
-            self.compile_expression()
-            self.output.write_pop(segment, index)
 
+        self._eat('=')
+        value = self.compile_expression()
         self._eat(';')
 
+        return LetStatement(variable, index, value)
+
     def compile_if(self):
         """Compile an if statement, possibly with a trailing else clause"""
         self._eat('if')
         self._eat('(')
-        self.compile_expression()
-        self.output.write_arithmetic(ArithmeticCommand.NOT)
-        label_1 = self._generate_label()
-        self.output.write_if(label_1)
+        condition = self.compile_expression()
         self._eat(')')
         self._eat('{')
-        self.compile_statements()
+        statements = self.compile_statements()
         self._eat('}')
 
         # handle optional else clause
+        else_statements = None
         if self.input.current_token == 'else':
             self._eat('else')
             self._eat('{')
-            label_2 = self._generate_label()
-            self.output.write_goto(label_2)
-            self.output.write_label(label_1)
-            self.compile_statements()
-            self.output.write_label(label_2)
+            else_statements = self.compile_statements()
             self._eat('}')
-        else:
-            self.output.write_label(label_1)
+
+        return IfStatement(condition, statements, else_statements)
 
     def compile_while(self):
         """Compile a while statement"""
         self._eat('while')
         self._eat('(')
-        label_1 = self._generate_label()
-        label_2 = self._generate_label()
-        self.output.write_label(label_1)
-        self.compile_expression()
-        self.output.write_arithmetic(ArithmeticCommand.NOT)
-        self.output.write_if(label_2)
+        condition = self.compile_expression()
         self._eat(')')
         self._eat('{')
-        self.compile_statements()
-        self.output.write_goto(label_1)
-        self.output.write_label(label_2)
+        statements = self.compile_statements()
         self._eat('}')
 
+        return WhileStatement(condition, statements)
+
     def compile_do(self):
         """Compile a do statement"""
         self._eat('do')
-        self._compile_subroutine_call()
-        # discard return value of void subroutine
-        self.output.write_pop(Segment.TEMP, 0)
+        call = self._compile_subroutine_call()
         self._eat(';')
 
+        return DoStatement(call)
+
     def compile_return(self):
         """Compile a return statement"""
         self._eat('return')
+        value = None
         if self.input.current_token != ';':
-            self.compile_expression()
-        else:
-            self.output.write_push(Segment.CONSTANT, 0)
-        self.output.write_return()
+            value = self.compile_expression()
         self._eat(';')
 
+        return ReturnStatement(value)
+
     def compile_expression(self):
         """Compile an expression"""
-        self.compile_term()  # term
-
-        # (op term)
-        while self.input.current_token in ('+', '-', '*', '/', '&', '|', '<', '>', '='):
-            op = self.input.current_token  # remember operation to be performed postfix
-            self._eat(self.input.current_token)
-            self.compile_term()
-
-            if op == '+':
-                self.output.write_arithmetic(ArithmeticCommand.ADD)
-            elif op == '-':
-                self.output.write_arithmetic(ArithmeticCommand.SUB)
-            elif op == '*':
-                self.output.write_call('Math.multiply', 2)
-            elif op == '/':
-                self.output.write_call('Math.divide', 2)
-            elif op == '&':
-                self.output.write_arithmetic(ArithmeticCommand.AND)
-            elif op == '|':
-                self.output.write_arithmetic(ArithmeticCommand.OR)
-            elif op == '<':
-                self.output.write_arithmetic(ArithmeticCommand.LT)
-            elif op == '>':
-                self.output.write_arithmetic(ArithmeticCommand.GT)
-            elif op == '=':
-                self.output.write_arithmetic(ArithmeticCommand.EQ)
+        return self._compile_nested([[EXPRESSION, None, None]])
 
     def compile_term(self):
         """Compile a term"""
-        # (unaryOp term)
-        if self.input.current_token in ('-', '~'):
-            if self.input.current_token == '-':
-                op = ArithmeticCommand.NEG
-            else:
-                op = ArithmeticCommand.NOT
-            self._eat(self.input.current_token)
-            self.compile_term()
-            self.output.write_arithmetic(op)
-
-        # '('expression')'
-        elif self.input.current_token == '(':
-            self._eat('(')
-            self.compile_expression()
-            self._eat(')')
-
-        # integerConstant|stringConstant|keywordConstant|varName
-        else:
-            term = self.input.current_token  # save term for later use
-            self._eat(self.input.current_token)
-
-            if term.isdecimal():  # integerConstant
-                self.output.write_push(Segment.CONSTANT, term)
-
-            elif term.startswith('"'):  # stringConstant
-                # pass string length as an argument to String constructor
-                str_without_quotes = term[1:-1]
-                self.output.write_push(Segment.CONSTANT, len(str_without_quotes))
-                self.output.write_call('String.new', 1)
-                for char in str_without_quotes:  # initialize String with each character
-                    self.output.write_push(Segment.CONSTANT, ord(char))
-                    self.output.write_call('String.appendChar', 2)
-
-            elif keywords.get(term):  # keywordConstant
-                if term in ('false', 'null'):
-                    self.output.write_push(Segment.CONSTANT, 0)
-                elif term == 'true':
-                    self.output.write_push(Segment.CONSTANT, 1)
-                    self.output.write_arithmetic(ArithmeticCommand.NEG)
-                elif term == 'this':
-                    self.output.write_push(Segment.POINTER, 0)
-
-            elif table:= self._symbol_table_lookup(term):  # varName
-                segment = self._determine_var_segment(self.symbol_tables[table].kind_of(term))
-                index = self.symbol_tables[table].index_of(term)
-                self.output.write_push(segment, index)
-
-                if self.input.current_token == '[':  # varName'['expression']'
-                    self._eat('[')
-                    self.compile_expression()  # index value
-                    self.output.write_arithmetic(ArithmeticCommand.ADD)  # get target address
-                    # align target address with 'THAT' segment
-                    self.output.write_pop(Segment.POINTER, 1)
-                    self.output.write_push(Segment.THAT, 0)  # get value of array element
-                    self._eat(']')
-
-                if self.input.current_token == '.':  # subroutine (method on varName object)
-                    self._eat('.')
-                    self._compile_subroutine_call(call_on=term)
-
-            elif self.input.current_token == '(':  # subroutineCall (method on current object)
-                self._compile_subroutine_call(call_on=None, override_name=term)
-
-            elif self.input.current_token == '.':  # subroutineCall (function)
-                self._eat('.')
-                self._compile_subroutine_call(call_on=term)
+        return self._compile_nested([(TERM,)])
 
     def compile_expression_list(self):
         """Compile an (possibly empty) comma-separated list of expressions.
-        Return the number of expressions in the list.
+        Return the list of expressions.
         """
-        num_args = 0
+        expressions = []
 
         if self.input.current_token != ')':
-            self.compile_expression()
-            num_args += 1
+            expressions.append(self.compile_expression())
         while self.input.current_token == ',':
             self._eat(',')
-            self.compile_expression()
-            num_args += 1
+            expressions.append(self.compile_expression())
 
-        return num_args
+        return expressions
 
-    def _compile_subroutine_call(self, call_on=None, override_name=None):
+    def _compile_nested(self, stack):
+        """Compile the expression or term described by the bottom frame of the stack.
+
+        Instead of recursing, each construct opening a nested expression or
+        term pushes a frame, which is popped again once the nested part is
+        complete, so the depth of an expression is not limited by the
+        recursion limit.
+        """
+        while True:
+            # parse the start of a term, until a complete term is found
+            # or a nested expression or term is opened
+            token = self.input.token
+            if token is None:
+                self._invalid('term')
+
+            if token.type == TokenType.SYMBOL:
+                if token.text == '(':  # '('expression')'
+                    stack.append((PARENTHESES,))
+                    stack.append([EXPRESSION, None, None])
+                elif token.text in UNARY_OPS:  # (unaryOp term)
+                    stack.append((UNARY, token.text))
+                else:
+                    self._invalid('term')
+                self.input.advance()
+                continue
+
+            # integerConstant|stringConstant|keywordConstant
+            if token.type != TokenType.IDENTIFIER:
+                constant_node = CONSTANT_NODES.get(token.type)
+                if constant_node is None or (token.type == TokenType.KEYWORD
+                                             and token.text not in KEYWORD_CONSTANTS):
+                    self._invalid('term')
+                self.input.advance()
+                node = constant_node(token)
+
+            # subroutineCall
+            elif self._at_subroutine_call():
+                receiver, name = self._compile_subroutine_name()
+                self._eat('(')
+                if self.input.current_token != ')':
+                    stack.append((ARGUMENTS, receiver, name, []))
+                    stack.append([EXPRESSION, None, None])
+                    continue
+                self._eat(')')
+                node = SubroutineCall(receiver, name, [])
+
+            # varName|varName'['expression']'
+            else:
+                self.input.advance()
+                if self.input.current_token == '[':
+                    self._eat('[')
+                    stack.append((ARRAY_INDEX, token.text))
+                    stack.append([EXPRESSION, None, None])
+                    continue
+                node = Variable(token.text)
+
+            # a term is complete, pop the frames it completes
+            while True:
+                frame = stack[-1]
+
+                if frame[0] == UNARY:
+                    stack.pop()
+                    node = UnaryOp(frame[1], node)
+                    continue
+
+                if frame[0] == TERM:
+                    return node
+
+                # (op term), applied from left to right
+                frame[1] = node if frame[2] is None else BinaryOp(frame[2], frame[1], node)
+                op = self.input.current_token
+                if op in BINARY_OPS:
+                    frame[2] = op
+                    self.input.advance()
+                    break  # parse the next term
+
+                # the expression is complete, close the construct that opened it
+                stack.pop()
+                node = frame[1]
+                if not stack:
+                    return node
+
+                frame = stack[-1]
+                if frame[0] == PARENTHESES:
+                    self._eat(')')
+                    stack.pop()
+                    node.parens = getattr(node, 'parens', 0) + 1
+                elif frame[0] == ARRAY_INDEX:
+                    self._eat(']')
+                    stack.pop()
+                    node = ArrayAccess(frame[1], node)
+                else:  # ARGUMENTS
+                    frame[3].append(node)
+                    if self.input.current_token == ',':
+                        self._eat(',')
+                        stack.append([EXPRESSION, None, None])
+                        break  # parse the next argument
+                    self._eat(')')
+                    stack.pop()
+                    node = SubroutineCall(frame[1], frame[2], frame[3])
+
+    def _at_subroutine_call(self):
+        """Return True if the current identifier starts a subroutine call,
+        that is, if it is followed by '(' or '.'.
+        """
+        next_token = self.input.peek()
+        return next_token is not None and next_token.text in ('(', '.')
+
+    def _compile_subroutine_call(self):
         """Compile a subroutine call"""
-        num_args = 0
+        receiver, name = self._compile_subroutine_name()
+        self._eat('(')
+        arguments = self.compile_expression_list()
+        self._eat(')')
+
+        return SubroutineCall(receiver, name, arguments)
 
-        # save subroutine name
-        if not override_name:
-            subroutine_name = (call_on + '.' if call_on else '') + self.input.current_token
-            self._eat(self.input.current_token)
-        else:
-            subroutine_name = override_name
+    def _compile_subroutine_name(self):
+        """Compile the name of a called subroutine.
+        Return the receiver (None if there is none) and the subroutine name.
+        """
+        receiver = None
+        name = self.input.current_token
+        self.input.advance()  # subroutineName|className|varName
 
         if self.input.current_token == '.':
             self._eat('.')
-            subroutine_name += f'.{self.input.current_token}'
-            self._eat(self.input.current_token)  # varName
-
-        if self.input.current_token == '(':
-            self._eat('(')
-
-            # if calling a method, pass the target object as the first argument
-            if '.' in subroutine_name:  # check for varName.methodName possiblity
-                var_name = subroutine_name.split('.')[0]
-                
-                # check if varName is in a symbol table, and thus, an object,
-                # which indicates a method call. If not, it is a function call
-                if table:= self._symbol_table_lookup(var_name):
-                    segment = self._determine_var_segment(self.symbol_tables[table].kind_of(var_name))
-                    index = self.symbol_tables[table].index_of(var_name)
-                    
-                    # pass the target object as the first argument
-                    self.output.write_push(segment, index)
-                    num_args = 1  # set argument count for method call to 1
-                    
-                    # replace varName with className of object
-                    var_type = self.symbol_tables[table].type_of(var_name)
-                    subroutine_name = f'{var_type}.{subroutine_name.split(".")[1]}'
-            
-            else:  # indicates a method call on the current object
-                # pass 'this' (current object) as the first argument
-                self.output.write_push(Segment.POINTER, 0)
-                num_args = 1  # set argument count for method call to 1
-                # prepend className to method call
-                subroutine_name = f'{self.classname}.{subroutine_name}'
-
-            num_args += self.compile_expression_list()
-            self._eat(')')
-
-        self.output.write_call(subroutine_name, num_args)
-
-    def _symbol_table_lookup(self, variable):
-        """Return which symbol table (subroutine, class) contains the specified variable.
-        Return None if neither does.
-        """
-        if self.symbol_tables['subroutine'].index_of(variable) >= 0:
-            return 'subroutine'
-        elif self.symbol_tables['class'].index_of(variable) >= 0:
-            return 'class'
-        else:
-            return None
-
-    def _determine_var_segment(self, kind):
-        """Return VM segment that the variable kind corresponds to"""
-        if kind == VariableKind.STATIC:
-            return Segment.STATIC
-        if kind == VariableKind.FIELD:
-            return Segment.THIS
-        if kind == VariableKind.ARG:
-            return Segment.ARGUMENT
-        if kind == VariableKind.VAR:
-            return Segment.LOCAL
-
-    def _generate_label(self):
-        self.label_count += 1
-        return f'L{self.label_count}'
+            receiver = name
+            name = self.input.current_token
+            self.input.advance()  # subroutineName
+
+        return receiver, name
+
+    # statement compiler, by the keyword starting the statement
+    statement_compilers = {
+        'let': compile_let,
+        'if': compile_if,
+        'while': compile_while,
+        'do': compile_do,
+        'return': compile_return,
+    }
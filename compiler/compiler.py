@@ -1,25 +1,119 @@
 """Main module of the syntax analyzer"""
 
+import argparse
+import json
 import os
 import sys
 
 from tokenizer import Tokenizer
+from token_cache import TokenCache
+from call_graph import CallGraph, ENTRY_POINTS
+from cfg_export import CfgExporter
 from compilation_engine import CompilationEngine
-from symbol_table import SymbolTable
+from inliner import INLINE_BUDGET
+from code_generator import CodeGenerator, STATIC_SEGMENT_SIZE, STRENGTH_REDUCTION_MODES
+from instruction_buffer import InstructionBuffer
+from name_table import NameTable
+from pass_manager import (
+    CODE_GENERATOR_OPTIONS,
+    INSTRUCTION_PASSES,
+    OPTIMIZATION_LEVELS,
+    PROGRAM_PASSES,
+    STRENGTH_REDUCTION,
+    STRENGTH_REDUCTION_LEVELS,
+    TREE_PASSES,
+    PassManager,
+)
+from stack_analysis import StackAnalyzer
 from vm_writer import VmWriter
+from xml_writer import XmlWriter
 
 
 SOURCE_EXT = 'jack'
 TARGET_EXT = 'vm'
+XML_EXT = 'xml'
 
 
-def main():
-    """Entrypoint of the syntax analyzer"""
-    if len(sys.argv) != 2:
-        print('Usage: program <Source>.jack || program <source_dir>')
-        sys.exit(1)
+def main(argv=None):
+    """Entrypoint of the syntax analyzer, with the command line arguments
+    given, or the ones of the process
+    """
+    parser = argparse.ArgumentParser(
+        usage='program [options] <Source>.jack || program [options] <source_dir>')
+    parser.add_argument('source')
+    parser.add_argument('--cache-dir',
+                        help='cache the tokens of each source file in this directory')
+    parser.add_argument('--binary-source', action='store_true',
+                        help='scan each source file as raw bytes, memory mapped, decoding '
+                             'the text of a token only when it is used')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='report the memory saved by interning names')
+    parser.add_argument('--xml', action='store_true',
+                        help='also write the parse tree of each class as XML')
+    parser.add_argument('-O', type=int, choices=OPTIMIZATION_LEVELS, default=0,
+                        dest='optimization_level',
+                        help='enable the optimizations of a level: none (0), the ones that '
+                             'never grow the code (1) or all the ones that are always safe (2); '
+                             'the optimization options enable more')
+    parser.add_argument('--pass-report', action='store_true',
+                        help='report the time each optimization pass takes and the instructions '
+                             'it removes in each file; the instructions the passes over the '
+                             'syntax trees and the code generator optimizations remove are '
+                             'measured against the unoptimized code, each one on its own')
+    parser.add_argument('--fold-constants', action='store_true',
+                        help='fold constant subexpressions and simplify identities')
+    parser.add_argument('--strength-reduction', choices=STRENGTH_REDUCTION_MODES,
+                        help='lower multiplications and divisions by constants without growing '
+                             'the code (size), or wherever it saves time (speed)')
+    parser.add_argument('--pool-strings', action='store_true',
+                        help='build each distinct string constant of a class once, and reuse it; '
+                             'only for programs that never modify or dispose of string constants')
+    parser.add_argument('--peephole', action='store_true',
+                        help='optimize the VM code of each function with the peephole optimizer')
+    parser.add_argument('--peephole-report', action='store_true',
+                        help='report the instructions removed by the peephole optimizer '
+                             'in each file')
+    parser.add_argument('--optimize-branches', action='store_true',
+                        help='branch on boolean conditions without negating them, '
+                             'test loop conditions at the bottom, and thread jumps to jumps')
+    parser.add_argument('--tail-calls', action='store_true',
+                        help='turn the self tail calls of functions and methods into loops')
+    parser.add_argument('--move-loop-invariants', action='store_true',
+                        help='compute the loop invariant expressions of while loops once, '
+                             'before the loop')
+    parser.add_argument('--cache-arrays', action='store_true',
+                        help='read the array elements an expression uses more than once '
+                             'only once, keeping them in temp registers')
+    parser.add_argument('--inline', action='store_true',
+                        help='inline the calls of small leaf subroutines, '
+                             'such as getters and setters')
+    parser.add_argument('--inline-budget', type=int, default=INLINE_BUDGET,
+                        help='largest number of syntax tree nodes in the body of an inlined '
+                             f'subroutine (default: {INLINE_BUDGET})')
+    parser.add_argument('--whole-program', action='store_true',
+                        help='compile all the classes as one program, leaving out the subroutines '
+                             f'that cannot be called from {" or ".join(ENTRY_POINTS)}')
+    parser.add_argument('--whole-program-report', action='store_true',
+                        help='report the subroutines the program never calls, '
+                             'which the whole program mode leaves out')
+    parser.add_argument('--eliminate-dead-code', action='store_true',
+                        help='remove unreachable code and unused labels from each function')
+    parser.add_argument('--reorder-blocks', action='store_true',
+                        help='lay out the basic blocks of each function '
+                             'so that fewer jumps are taken')
+    parser.add_argument('--pack-locals', action='store_true',
+                        help='remove the locals of each function that are never read, '
+                             'and share a slot between locals that are never live together')
+    parser.add_argument('--stack-report',
+                        help='write the stack depth, size and calls of each function '
+                             'to this file, as JSON')
+    parser.add_argument('--cfg-export',
+                        help='write the control flow graph of each function to this file, as JSON')
+    parser.add_argument('--dead-code-report', action='store_true',
+                        help='report the bytes of dead code removed from each class')
+    args = parser.parse_args(argv)
 
-    source = sys.argv[1]
+    source = args.source
     is_dir = os.path.isdir(source)
 
     # determine source and target files according to user input
@@ -33,7 +127,28 @@ def main():
         source_files = [source]
         target_file = _parse_filename(source)[0] + f'.{TARGET_EXT}'
 
-    # Compile each class source file
+    # the optimizations of the level, and the ones asked for one by one
+    enabled = set(OPTIMIZATION_LEVELS[args.optimization_level])
+    for registry in (PROGRAM_PASSES, TREE_PASSES, INSTRUCTION_PASSES, CODE_GENERATOR_OPTIONS):
+        enabled.update(name for name in registry if getattr(args, name.replace('-', '_')))
+    if args.peephole_report:
+        enabled.add('peephole')
+    if args.dead_code_report:
+        enabled.add('eliminate-dead-code')
+    strength_reduction = (args.strength_reduction
+                          or STRENGTH_REDUCTION_LEVELS[args.optimization_level])
+    if strength_reduction:
+        enabled.add(STRENGTH_REDUCTION)
+    pass_manager = PassManager(enabled, args.inline_budget)
+
+    token_cache = TokenCache(args.cache_dir) if args.cache_dir else None
+    stack_analyzer = StackAnalyzer()
+    cfg_exporter = CfgExporter()
+    # names are interned once for the whole build
+    names = NameTable()
+
+    # parse each class source file
+    classes = []
     for source_file in source_files:
         filename, ext = _parse_filename(source_file)
 
@@ -43,14 +158,123 @@ def main():
             sys.exit(1)
 
         # create tokenizer instance for each source file
-        tokenizer = Tokenizer(source_file)
+        if token_cache:
+            tokenizer = token_cache.tokenizer(source_file, names)
+        elif args.binary_source:
+            tokenizer = Tokenizer(source_file, binary=True)
+        else:
+            tokenizer = Tokenizer(source_file, names=names)
+
+        tree = None
+        if tokenizer.advance():
+            tree = CompilationEngine(tokenizer).compile_class()
+
+            if args.xml:
+                xml_writer = XmlWriter(f'{filename}.{XML_EXT}')
+                xml_writer.write(tree)
+                xml_writer.close()
+        classes.append((filename, tree))
+
+    # the parsed classes, kept to measure what each optimization removes on its own
+    if args.pass_report:
+        parsed = [(f'{filename}.{TARGET_EXT}', tree.copy())
+                  for filename, tree in classes if tree is not None]
+
+    pass_manager.transform_program([tree for _, tree in classes if tree is not None])
+
+    # leave out or report the subroutines the program never calls
+    if args.whole_program or args.whole_program_report:
+        call_graph = CallGraph([tree for _, tree in classes if tree is not None])
+        entry_points = call_graph.entry_points()
+        if not entry_points:
+            print(f'No entry point found in {source}: expected {" or ".join(ENTRY_POINTS)}')
+            sys.exit(1)
+        if args.whole_program:
+            stripped = call_graph.strip(entry_points)
+        else:
+            stripped = call_graph.unreachable(entry_points)  # only reported
+
+        if args.whole_program_report:
+            left_out = 'left out' if args.whole_program else 'never called'
+            print(f'{len(stripped)} of {len(call_graph.calls)} subroutines {left_out}'
+                  + ''.join(f'\n  {name}' for name in stripped))
+
+    # the pooled string constants share the static segment with the statics of every class
+    pool_room = STATIC_SEGMENT_SIZE - sum(
+        len(class_var_dec.names) for _, tree in classes if tree is not None
+        for class_var_dec in tree.class_var_decs if class_var_dec.kind == 'static')
+    pool_limit = pool_room
+
+    # generate the code of each class
+    for filename, tree in classes:
         # create vm writer instance for each output file
         vm_writer = VmWriter(f'{filename}.{TARGET_EXT}')
 
-        # compile tokens
-        if tokenizer.advance():
-            compilation_engine = CompilationEngine(tokenizer, vm_writer)
-            compilation_engine.compile_class()
+        # buffer each function to optimize it before writing
+        pass_manager.start(f'{filename}.{TARGET_EXT}')
+        passes = [pass_manager] if pass_manager.passes else []
+        if args.stack_report:
+            passes.append(stack_analyzer)  # analyzes the final code
+        if args.cfg_export:
+            passes.append(cfg_exporter)
+        if passes:
+            vm_writer = InstructionBuffer(vm_writer, passes)
+
+        if tree is not None:
+            tree = pass_manager.transform(tree)
+            code_generator = CodeGenerator(vm_writer, names, strength_reduction,
+                                           pass_manager.is_enabled('pool-strings'),
+                                           pass_manager.is_enabled('optimize-branches'),
+                                           pass_manager.is_enabled('tail-calls'),
+                                           pass_manager.is_enabled('cache-arrays'),
+                                           max(pool_limit, 0))
+            code_generator.generate(tree)
+            pool_limit -= len(code_generator.string_pool)
+        vm_writer.close()
+
+        if args.peephole_report:
+            print(f'{filename}.{TARGET_EXT}: {pass_manager.passes["peephole"].removed} '
+                  f'of {vm_writer.count_in} instructions removed')
+        if args.dead_code_report:
+            dead_code_eliminator = pass_manager.passes['eliminate-dead-code']
+            print(f'{filename}.{TARGET_EXT}: {dead_code_eliminator.saved_bytes} bytes '
+                  f'of dead code removed ({dead_code_eliminator.removed} instructions)')
+
+    if args.pass_report:
+        pass_manager.measure(parsed, lambda trees, options: _count_instructions(
+            trees, options, names, strength_reduction, pool_room))
+        print(pass_manager.report())
+
+    if args.stack_report:
+        with open(args.stack_report, 'w') as report:
+            json.dump(stack_analyzer.report(), report, indent=2)
+
+    if args.cfg_export:
+        with open(args.cfg_export, 'w') as export:
+            json.dump(cfg_exporter.report(), export, indent=2)
+
+    if args.memory_report:
+        print(names.memory_report())
+
+
+def _count_instructions(trees, options, names, strength_reduction, pool_limit):
+    """Return the number of instructions the code generator generates for
+    each class, given with its file name, with only the optimizations named
+    """
+    if STRENGTH_REDUCTION not in options:
+        strength_reduction = None
+    counts = {}
+    for filename, tree in trees:
+        output = InstructionBuffer(VmWriter(os.devnull))
+        code_generator = CodeGenerator(output, names, strength_reduction,
+                                       'pool-strings' in options, 'optimize-branches' in options,
+                                       'tail-calls' in options, 'cache-arrays' in options,
+                                       max(pool_limit, 0))
+        code_generator.generate(tree)
+        output.close()
+        counts[filename] = output.count_in
+        pool_limit -= len(code_generator.string_pool)
+    return counts
 
 
 def _parse_filename(file):
@@ -0,0 +1,217 @@
+"""Constant folder module of the compiler
+
+Classes:
+    ConstantFolder
+"""
+
+from syntax_tree import (
+    BinaryOp,
+    IntegerConstant,
+    KeywordConstant,
+    NodeVisitor,
+    SubroutineCall,
+    UnaryOp,
+)
+
+
+# values of the keyword constants
+KEYWORD_VALUES = {'true': -1, 'false': 0, 'null': 0}
+
+
+def _to_word(value):
+    """Return the value wrapped to a 16-bit two's complement integer"""
+    value &= 0xFFFF
+    return value - 0x10000 if value & 0x8000 else value
+
+
+def _divide(left, right):
+    """Return the quotient as computed by Math.divide, or None if it is not
+    defined (division by zero, or the absolute value of -32768 being needed)
+    """
+    if right == 0 or -0x8000 in (left, right):
+        return None
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+
+# evaluation of each operator on constant operands
+BINARY_OPERATIONS = {
+    '+': lambda left, right: _to_word(left + right),
+    '-': lambda left, right: _to_word(left - right),
+    '*': lambda left, right: _to_word(left * right),
+    '/': _divide,
+    '&': lambda left, right: left & right,
+    '|': lambda left, right: left | right,
+    '<': lambda left, right: -1 if left < right else 0,
+    '>': lambda left, right: -1 if left > right else 0,
+    '=': lambda left, right: -1 if left == right else 0,
+}
+UNARY_OPERATIONS = {
+    '-': lambda operand: _to_word(-operand),
+    '~': lambda operand: ~operand,
+}
+
+
+class ConstantFolder(NodeVisitor):
+    """ConstantFolder class of the Jack compiler.
+
+    Pass over the syntax tree of a class, which replaces the constant
+    subexpressions of every expression by their value, computed with the
+    16-bit two's complement arithmetic of the Hack platform, and simplifies
+    the operations with an identity or absorbing operand, e.g. x+0, x*1,
+    x*0, x&0, 0-x and ~~x.
+
+    Operands are only dropped if they call no subroutine and divide by
+    no operand that may be zero, so no side effect or error is lost. The
+    folded constants may be negative, and are then emitted by the code
+    generator as a negation.
+
+    Properties:
+        folded: number of operations folded or simplified so far
+
+    Methods:
+        fold(ClassDec) -> ClassDec
+    """
+
+    def __init__(self):
+        self.folded = 0
+
+    def fold(self, tree):
+        """Fold the expressions of a class in place, and return the class"""
+        self.visit(tree)
+        return tree
+
+    def visit_ClassDec(self, node):
+        for subroutine in node.subroutines:
+            self._visit_statements(subroutine.statements)
+
+    def visit_LetStatement(self, node):
+        if node.index is not None:
+            node.index = self._fold_expression(node.index)
+        node.value = self._fold_expression(node.value)
+
+    def visit_IfStatement(self, node):
+        node.condition = self._fold_expression(node.condition)
+        self._visit_statements(node.statements)
+        if node.else_statements is not None:
+            self._visit_statements(node.else_statements)
+
+    def visit_WhileStatement(self, node):
+        node.condition = self._fold_expression(node.condition)
+        self._visit_statements(node.statements)
+
+    def visit_DoStatement(self, node):
+        node.call = self._fold_expression(node.call)
+
+    def visit_ReturnStatement(self, node):
+        if node.value is not None:
+            node.value = self._fold_expression(node.value)
+
+    def _visit_statements(self, statements):
+        for statement in statements:
+            self.visit(statement)
+
+    def _fold_expression(self, node):
+        """Return the folded expression.
+
+        The expression is walked in postorder with an explicit stack, so
+        the depth of an expression is not limited by the recursion limit.
+        Each folded subexpression is kept on the results stack along with
+        whether it is pure, that is, whether it calls no subroutine and
+        divides by no operand that may be zero, which raises an error.
+        """
+        results = []
+        stack = [(node, False)]
+
+        while stack:
+            node, children_folded = stack.pop()
+            children = node.children()
+
+            if not children_folded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+
+            pure = not isinstance(node, SubroutineCall)
+            if children:
+                folded = results[-len(children):]
+                del results[-len(children):]
+                node.replace_children([child for child, _ in folded])
+                pure = pure and all(child_pure for _, child_pure in folded)
+            if isinstance(node, BinaryOp) and node.op == '/' and not _constant_value(node.right):
+                pure = False
+
+            results.append((self._simplify(node, pure), pure))
+
+        return results[0][0]
+
+    def _simplify(self, node, pure):
+        """Return the simplified node, whose children are already folded"""
+        if isinstance(node, BinaryOp):
+            simplified = self._simplify_binary(node, pure)
+        elif isinstance(node, UnaryOp):
+            simplified = self._simplify_unary(node)
+        else:
+            return node
+
+        if simplified is not node:
+            self.folded += 1
+        return simplified
+
+    def _simplify_binary(self, node, pure):
+        op, left, right = node.op, node.left, node.right
+        left_value, right_value = _constant_value(left), _constant_value(right)
+
+        if left_value is not None and right_value is not None:
+            value = BINARY_OPERATIONS[op](left_value, right_value)
+            return node if value is None else IntegerConstant(value)
+
+        # identities
+        if right_value == 0 and op in ('+', '-', '|'):
+            return left
+        if left_value == 0 and op in ('+', '|'):
+            return right
+        if right_value == 1 and op in ('*', '/'):
+            return left
+        if left_value == 1 and op == '*':
+            return right
+        if right_value == -1 and op == '&':
+            return left
+        if left_value == -1 and op == '&':
+            return right
+        if left_value == 0 and op == '-':
+            return UnaryOp('-', right)
+        if right_value == -1 and op == '*':
+            return UnaryOp('-', left)
+        if left_value == -1 and op == '*':
+            return UnaryOp('-', right)
+
+        # absorbing operands, which make the other operand unused
+        if pure:
+            if 0 in (left_value, right_value) and op in ('*', '&'):
+                return IntegerConstant(0)
+            if -1 in (left_value, right_value) and op == '|':
+                return IntegerConstant(-1)
+
+        return node
+
+    def _simplify_unary(self, node):
+        value = _constant_value(node.operand)
+        if value is not None:
+            return IntegerConstant(UNARY_OPERATIONS[node.op](value))
+
+        # ~~x and -(-x)
+        if isinstance(node.operand, UnaryOp) and node.operand.op == node.op:
+            return node.operand.operand
+
+        return node
+
+
+def _constant_value(node):
+    """Return the 16-bit value of a constant expression, or None if it is not constant"""
+    if isinstance(node, IntegerConstant) and -0x8000 <= node.value <= 0x7FFF:
+        return node.value
+    if isinstance(node, KeywordConstant):
+        return KEYWORD_VALUES.get(node.value)
+    return None
+
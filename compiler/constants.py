@@ -14,6 +14,8 @@ class TokenType:
     IDENTIFIER = 'IDENTIFIER'
     INT_CONST = 'INT_CONST'
     STRING_CONST = 'STRING_CONST'
+    # text that cannot be lexed, only produced for the IncrementalTokenizer
+    ERROR = 'ERROR'
 
 
 class KeywordType:
@@ -0,0 +1,158 @@
+"""Control flow graph module of the compiler
+
+Classes:
+    ControlFlowGraph
+"""
+
+# commands pushing -1 or 0
+COMPARISONS = (('eq',), ('gt',), ('lt',))
+
+
+class ControlFlowGraph:
+    """ControlFlowGraph class of the Jack compiler.
+
+    Splits the instructions of a function (see InstructionBuffer) into
+    basic blocks, sequences of instructions only entered at their start,
+    through their labels, and only left at their end, and links each block
+    to the blocks it can jump or fall through to.
+
+    The blocks are kept in layout order, the first one starting with the
+    function command. The layout can be changed by reordering the blocks,
+    the instructions of the function being then rebuilt with the jumps the
+    new layout needs, and without the ones it makes unnecessary.
+
+    Properties:
+        name: name of the function
+        blocks: instructions of each block, in layout order
+        successors: indexes of the blocks each block can jump or fall through to
+        fall_through: index of the block each block continues to without
+            jumping, None if it ends with a goto or a return
+        predecessors: indexes of the blocks that can jump or fall through to each block
+
+    Methods:
+        instructions() -> list
+        reachable() -> set
+        reorder(list) -> None
+        invertible(int) -> bool
+        export() -> dict
+    """
+
+    def __init__(self, instructions):
+        self.name = instructions[0][1] if instructions and instructions[0][0] == 'function' else ''
+        self._split(instructions)
+
+    def _split(self, instructions):
+        """Split the instructions into blocks, and link them"""
+        self.blocks = []
+        for i, instruction in enumerate(instructions):
+            previous = instructions[i - 1][0] if i else None
+            if not self.blocks or previous in ('goto', 'if-goto', 'return') or (
+                    instruction[0] == 'label' and previous != 'label'):
+                self.blocks.append([])
+            self.blocks[-1].append(instruction)
+        self._link()
+
+    def _link(self):
+        """Compute the edges between the blocks, in their current layout"""
+        labels = {instruction[1]: i for i, block in enumerate(self.blocks)
+                  for instruction in block if instruction[0] == 'label'}
+        self.successors = []
+        self.fall_through = []
+        for i, block in enumerate(self.blocks):
+            last = block[-1]
+            following = i + 1 if i + 1 < len(self.blocks) else None
+            successors = []
+            if last[0] in ('goto', 'if-goto'):
+                successors.append(labels[last[1]])
+            if last[0] in ('goto', 'return'):
+                following = None
+            if following is not None and following not in successors:
+                successors.append(following)
+            self.successors.append(successors)
+            self.fall_through.append(following)
+
+        self.predecessors = [[] for _ in self.blocks]
+        for i, successors in enumerate(self.successors):
+            for successor in successors:
+                self.predecessors[successor].append(i)
+
+    def instructions(self):
+        """Return the instructions of the function, in the layout order of the blocks"""
+        instructions = []
+        for block in self.blocks:
+            instructions.extend(block)
+        return instructions
+
+    def reachable(self):
+        """Return the indexes of the blocks reachable from the first one"""
+        reachable = set()
+        pending = [0] if self.blocks else []
+        while pending:
+            i = pending.pop()
+            if i not in reachable:
+                reachable.add(i)
+                pending.extend(self.successors[i])
+        return reachable
+
+    def reorder(self, order):
+        """Lay the blocks out in the given order of their indexes, which
+        must start with the first block, adding a goto after the blocks
+        whose fall through block no longer follows them, and removing the
+        gotos to the block that follows. A conditional jump to the block
+        that follows is inverted instead, if it can be (see invertible).
+        """
+        labels = {instruction[1] for block in self.blocks
+                  for instruction in block if instruction[0] == 'label'}
+        blocks = [list(block) for block in self.blocks]
+
+        for position, i in enumerate(order):
+            following = order[position + 1] if position + 1 < len(order) else None
+            fall_through = self.fall_through[i]
+            if fall_through is not None and fall_through != following:
+                if self.invertible(i) and self.successors[i][0] == following:
+                    del blocks[i][-2:]  # the not and the jump
+                    blocks[i].append(('if-goto', _label(blocks[fall_through], labels)))
+                else:
+                    blocks[i].append(('goto', _label(blocks[fall_through], labels)))
+            elif (blocks[i][-1][0] == 'goto' and following is not None
+                  and self.successors[i] == [following]):
+                blocks[i].pop()
+
+        # the gotos added after conditional jumps end blocks of their own
+        self._split([instruction for i in order for instruction in blocks[i]])
+
+    def invertible(self, i):
+        """Return True if the block ends with the negation of a comparison
+        and a conditional jump: the compared value being -1 or 0, the
+        negation can be dropped if the jump is taken in the other case
+        """
+        block = self.blocks[i]
+        return (len(block) >= 3 and block[-1][0] == 'if-goto' and block[-2] == ('not',)
+                and block[-3] in COMPARISONS)
+
+    def export(self):
+        """Return the graph, ready to be written as JSON"""
+        return {
+            'name': self.name,
+            'blocks': [{
+                'index': i,
+                'labels': [instruction[1] for instruction in block if instruction[0] == 'label'],
+                'instructions': [' '.join(map(str, instruction)) for instruction in block],
+                'successors': self.successors[i],
+                'fall_through': self.fall_through[i],
+                'predecessors': self.predecessors[i],
+            } for i, block in enumerate(self.blocks)],
+        }
+
+
+def _label(block, labels):
+    """Return a label of the block, adding a new one at its start if it has none"""
+    if block and block[0][0] == 'label':
+        return block[0][1]
+
+    n = len(labels)
+    while f'B{n}' in labels:
+        n += 1
+    labels.add(f'B{n}')
+    block.insert(0, ('label', f'B{n}'))
+    return f'B{n}'
@@ -0,0 +1,56 @@
+"""Dead code eliminator module of the compiler
+
+Classes:
+    DeadCodeEliminator
+"""
+
+from control_flow import ControlFlowGraph
+from peephole import BRANCH_RULES, JUMP_RULES, PeepholeOptimizer
+
+
+class DeadCodeEliminator:
+    """DeadCodeEliminator class of the Jack compiler.
+
+    Pass of the InstructionBuffer, which removes the instructions of a
+    function that can never be executed: branches on a constant condition,
+    such as the ones of if (false) and while (true), are resolved first,
+    then every instruction that is not reachable from the start of the
+    function, such as the code after a return statement or the dead arm of
+    a constant branch, is removed, then the jumps to the next instruction
+    left by the dead arms removed, and finally the labels no jump targets.
+
+    Properties:
+        branch_folder: peephole optimizer resolving the constant branches
+        jump_folder: peephole optimizer removing the jumps to the next instruction
+        removed: number of instructions removed so far
+        saved_bytes: size of the VM code removed so far, in bytes
+
+    Methods:
+        run(list) -> list
+    """
+
+    def __init__(self):
+        self.branch_folder = PeepholeOptimizer(BRANCH_RULES)
+        self.jump_folder = PeepholeOptimizer(JUMP_RULES)
+        self.removed = 0
+        self.saved_bytes = 0
+
+    def run(self, instructions):
+        """Return the instructions without dead code"""
+        graph = ControlFlowGraph(self.branch_folder.run(instructions))
+        output = [instruction for i in sorted(graph.reachable()) for instruction in graph.blocks[i]]
+        output = self.jump_folder.run(output)
+
+        targets = {instruction[1] for instruction in output
+                   if instruction[0] in ('goto', 'if-goto')}
+        output = [instruction for instruction in output
+                  if instruction[0] != 'label' or instruction[1] in targets]
+
+        self.removed += len(instructions) - len(output)
+        self.saved_bytes += _size(instructions) - _size(output)
+        return output
+
+
+def _size(instructions):
+    """Return the size of the instructions as VM code, in bytes"""
+    return sum(len(' '.join(map(str, instruction))) + 1 for instruction in instructions)
@@ -0,0 +1,394 @@
+"""Inliner module of the compiler
+
+Classes:
+    Inliner
+"""
+
+from syntax_tree import (
+    ArrayAccess,
+    BinaryOp,
+    IntegerConstant,
+    KeywordConstant,
+    LetStatement,
+    NodeVisitor,
+    ReturnStatement,
+    StringConstant,
+    SubroutineCall,
+    Variable,
+)
+
+
+# default largest number of nodes in the body of an inlined subroutine
+INLINE_BUDGET = 12
+
+
+class Inliner(NodeVisitor):
+    """Inliner class of the Jack compiler.
+
+    Pass over the syntax trees of all the classes of a program, which
+    replaces the calls of small leaf subroutines, such as getters and
+    setters, by their body: a subroutine whose body is `return expression;`
+    is inlined wherever it is called, and one whose body is
+    `let variable = expression; return;` wherever it is called by a do
+    statement. The fields of another object are accessed as the elements
+    of the array the object is, e.g. p.getX() becomes p[0].
+
+    Calls are only inlined if their arguments call no subroutine, not even
+    to multiply, and divide by no operand that may be zero, so evaluating
+    them in another order, more than once or not at all has no visible
+    effect, and arguments used more than once must be constants or
+    variables. Subroutines become leaves as the calls they make are
+    inlined, so the program is processed until no call is inlined.
+
+    Properties:
+        budget: largest number of nodes in the body of an inlined subroutine
+        inlined: number of calls inlined so far
+        subroutines: class and declaration of each subroutine, by full name
+        classname: name of the class of the subroutine being processed
+        subroutine_kind: kind of the subroutine being processed
+        scope: kind and type of the variables of the subroutine being
+            processed, by name
+
+    Methods:
+        inline(list) -> list
+    """
+
+    def __init__(self, budget=INLINE_BUDGET):
+        self.budget = budget
+        self.inlined = 0
+        self.subroutines = {}
+        self.classname = ''
+        self.subroutine_kind = ''
+        self.scope = {}
+
+    def inline(self, trees):
+        """Inline the calls of the classes of a program in place, and return the classes"""
+        self.subroutines = {f'{tree.name}.{subroutine.name}': (tree, subroutine)
+                            for tree in trees for subroutine in tree.subroutines}
+
+        inlined = None
+        while inlined != self.inlined:
+            inlined = self.inlined
+            for tree in trees:
+                self.visit(tree)
+        return trees
+
+    def visit_ClassDec(self, node):
+        self.classname = node.name
+        class_scope = _class_variables(node)
+
+        for subroutine in node.subroutines:
+            self.subroutine_kind = subroutine.kind
+            self.scope = dict(class_scope)
+            self.scope.update({parameter.name: ('argument', parameter.type)
+                               for parameter in subroutine.parameters})
+            self.scope.update({name: ('local', var_dec.type)
+                               for var_dec in subroutine.var_decs for name in var_dec.names})
+            self._visit_statements(subroutine.statements)
+
+    def visit_LetStatement(self, node):
+        if node.index is not None:
+            node.index = self._inline_expression(node.index)
+        node.value = self._inline_expression(node.value)
+
+    def visit_IfStatement(self, node):
+        node.condition = self._inline_expression(node.condition)
+        self._visit_statements(node.statements)
+        if node.else_statements is not None:
+            self._visit_statements(node.else_statements)
+
+    def visit_WhileStatement(self, node):
+        node.condition = self._inline_expression(node.condition)
+        self._visit_statements(node.statements)
+
+    def visit_DoStatement(self, node):
+        arguments = [self._inline(argument) for argument in node.call.arguments]
+        node.call.arguments = [argument for argument, _ in arguments]
+        if all(pure for _, pure in arguments):
+            return self._inline_call(node.call, statement=True)
+
+    def visit_ReturnStatement(self, node):
+        if node.value is not None:
+            node.value = self._inline_expression(node.value)
+
+    def _visit_statements(self, statements):
+        for i, statement in enumerate(statements):
+            replacement = self.visit(statement)
+            if replacement is not None:
+                statements[i] = replacement
+
+    def _inline_expression(self, node):
+        """Return the expression with the calls it makes inlined"""
+        return self._inline(node)[0]
+
+    def _inline(self, node):
+        """Return the expression with the calls it makes inlined, and
+        whether it is still pure (see _is_pure).
+
+        The expression is walked in postorder with an explicit stack, so
+        the depth of an expression is not limited by the recursion limit,
+        and the arguments of a call are inlined before the call itself,
+        whose arguments are then known to be pure without walking them again.
+        """
+        results = []  # (node, pure)
+        stack = [(node, False)]
+
+        while stack:
+            node, children_inlined = stack.pop()
+            children = node.children()
+
+            if not children_inlined:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(children))
+                continue
+
+            pure = True
+            if children:
+                node.replace_children([child for child, _ in results[-len(children):]])
+                pure = all(child_pure for _, child_pure in results[-len(children):])
+                del results[-len(children):]
+
+            if isinstance(node, SubroutineCall):
+                replacement = self._inline_call(node) if pure else None
+                node, pure = (replacement, True) if replacement is not None else (node, False)
+            elif _is_impure(node):
+                pure = False
+            results.append((node, pure))
+
+        return results[0]
+
+    def _inline_call(self, call, statement=False):
+        """Return the body of the called subroutine, as an expression or as
+        a let statement replacing a do statement, or None if the call is not
+        inlined; the arguments must be pure
+        """
+        callee = self._callee(call)
+        if callee is None:
+            return None
+        tree, subroutine = callee
+
+        body = _inlinable_body(subroutine, statement)
+        if body is None or not _fits(body, self.budget) or not _is_pure(body):
+            return None
+
+        parameters = [parameter.name for parameter in subroutine.parameters]
+        arguments = dict(zip(parameters, call.arguments))
+        uses = _variable_uses(body)
+        if any(uses.get(name, 0) > 1
+               and not isinstance(argument, (IntegerConstant, KeywordConstant, Variable))
+               for name, argument in arguments.items()):
+            return None
+
+        substitution = _Substitution(self, tree, subroutine, call.receiver, arguments)
+        body = substitution.apply(body.copy())
+        if body is None:
+            return None
+
+        self.inlined += 1
+        return body
+
+    def _callee(self, call):
+        """Return the class and the declaration of the subroutine called,
+        or None if it is not a function or method of the program called
+        with the right number of arguments
+        """
+        if call.receiver is None:
+            classname, kind = self.classname, 'method'
+            if self.subroutine_kind == 'function':
+                return None
+        elif call.receiver in self.scope:
+            classname, kind = self.scope[call.receiver][1], 'method'
+        else:
+            classname, kind = call.receiver, 'function'
+
+        callee = self.subroutines.get(f'{classname}.{call.name}')
+        if (callee is None or callee[1].kind != kind
+                or len(callee[1].parameters) != len(call.arguments)):
+            return None
+        return callee
+
+    def _is_shadowed(self, name):
+        """Return True if a class variable name is hidden by an argument or local"""
+        return self.scope.get(name, ('',))[0] in ('argument', 'local')
+
+
+class _Substitution:
+    """Rewriting of the body of a subroutine into the scope of a call site"""
+
+    def __init__(self, inliner, tree, subroutine, receiver, arguments):
+        self.inliner = inliner
+        self.method = subroutine.kind == 'method'
+        self.receiver = receiver if self.method else None
+        self.arguments = arguments
+        self.substituted = set()
+        self.same_class = tree.name == inliner.classname
+        class_variables = _class_variables(tree)
+        self.fields = {name: index for index, name in enumerate(
+            name for name, (kind, _) in class_variables.items() if kind == 'field')}
+        self.statics = {name for name, (kind, _) in class_variables.items() if kind == 'static'}
+
+    def apply(self, body):
+        """Return the body in the scope of the call site, or None if it cannot be expressed there"""
+        if isinstance(body, LetStatement):
+            if body.name in self.arguments:
+                return None
+            value = self._expression(body.value)
+            target = self._target(body.name)
+            if value is None or target is None:
+                return None
+            return LetStatement(*target, value)
+        return self._expression(body)
+
+    def _expression(self, node):
+        """Return the expression with the parameters, fields, statics
+        and 'this' of the callee replaced, or None if one cannot be
+        """
+        replaced = self._operand(node)
+        if replaced is None:
+            return None
+        root, descend = replaced
+
+        pending = [root] if descend else []
+        while pending:
+            node = pending.pop()
+            children = []
+            for child in node.children():
+                replaced = self._operand(child)
+                if replaced is None:
+                    return None
+                child, descend = replaced
+                children.append(child)
+                if descend:
+                    pending.append(child)
+            node.replace_children(children)
+
+        return root
+
+    def _operand(self, node):
+        """Return the replacement of a node of the callee, as (node, whether
+        its children are still to be replaced), or None if there is none
+        """
+        if isinstance(node, KeywordConstant) and node.value == 'this':
+            if not self.method:
+                return None
+            return (node if self.receiver is None else Variable(self.receiver)), False
+
+        if isinstance(node, Variable):
+            if node.name in self.arguments:
+                # the call is discarded, so an argument is only copied to be used again
+                argument = self.arguments[node.name]
+                if node.name in self.substituted:
+                    argument = argument.copy()
+                self.substituted.add(node.name)
+                return argument, False
+            target = self._target(node.name)
+            if target is None:
+                return None
+            return (Variable(target[0]) if target[1] is None else ArrayAccess(*target)), False
+
+        if isinstance(node, ArrayAccess):
+            if node.name in self.arguments:
+                argument = self.arguments[node.name]
+                if not isinstance(argument, Variable):
+                    return None
+                return ArrayAccess(argument.name, node.index), True
+            target = self._target(node.name)
+            if target is None or target[1] is not None:
+                return None
+            return ArrayAccess(target[0], node.index), True
+
+        return node, True
+
+    def _target(self, name):
+        """Return the variable of the call site accessing a class variable
+        of the callee, as (name, index), index being None for a variable and
+        the field index for an element of the receiver, or None if there is none
+        """
+        if name in self.fields and self.method:
+            if self.receiver is not None:
+                return self.receiver, IntegerConstant(self.fields[name])
+        elif name not in self.statics:
+            return None
+        if not self.same_class or self.inliner._is_shadowed(name):
+            return None
+        return name, None
+
+
+def _class_variables(tree):
+    """Return the kind and type of the class variables of a class, by name"""
+    return {name: (class_var_dec.kind, class_var_dec.type)
+            for class_var_dec in tree.class_var_decs for name in class_var_dec.names}
+
+
+def _inlinable_body(subroutine, statement):
+    """Return the expression returned by a subroutine or, for a do
+    statement, the assignment it makes, if this is all the subroutine
+    does, None otherwise
+    """
+    statements = subroutine.statements
+    if subroutine.var_decs:
+        return None
+    if statement:
+        if not (len(statements) == 2 and isinstance(statements[0], LetStatement)
+                and statements[0].index is None and isinstance(statements[1], ReturnStatement)
+                and statements[1].value is None):
+            return None
+        body = statements[0]
+    else:
+        if not (len(statements) == 1 and isinstance(statements[0], ReturnStatement)
+                and statements[0].value is not None):
+            return None
+        body = statements[0].value
+    return body
+
+
+def _is_pure(node):
+    """Return True if evaluating the node calls no subroutine, even to build
+    a string or to multiply, and divides by no operand that may be zero
+    """
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, SubroutineCall) or _is_impure(node):
+            return False
+        pending.extend(node.children())
+    return True
+
+
+def _is_impure(node):
+    """Return True if evaluating the node itself, not its subexpressions,
+    calls the OS to build a string or to multiply, or divides by an operand
+    that may be zero, which raises an error
+    """
+    if isinstance(node, StringConstant):
+        return True
+    if isinstance(node, BinaryOp):
+        return node.op == '*' or node.op == '/' and not (
+            isinstance(node.right, IntegerConstant) and node.right.value != 0)
+    return False
+
+
+def _variable_uses(node):
+    """Return the number of uses of each variable name in the node"""
+    uses = {}
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (Variable, ArrayAccess)):
+            uses[node.name] = uses.get(node.name, 0) + 1
+        pending.extend(node.children())
+    return uses
+
+
+def _fits(node, budget):
+    """Return True if the node has no more nodes than the budget, counting
+    no further than the budget
+    """
+    size = 0
+    pending = [node]
+    while pending:
+        size += 1
+        if size > budget:
+            return False
+        pending.extend(pending.pop().children())
+    return True
@@ -0,0 +1,102 @@
+"""Instruction buffer module of the compiler
+
+Classes:
+    InstructionBuffer
+"""
+
+
+class InstructionBuffer:
+    """InstructionBuffer class of the Jack compiler.
+
+    Features the same routines as the VmWriter, but instead of writing
+    each VM command right away, collects the commands of each function
+    as instructions, runs them through a series of passes, and only then
+    writes them with a VmWriter.
+
+    An instruction is a tuple holding the words of the VM command, with
+    segment names as strings and indexes and counts as integers,
+    e.g. ('push', 'constant', 7), ('add',) or ('call', 'Math.multiply', 2).
+    A pass is any object with a run(list) -> list method.
+
+    Properties:
+        output: VmWriter the optimized instructions are written to
+        passes: passes run over the instructions of each function
+        instructions: instructions of the function being buffered
+        count_in: number of instructions buffered so far
+        count_out: number of instructions written so far
+
+    Methods:
+        write_push(Segment, int) -> None
+        write_pop(Segment, int) -> None
+        write_arithmetic(ArithmeticCommand) -> None
+        write_label(str) -> None
+        write_goto(str) -> None
+        write_if(str) -> None
+        write_call(str, int) -> None
+        write_function(str, int) -> None
+        write_return() -> None
+        flush() -> None
+        close() -> None
+    """
+
+    def __init__(self, vm_writer, passes=()):
+        self.output = vm_writer
+        self.passes = list(passes)
+        self.instructions = []
+        self.count_in = 0
+        self.count_out = 0
+
+    def write_push(self, segment, index):
+        """Buffer a VM push command"""
+        self.instructions.append(('push', segment.value, index))
+
+    def write_pop(self, segment, index):
+        """Buffer a VM pop command"""
+        self.instructions.append(('pop', segment.value, index))
+
+    def write_arithmetic(self, command):
+        """Buffer a VM arithmetic-logical command"""
+        self.instructions.append((command.value,))
+
+    def write_label(self, label):
+        """Buffer a VM label command"""
+        self.instructions.append(('label', label))
+
+    def write_goto(self, label):
+        """Buffer a VM goto command"""
+        self.instructions.append(('goto', label))
+
+    def write_if(self, label):
+        """Buffer a VM if-goto command"""
+        self.instructions.append(('if-goto', label))
+
+    def write_call(self, name, num_args):
+        """Buffer a VM call command"""
+        self.instructions.append(('call', name, num_args))
+
+    def write_function(self, name, num_vars):
+        """Buffer a VM function command, which starts a new function"""
+        self.flush()
+        self.instructions.append(('function', name, num_vars))
+
+    def write_return(self):
+        """Buffer a VM return command"""
+        self.instructions.append(('return',))
+
+    def flush(self):
+        """Run the buffered instructions through the passes, and write them"""
+        instructions = self.instructions
+        self.count_in += len(instructions)
+
+        for optimization in self.passes:
+            instructions = optimization.run(instructions)
+
+        for instruction in instructions:
+            self.output.write_instruction(instruction)
+        self.count_out += len(instructions)
+        self.instructions = []
+
+    def close(self):
+        """Write the remaining instructions, and close the output file"""
+        self.flush()
+        self.output.close()
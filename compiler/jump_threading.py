@@ -0,0 +1,72 @@
+"""Jump threader module of the compiler
+
+Classes:
+    JumpThreader
+"""
+
+
+class JumpThreader:
+    """JumpThreader class of the Jack compiler.
+
+    Pass of the InstructionBuffer, which retargets every jump to a label
+    followed by an unconditional jump (possibly after other labels) to the
+    final destination of the chain, and then removes the unconditional
+    jumps to the instruction that follows them anyway.
+
+    Properties:
+        threaded: number of jumps retargeted so far
+        removed: number of instructions removed so far
+
+    Methods:
+        run(list) -> list
+    """
+
+    def __init__(self):
+        self.threaded = 0
+        self.removed = 0
+
+    def run(self, instructions):
+        """Return the instructions with threaded jumps"""
+        labels = {instruction[1]: i for i, instruction in enumerate(instructions)
+                  if instruction[0] == 'label'}
+
+        output = []
+        for instruction in instructions:
+            if instruction[0] in ('goto', 'if-goto'):
+                destination = _destination(instructions, labels, instruction[1])
+                if destination != instruction[1]:
+                    instruction = (instruction[0], destination)
+                    self.threaded += 1
+            output.append(instruction)
+
+        # drop the gotos followed by their target label, possibly after other labels
+        output = [instruction for i, instruction in enumerate(output)
+                  if not (instruction[0] == 'goto' and _falls_through(output, i))]
+
+        self.removed += len(instructions) - len(output)
+        return output
+
+
+def _destination(instructions, labels, label):
+    """Return the label a jump to the given label ends up at"""
+    visited = {label}
+    while True:
+        i = labels[label] + 1
+        while i < len(instructions) and instructions[i][0] == 'label':
+            i += 1
+
+        if i == len(instructions) or instructions[i][0] != 'goto' or instructions[i][1] in visited:
+            return label
+        label = instructions[i][1]
+        visited.add(label)
+
+
+def _falls_through(instructions, index):
+    """Return True if the goto at the index jumps to one of the labels following it"""
+    label = instructions[index][1]
+    i = index + 1
+    while i < len(instructions) and instructions[i][0] == 'label':
+        if instructions[i][1] == label:
+            return True
+        i += 1
+    return False
@@ -0,0 +1,131 @@
+"""Local allocator module of the compiler
+
+Classes:
+    LocalAllocator
+"""
+
+
+class LocalAllocator:
+    """LocalAllocator class of the Jack compiler.
+
+    Pass of the InstructionBuffer, which shrinks the frame of a function
+    with a liveness analysis of its locals: the stores of values that are
+    never read again are removed, so the locals that are never read need
+    no slot, and the locals whose values are never live at the same time
+    share a slot. The function command zeroes every local, so the locals
+    read before they are assigned are live from the start of the function.
+
+    Properties:
+        removed_locals: number of locals removed from the frames so far
+        removed: number of instructions removed so far
+
+    Methods:
+        run(list) -> list
+    """
+
+    def __init__(self):
+        self.removed_locals = 0
+        self.removed = 0
+
+    def run(self, instructions):
+        """Return the instructions with their locals reallocated"""
+        if not instructions or instructions[0][0] != 'function':
+            return instructions
+        num_locals = instructions[0][2]
+
+        live_out = _liveness(instructions, num_locals)
+        slots = _allocate(instructions, live_out, num_locals)
+
+        output = []
+        for instruction, live in zip(instructions, live_out):
+            if instruction[0] == 'function':
+                instruction = ('function', instruction[1], len(set(slots.values())))
+            elif instruction[1:2] == ('local',):
+                local = instruction[2]
+                if instruction[0] == 'pop' and not live >> local & 1:
+                    # the value stored is never read, so it is not computed if it is just pushed
+                    if output and output[-1][0] == 'push':
+                        output.pop()
+                    else:
+                        output.append(('pop', 'temp', 0))
+                    continue
+                instruction = (instruction[0], 'local', slots[local])
+            output.append(instruction)
+
+        self.removed_locals += num_locals - len(set(slots.values()))
+        self.removed += len(instructions) - len(output)
+        return output
+
+
+def _liveness(instructions, num_locals):
+    """Return the locals live after each instruction, as bit sets"""
+    labels = {instruction[1]: i for i, instruction in enumerate(instructions)
+              if instruction[0] == 'label'}
+    successors = []
+    uses = []
+    definitions = []
+    for i, instruction in enumerate(instructions):
+        command = instruction[0]
+        following = [i + 1] if i + 1 < len(instructions) else []
+        if command == 'goto':
+            successors.append([labels[instruction[1]]])
+        elif command == 'if-goto':
+            successors.append([labels[instruction[1]]] + following)
+        elif command == 'return':
+            successors.append([])
+        else:
+            successors.append(following)
+
+        is_local = instruction[1:2] == ('local',)
+        uses.append(1 << instruction[2] if is_local and command == 'push' else 0)
+        if command == 'function':
+            definitions.append((1 << num_locals) - 1)  # zeroes every local
+        else:
+            definitions.append(1 << instruction[2] if is_local and command == 'pop' else 0)
+
+    live_in = [0] * len(instructions)
+    live_out = [0] * len(instructions)
+    changed = True
+    while changed:
+        changed = False
+        for i in reversed(range(len(instructions))):
+            out = 0
+            for successor in successors[i]:
+                out |= live_in[successor]
+            live = uses[i] | (out & ~definitions[i])
+            if out != live_out[i] or live != live_in[i]:
+                live_out[i], live_in[i] = out, live
+                changed = True
+
+    return live_out
+
+
+def _allocate(instructions, live_out, num_locals):
+    """Return the slot of each local read by the instructions, locals
+    interfering if one is assigned while the other is live
+    """
+    interference = [0] * num_locals
+    read = 0
+    for instruction, live in zip(instructions, live_out):
+        if instruction[0] == 'function':
+            assigned = range(num_locals)
+        elif instruction[:2] == ('pop', 'local'):
+            assigned = [instruction[2]]
+        else:
+            if instruction[:2] == ('push', 'local'):
+                read |= 1 << instruction[2]
+            continue
+
+        for local in assigned:
+            others = live & ~(1 << local)
+            interference[local] |= others
+            for other in range(num_locals):
+                if others >> other & 1:
+                    interference[other] |= 1 << local
+
+    slots = {}
+    for local in range(num_locals):
+        if read >> local & 1:
+            taken = {slot for other, slot in slots.items() if interference[local] >> other & 1}
+            slots[local] = next(slot for slot in range(num_locals) if slot not in taken)
+    return slots
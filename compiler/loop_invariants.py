@@ -0,0 +1,263 @@
+"""Loop invariant mover module of the compiler
+
+Classes:
+    LoopInvariantMover
+"""
+
+from syntax_tree import (
+    ArrayAccess,
+    BinaryOp,
+    DoStatement,
+    IfStatement,
+    IntegerConstant,
+    LetStatement,
+    NodeVisitor,
+    StringConstant,
+    SubroutineCall,
+    UnaryOp,
+    VarDec,
+    Variable,
+    WhileStatement,
+)
+
+
+# prefix of the names of the locals holding moved expressions,
+# which cannot clash with Jack identifiers
+LOCAL_PREFIX = '$invariant'
+
+
+class LoopInvariantMover(NodeVisitor):
+    """LoopInvariantMover class of the Jack compiler.
+
+    Pass over the syntax tree of a class, which moves the loop invariant
+    expressions of each while statement, such as n * 2 or size - 1, out of
+    the loop: each is computed once into a new local before the loop, and
+    the loop reads the local instead. Inner loops are processed first, and
+    the locals computed before them move out of the outer loops they are
+    invariant in as well.
+
+    An expression is invariant if it calls no subroutine, reads no array
+    element, and reads no variable assigned in the loop, nor any field or
+    static variable if the loop calls a subroutine or stores an array
+    element, which could assign them. As the expressions moved out are
+    evaluated even if the loop body is not, they only divide by nonzero
+    constants.
+
+    Properties:
+        moved: number of expressions moved out of loops so far
+        var_decs: local variable declarations of the subroutine being processed
+        local_names: parameter and local names of the subroutine being processed
+
+    Methods:
+        move(ClassDec) -> ClassDec
+    """
+
+    def __init__(self):
+        self.moved = 0
+        self.var_decs = []
+        self.local_names = set()
+
+    def move(self, tree):
+        """Move the loop invariants of a class in place, and return the class"""
+        self.visit(tree)
+        return tree
+
+    def visit_ClassDec(self, node):
+        for subroutine in node.subroutines:
+            self.var_decs = subroutine.var_decs
+            self.local_names = {parameter.name for parameter in subroutine.parameters}
+            self.local_names.update(name for var_dec in subroutine.var_decs for name in var_dec.names)
+            self._visit_statements(subroutine.statements)
+
+    def visit_LetStatement(self, node):
+        return None
+
+    def visit_IfStatement(self, node):
+        self._visit_statements(node.statements)
+        if node.else_statements is not None:
+            self._visit_statements(node.else_statements)
+
+    def visit_WhileStatement(self, node):
+        """Return the statements computing the invariants of the loop,
+        to be inserted before it
+        """
+        self._visit_statements(node.statements)
+        assigned, calls = _assignments(node)
+
+        # the locals computed before the inner loops, if invariant in this loop too
+        moved = []
+        for statement in node.statements:
+            if isinstance(statement, LetStatement) and statement.name.startswith(LOCAL_PREFIX):
+                assigned.discard(statement.name)
+                if id(statement.value) in _invariant_nodes(statement.value, assigned,
+                                                           self.local_names, calls):
+                    moved.append(statement)
+                else:
+                    assigned.add(statement.name)
+        node.statements = [statement for statement in node.statements if statement not in moved]
+
+        locals_ = {}
+        for statement in _statements(node):
+            if isinstance(statement, (IfStatement, WhileStatement)):
+                statement.condition = self._move(statement.condition, assigned, calls, locals_, moved)
+            elif isinstance(statement, LetStatement):
+                if statement.index is not None:
+                    statement.index = self._move(statement.index, assigned, calls, locals_, moved)
+                statement.value = self._move(statement.value, assigned, calls, locals_, moved)
+            elif isinstance(statement, DoStatement):
+                # the call itself is not invariant, but its arguments may be
+                statement.call.arguments = [self._move(argument, assigned, calls, locals_, moved)
+                                            for argument in statement.call.arguments]
+            elif statement.value is not None:  # return statement
+                statement.value = self._move(statement.value, assigned, calls, locals_, moved)
+
+        return moved
+
+    def visit_DoStatement(self, node):
+        return None
+
+    def visit_ReturnStatement(self, node):
+        return None
+
+    def _visit_statements(self, statements):
+        """Process the statements in place, inserting the statements
+        moved out of the loops before them
+        """
+        i = 0
+        while i < len(statements):
+            moved = self.visit(statements[i])
+            if moved:
+                statements[i:i] = moved
+                i += len(moved)
+            i += 1
+
+    def _move(self, node, assigned, calls, locals_, moved):
+        """Return the expression with its largest invariant subexpressions
+        replaced by the locals they are computed into before the loop
+        """
+        invariant = _invariant_nodes(node, assigned, self.local_names, calls)
+        if _is_worth_moving(node, invariant):
+            return self._local(node, locals_, moved)
+
+        pending = [node]
+        while pending:
+            parent = pending.pop()
+            children = []
+            for child in parent.children():
+                if _is_worth_moving(child, invariant):
+                    child = self._local(child, locals_, moved)
+                else:
+                    pending.append(child)
+                children.append(child)
+            parent.replace_children(children)
+
+        return node
+
+    def _local(self, node, locals_, moved):
+        """Return the variable of the local holding the value of an
+        invariant expression, declaring the local and computing it before
+        the loop if the loop has no local holding the same expression yet
+        """
+        key = node.key()
+        if key not in locals_:
+            name = f'{LOCAL_PREFIX}{sum(len(var_dec.names) for var_dec in self.var_decs)}'
+            self.var_decs.append(VarDec('int', [name]))
+            self.local_names.add(name)
+            moved.append(LetStatement(name, None, node))
+            locals_[key] = name
+            self.moved += 1
+        return Variable(locals_[key])
+
+
+def _statements(loop):
+    """Return the statements nested in a loop, including the loop itself"""
+    statements = []
+    pending = [loop]
+    while pending:
+        statement = pending.pop()
+        statements.append(statement)
+        if isinstance(statement, (IfStatement, WhileStatement)):
+            pending += statement.statements
+        if isinstance(statement, IfStatement) and statement.else_statements is not None:
+            pending += statement.else_statements
+    return statements
+
+
+def _assignments(loop):
+    """Return the variables assigned in a loop, and whether it calls a
+    subroutine or stores an array element, either of which may assign any
+    field or static variable
+    """
+    assigned = set()
+    calls = False
+    for statement in _statements(loop):
+        if isinstance(statement, LetStatement):
+            if statement.index is None:
+                assigned.add(statement.name)
+            else:
+                # the array may be an object, or this, whose fields it assigns
+                calls = True
+            expressions = [statement.index, statement.value]
+        elif isinstance(statement, (IfStatement, WhileStatement)):
+            expressions = [statement.condition]
+        elif isinstance(statement, DoStatement):
+            expressions = [statement.call]
+        else:
+            expressions = [statement.value]
+        calls = calls or any(_calls_subroutine(expression)
+                             for expression in expressions if expression is not None)
+    return assigned, calls
+
+
+def _calls_subroutine(node):
+    """Return True if evaluating the expression calls a subroutine"""
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, SubroutineCall):
+            return True
+        pending.extend(node.children())
+    return False
+
+
+def _invariant_nodes(node, assigned, local_names, calls):
+    """Return the ids of the invariant subexpressions of an expression.
+
+    The expression is walked in postorder with an explicit stack, so the
+    depth of an expression is not limited by the recursion limit.
+    """
+    invariant = set()
+    stack = [(node, False)]
+
+    while stack:
+        node, children_walked = stack.pop()
+        children = node.children()
+        if not children_walked:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children)
+            continue
+
+        if isinstance(node, (SubroutineCall, StringConstant, ArrayAccess)):
+            continue
+        if isinstance(node, Variable) and (node.name in assigned
+                                           or calls and node.name not in local_names):
+            continue
+        if isinstance(node, BinaryOp) and node.op == '/' and not (
+                isinstance(node.right, IntegerConstant) and node.right.value != 0):
+            continue
+        if all(id(child) in invariant for child in children):
+            invariant.add(id(node))
+
+    return invariant
+
+
+def _is_worth_moving(node, invariant):
+    """Return True if the expression is invariant and computes something,
+    so that reading it from a local is cheaper
+    """
+    if id(node) not in invariant:
+        return False
+    if isinstance(node, BinaryOp):
+        return True
+    # a negated integer constant is a constant
+    return isinstance(node, UnaryOp) and not isinstance(node.operand, IntegerConstant)
@@ -0,0 +1,49 @@
+"""Name table module of the compiler
+
+Classes:
+    NameTable
+"""
+
+import sys
+
+
+class NameTable:
+    """NameTable class of the Jack compiler.
+
+    Interning table shared by the tokenizer, the symbol tables and the
+    compilation engine for a whole build. Every occurrence of a name is
+    mapped to one shared string object, so names used as symbol table keys
+    or compared by the engine hash once and match by identity.
+
+    Properties:
+        names: dictionary mapping each distinct name to its shared object
+        occurrences: number of names interned so far, including repeats
+        saved_bytes: memory that repeated occurrences would have taken up
+
+    Methods:
+        intern(str) -> str
+        memory_report() -> str
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.occurrences = 0
+        self.saved_bytes = 0
+
+    def intern(self, name):
+        """Return the shared object for the given name"""
+        self.occurrences += 1
+        shared = self.names.get(name)
+
+        if shared is None:
+            self.names[name] = shared = name
+        elif shared is not name:
+            self.saved_bytes += sys.getsizeof(name)
+
+        return shared
+
+    def memory_report(self):
+        """Return a summary of the memory saved by interning"""
+        distinct_bytes = sum(sys.getsizeof(name) for name in self.names)
+        return (f'{len(self.names)} distinct names, {self.occurrences} occurrences: '
+                f'{distinct_bytes} bytes shared, {self.saved_bytes} bytes saved')
@@ -0,0 +1,207 @@
+"""Pass manager module of the compiler
+
+Classes:
+    PassManager
+"""
+
+import time
+
+from block_layout import BlockReorderer
+from constant_folder import ConstantFolder
+from dead_code import DeadCodeEliminator
+from inliner import INLINE_BUDGET, Inliner
+from jump_threading import JumpThreader
+from local_allocation import LocalAllocator
+from loop_invariants import LoopInvariantMover
+from peephole import PeepholeOptimizer
+
+
+# passes over the syntax trees of all the classes of a program, by name,
+# in the order they run, each created by a function of the pass manager
+PROGRAM_PASSES = {
+    'inline': lambda manager: Inliner(manager.inline_budget).inline,
+}
+
+# passes over the syntax tree of each class
+TREE_PASSES = {
+    'fold-constants': lambda manager: ConstantFolder().fold,
+    'move-loop-invariants': lambda manager: LoopInvariantMover().move,
+}
+
+# passes over the instructions of each function (see InstructionBuffer)
+INSTRUCTION_PASSES = {
+    'peephole': lambda manager: PeepholeOptimizer(),
+    'optimize-branches': lambda manager: JumpThreader(),
+    'eliminate-dead-code': lambda manager: DeadCodeEliminator(),
+    'reorder-blocks': lambda manager: BlockReorderer(),
+    'pack-locals': lambda manager: LocalAllocator(),
+}
+
+# optimizations made by the code generator as it generates the code
+CODE_GENERATOR_OPTIONS = ('optimize-branches', 'tail-calls', 'cache-arrays', 'pool-strings')
+# name under which the strength reduction of the code generator is measured
+STRENGTH_REDUCTION = 'strength-reduction'
+
+# optimizations enabled by each optimization level; pooling strings is
+# never enabled by a level, as it is only safe for some programs
+O1 = ('fold-constants', 'peephole', 'optimize-branches', 'eliminate-dead-code')
+O2 = O1 + ('inline', 'move-loop-invariants', 'tail-calls', 'cache-arrays',
+           'reorder-blocks', 'pack-locals')
+OPTIMIZATION_LEVELS = {0: (), 1: O1, 2: O2}
+
+# strength reduction mode of each optimization level
+STRENGTH_REDUCTION_LEVELS = {0: None, 1: 'size', 2: 'speed'}
+
+# name under which the passes over the whole program are recorded
+PROGRAM = 'program'
+
+
+class PassManager:
+    """PassManager class of the Jack compiler.
+
+    Runs the enabled optimization passes, found by name in the registries
+    above, and records the wall time each pass takes and the number of
+    instructions it removes, in each file. The passes over the syntax trees
+    are run by transform_program and transform, and the passes over the
+    instructions by the pass manager itself, as a pass of the
+    InstructionBuffer, fresh passes being created for each file by start.
+
+    The passes over the syntax trees and the optimizations of the code
+    generator remove no instruction themselves: measure records what each
+    of them removes when enabled on its own, compared with the unoptimized
+    code, and adds it to what the instruction pass of the same name
+    removes, if there is one.
+
+    Properties:
+        enabled: names of the optimizations enabled
+        inline_budget: largest number of nodes in the body of an inlined subroutine
+        filename: name of the file being compiled
+        passes: instruction passes of the file being compiled, by name
+        timings: seconds spent in each pass, by file and pass name
+        removed: instructions removed by each instruction pass, by file and pass name
+
+    Methods:
+        is_enabled(str) -> bool
+        transform_program(list) -> list
+        start(str) -> None
+        transform(ClassDec) -> ClassDec
+        run(list) -> list
+        measure(list, function) -> None
+        report() -> str
+    """
+
+    def __init__(self, enabled, inline_budget=INLINE_BUDGET):
+        self.enabled = set(enabled)
+        self.inline_budget = inline_budget
+        self.filename = PROGRAM
+        self.passes = {}
+        self.timings = {}
+        self.removed = {}
+
+    def is_enabled(self, name):
+        """Return True if the optimization is enabled"""
+        return name in self.enabled
+
+    def transform_program(self, trees):
+        """Run the enabled passes over the classes of the program, and return the classes"""
+        self.filename = PROGRAM
+        for name, create in PROGRAM_PASSES.items():
+            if name in self.enabled:
+                trees = self._timed(name, create(self), trees)
+        return trees
+
+    def start(self, filename):
+        """Create the instruction passes of a new file"""
+        self.filename = filename
+        self.passes = {name: create(self) for name, create in INSTRUCTION_PASSES.items()
+                       if name in self.enabled}
+
+    def transform(self, tree):
+        """Run the enabled passes over the class of the file, and return the class"""
+        for name, create in TREE_PASSES.items():
+            if name in self.enabled:
+                tree = self._timed(name, create(self), tree)
+        return tree
+
+    def run(self, instructions):
+        """Run the instruction passes of the file over the instructions of a function"""
+        for name, optimization in self.passes.items():
+            count = len(instructions)
+            instructions = self._timed(name, optimization.run, instructions)
+            removed = self.removed.setdefault(self.filename, {})
+            removed[name] = removed.get(name, 0) + count - len(instructions)
+        return instructions
+
+    def measure(self, classes, count_instructions):
+        """Record the instructions removed from the code of each file by
+        each enabled optimization of the syntax trees or of the code
+        generator, run on its own, the passes over copies of the classes.
+        The classes are given as (file name, class) pairs, and
+        count_instructions(list, set) returns the number of instructions
+        generated for each class of such a list, by file name, with the code
+        generator optimizations of the set, leaving the classes unchanged
+        """
+        counts = {}
+        for name, create in PROGRAM_PASSES.items():
+            if name in self.enabled:
+                trees = [(filename, tree.copy()) for filename, tree in classes]
+                create(self)([tree for _, tree in trees])
+                counts[name] = count_instructions(trees, set())
+        for name, create in TREE_PASSES.items():
+            if name in self.enabled:
+                trees = [(filename, create(self)(tree.copy())) for filename, tree in classes]
+                counts[name] = count_instructions(trees, set())
+        for name in (*CODE_GENERATOR_OPTIONS, STRENGTH_REDUCTION):
+            if name in self.enabled:
+                counts[name] = count_instructions(classes, {name})
+
+        unoptimized = count_instructions(classes, set()) if counts else {}
+        for name, file_counts in counts.items():
+            for filename, count in file_counts.items():
+                removed = self.removed.setdefault(filename, {})
+                removed[name] = removed.get(name, 0) + unoptimized[filename] - count
+
+    def _timed(self, name, function, argument):
+        """Return the result of a pass, adding the time it took to the timings of the file"""
+        start = time.perf_counter()
+        result = function(argument)
+        timings = self.timings.setdefault(self.filename, {})
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start
+        return result
+
+    def report(self):
+        """Return the time spent and the instructions removed by each pass,
+        in each file and in total
+        """
+        totals = {}
+        total_removed = {}
+        lines = []
+        for filename in {**self.timings, **self.removed}:
+            timings = self.timings.get(filename, {})
+            removed = self.removed.get(filename, {})
+            for name in {**timings, **removed}:
+                description = _describe(name, timings.get(name), removed.get(name))
+                lines.append(f'{filename}: {description}')
+                if name in timings:
+                    totals[name] = totals.get(name, 0) + timings[name]
+                if name in removed:
+                    total_removed[name] = total_removed.get(name, 0) + removed[name]
+
+        lines.extend(f'total: {_describe(name, totals.get(name), total_removed.get(name))}'
+                     for name in {**totals, **total_removed})
+        return '\n'.join(lines)
+
+
+def _describe(name, seconds, removed):
+    """Return the time spent and the instructions removed by a pass, as
+    text; the code generator optimizations take no time of their own
+    """
+    description = name
+    if seconds is not None:
+        description += f' {seconds * 1000:.2f} ms'
+    if removed is not None:
+        if removed < 0:
+            description += f', {-removed} instructions added'
+        else:
+            description += f', {removed} instructions removed'
+    return description
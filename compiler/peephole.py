@@ -0,0 +1,142 @@
+"""Peephole optimizer module of the compiler
+
+Classes:
+    PeepholeOptimizer
+"""
+
+
+class PeepholeOptimizer:
+    """PeepholeOptimizer class of the Jack compiler.
+
+    Pass of the InstructionBuffer, which slides a window over the
+    instructions of a function and replaces the sequences matched by a
+    table of rewrite rules with shorter equivalent ones. Rules are tried
+    again on the tail of the output after each rewrite, so rewrites enable
+    further ones.
+
+    Properties:
+        rules: rewrite rules applied, as (window size, rule)
+        removed: number of instructions removed so far
+
+    Methods:
+        run(list) -> list
+    """
+
+    def __init__(self, rules=None):
+        self.rules = RULES if rules is None else rules
+        self.removed = 0
+
+    def run(self, instructions):
+        """Return the optimized instructions"""
+        output = []
+
+        for instruction in instructions:
+            output.append(instruction)
+
+            rewritten = True
+            while rewritten:
+                rewritten = False
+                for size, rule in self.rules:
+                    if len(output) >= size:
+                        replacement = rule(*output[-size:])
+                        if replacement is not None:
+                            output[-size:] = replacement
+                            rewritten = True
+                            break
+
+        self.removed += len(instructions) - len(output)
+        return output
+
+
+def _array_store(push, pop_temp, pop_pointer, push_temp, pop_that):
+    """push V; pop temp 0; pop pointer 1; push temp 0; pop that 0
+    -> pop pointer 1; push V; pop that 0, if pushing V does not read THAT
+    """
+    if (push[0] == 'push' and pop_temp == ('pop', 'temp', 0)
+            and pop_pointer == ('pop', 'pointer', 1) and push_temp == ('push', 'temp', 0)
+            and pop_that == ('pop', 'that', 0)
+            and push[1] != 'that' and push[1:] != ('pointer', 1)):
+        return [pop_pointer, push, pop_that]
+    return None
+
+
+def _negated_constant_branch(push, op, branch):
+    """push constant n; not|neg; if-goto L -> goto L, or nothing if never taken"""
+    if push[:2] == ('push', 'constant') and op in (('not',), ('neg',)) and branch[0] == 'if-goto':
+        # ~n is never 0 for a constant, -n is 0 only for n = 0
+        if op == ('neg',) and push[2] == 0:
+            return []
+        return [('goto', branch[1])]
+    return None
+
+
+def _twice_negated_constant_branch(push, first, second, branch):
+    """push constant n; not|neg; not|neg; if-goto L -> goto L, or nothing if
+    never taken, as while (true) compiles to push constant 1; neg; not; if-goto
+    """
+    if (push[:2] == ('push', 'constant') and first in (('not',), ('neg',))
+            and second in (('not',), ('neg',)) and branch[0] == 'if-goto'):
+        value = push[2]
+        for op in (first, second):
+            value = -value if op == ('neg',) else ~value
+        return [('goto', branch[1])] if value & 0xFFFF else []
+    return None
+
+
+def _push_pop(push, pop):
+    """push X; pop X -> nothing"""
+    if push[0] == 'push' and pop[0] == 'pop' and push[1:] == pop[1:]:
+        return []
+    return None
+
+
+def _double_negation(first, second):
+    """not; not -> nothing, neg; neg -> nothing"""
+    if first == second and first in (('not',), ('neg',)):
+        return []
+    return None
+
+
+def _constant_branch(push, branch):
+    """push constant n; if-goto L -> goto L, or nothing if n is 0"""
+    if push[:2] == ('push', 'constant') and branch[0] == 'if-goto':
+        return [('goto', branch[1])] if push[2] else []
+    return None
+
+
+def _zero_operand(push, op):
+    """push constant 0; add|sub|or -> nothing"""
+    if push == ('push', 'constant', 0) and op in (('add',), ('sub',), ('or',)):
+        return []
+    return None
+
+
+def _goto_next(goto, label):
+    """goto L; label L -> label L"""
+    if goto[0] == 'goto' and label[0] == 'label' and goto[1] == label[1]:
+        return [label]
+    return None
+
+
+# rewrite rules, as (window size, rule), a rule returning the replacement
+# of the window or None if it does not match
+RULES = (
+    (5, _array_store),
+    (4, _twice_negated_constant_branch),
+    (3, _negated_constant_branch),
+    (2, _push_pop),
+    (2, _double_negation),
+    (2, _constant_branch),
+    (2, _zero_operand),
+    (2, _goto_next),
+)
+# rules resolving the branches on a constant condition
+BRANCH_RULES = (
+    (4, _twice_negated_constant_branch),
+    (3, _negated_constant_branch),
+    (2, _constant_branch),
+)
+# rules removing the jumps to the next instruction
+JUMP_RULES = (
+    (2, _goto_next),
+)
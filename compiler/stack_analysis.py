@@ -0,0 +1,132 @@
+"""Stack analyzer module of the compiler
+
+Classes:
+    StackAnalyzer
+"""
+
+# commands popping two operands and pushing one
+BINARY_COMMANDS = ('add', 'sub', 'and', 'or', 'eq', 'gt', 'lt')
+
+
+class StackAnalyzer:
+    """StackAnalyzer class of the Jack compiler.
+
+    Pass of the InstructionBuffer, which leaves the instructions of each
+    function unchanged, and records the figures of the function: its
+    locals, the largest depth its operand stack reaches, its number of
+    instructions, the number of instructions executed on its shortest and
+    longest paths to a return, each loop being counted once, and the
+    subroutines it calls.
+
+    Properties:
+        functions: figures of each function analyzed so far, as dicts
+
+    Methods:
+        run(list) -> list
+        report() -> dict
+    """
+
+    def __init__(self):
+        self.functions = []
+
+    def run(self, instructions):
+        """Record the figures of the function, and return its instructions"""
+        if not instructions or instructions[0][0] != 'function':
+            return instructions
+
+        callees = sorted({instruction[1] for instruction in instructions if instruction[0] == 'call'})
+        shortest, longest = _path_lengths(instructions)
+        self.functions.append({
+            'name': instructions[0][1],
+            'locals': instructions[0][2],
+            'max_stack': _max_stack_depth(instructions),
+            'instructions': len(instructions),
+            'shortest_path': shortest,
+            'longest_path': longest,
+            'call_sites': sum(1 for instruction in instructions if instruction[0] == 'call'),
+            'callees': callees,
+        })
+        return instructions
+
+    def report(self):
+        """Return the figures of the functions analyzed, ready to be written as JSON"""
+        return {
+            'functions': self.functions,
+            'max_stack': max((function['max_stack'] for function in self.functions), default=0),
+            'instructions': sum(function['instructions'] for function in self.functions),
+        }
+
+
+def _stack_effect(instruction):
+    """Return the change of the depth of the operand stack after an instruction"""
+    command = instruction[0]
+    if command == 'push':
+        return 1
+    if command in ('pop', 'if-goto') or command in BINARY_COMMANDS:
+        return -1
+    if command == 'call':
+        return 1 - instruction[2]  # the arguments are replaced by the value returned
+    return 0
+
+
+def _successors(instructions, labels, i):
+    """Return the indexes of the instructions executed after an instruction"""
+    command = instructions[i][0]
+    following = [i + 1] if i + 1 < len(instructions) else []
+    if command == 'goto':
+        return [labels[instructions[i][1]]]
+    if command == 'if-goto':
+        return [labels[instructions[i][1]]] + following
+    if command == 'return':
+        return []
+    return following
+
+
+def _labels(instructions):
+    return {instruction[1]: i for i, instruction in enumerate(instructions)
+            if instruction[0] == 'label'}
+
+
+def _max_stack_depth(instructions):
+    """Return the largest depth of the operand stack of a function,
+    the code generator leaving the same depth on every path to a label
+    """
+    labels = _labels(instructions)
+    depths = {0: 0}
+    pending = [0]
+    max_depth = 0
+
+    while pending:
+        i = pending.pop()
+        depth = depths[i] + _stack_effect(instructions[i])
+        max_depth = max(max_depth, depth)
+        for successor in _successors(instructions, labels, i):
+            if successor not in depths:
+                depths[successor] = depth
+                pending.append(successor)
+
+    return max_depth
+
+
+def _path_lengths(instructions):
+    """Return the number of instructions executed on the shortest and the
+    longest paths from the start of a function to a return, ignoring the
+    jumps back to earlier instructions, so that each loop is counted once,
+    or None if there is no such path
+    """
+    labels = _labels(instructions)
+    shortest = [None] * len(instructions)
+    longest = [None] * len(instructions)
+
+    for i in reversed(range(len(instructions))):
+        if instructions[i][0] == 'return':
+            shortest[i] = longest[i] = 1
+            continue
+        lengths = [(shortest[successor], longest[successor])
+                   for successor in _successors(instructions, labels, i)
+                   if successor > i and shortest[successor] is not None]
+        if lengths:
+            shortest[i] = 1 + min(length for length, _ in lengths)
+            longest[i] = 1 + max(length for _, length in lengths)
+
+    return shortest[0], longest[0]
@@ -0,0 +1,239 @@
+"""Syntax tree module of the compiler
+
+Defines the nodes of the tree built by the CompilationEngine, which is
+then walked by the code generator and the other passes.
+
+Classes:
+    Node
+    ClassDec
+    ClassVarDec
+    SubroutineDec
+    Parameter
+    VarDec
+    LetStatement
+    IfStatement
+    WhileStatement
+    DoStatement
+    ReturnStatement
+    IntegerConstant
+    StringConstant
+    KeywordConstant
+    Variable
+    ArrayAccess
+    SubroutineCall
+    UnaryOp
+    BinaryOp
+    NodeVisitor
+"""
+
+
+class Node:
+    """Base class of all syntax tree nodes.
+
+    Each subclass lists its attributes in `fields`, in source order,
+    and is visited by the NodeVisitor method named in `visit_method`.
+
+    Properties:
+        parens: number of parentheses around the node in the source, only
+            kept to reproduce the source (e.g. as XML), so that the passes
+            can ignore it; only set on parenthesized nodes, to keep
+            creating nodes cheap
+
+    Methods:
+        children() -> list
+        replace_children(list) -> None
+        key() -> tuple
+        copy() -> Node
+    """
+
+    __slots__ = ('parens',)
+    fields = ()
+    visit_method = ''
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.visit_method = f'visit_{cls.__name__}'
+
+    def __init__(self, *args):
+        for field, value in zip(self.fields, args):
+            setattr(self, field, value)
+
+    def __repr__(self):
+        values = ', '.join(repr(getattr(self, field)) for field in self.fields)
+        return f'{self.__class__.__name__}({values})'
+
+    def children(self):
+        """Return the child nodes, in order"""
+        children = []
+        for field in self.fields:
+            value = getattr(self, field)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, list):
+                children.extend(item for item in value if isinstance(item, Node))
+        return children
+
+    def replace_children(self, children):
+        """Replace the child nodes, in order"""
+        children = iter(children)
+        for field in self.fields:
+            value = getattr(self, field)
+            if isinstance(value, Node):
+                setattr(self, field, next(children))
+            elif isinstance(value, list):
+                setattr(self, field, [next(children) if isinstance(item, Node) else item
+                                      for item in value])
+
+    def key(self):
+        """Return a key identifying the subtree, equal for equal subtrees"""
+        key = []
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            key.append(type(node).__name__)
+            for field in node.fields:
+                value = getattr(node, field)
+                if isinstance(value, list):
+                    key.append(len(value))  # so that the key tells where the list ends
+                elif not isinstance(value, Node):
+                    key.append(value)
+            pending.extend(reversed(node.children()))
+        return tuple(key)
+
+    def copy(self):
+        """Return a copy of the subtree, sharing no node or list with it.
+
+        The subtree is copied with an explicit stack, so its depth is not
+        limited by the recursion limit.
+        """
+        root = self._copy_node()
+        pending = [root]
+        while pending:
+            node = pending.pop()
+            # the lists of the copy are rebuilt by replace_children
+            children = [child._copy_node() for child in node.children()]
+            node.replace_children(children)
+            pending.extend(children)
+        return root
+
+    def _copy_node(self):
+        """Return a copy of the node alone, sharing its fields"""
+        return type(self)(*(getattr(self, field) for field in self.fields))
+
+
+class ClassDec(Node):
+    """class name '{' class_var_decs subroutines '}'"""
+    __slots__ = fields = ('name', 'class_var_decs', 'subroutines')
+
+
+class ClassVarDec(Node):
+    """kind ('static'|'field') type names ';'"""
+    __slots__ = fields = ('kind', 'type', 'names')
+
+
+class SubroutineDec(Node):
+    """kind ('constructor'|'function'|'method') return_type name
+    '(' parameters ')' '{' var_decs statements '}'
+    """
+    __slots__ = fields = ('kind', 'return_type', 'name', 'parameters', 'var_decs', 'statements')
+
+
+class Parameter(Node):
+    """type name"""
+    __slots__ = fields = ('type', 'name')
+
+
+class VarDec(Node):
+    """'var' type names ';'"""
+    __slots__ = fields = ('type', 'names')
+
+
+class LetStatement(Node):
+    """'let' name ('[' index ']')? '=' value ';' (index is None for plain variables)"""
+    __slots__ = fields = ('name', 'index', 'value')
+
+
+class IfStatement(Node):
+    """'if' '(' condition ')' '{' statements '}' ('else' '{' else_statements '}')?
+    (else_statements is None if there is no else clause)
+    """
+    __slots__ = fields = ('condition', 'statements', 'else_statements')
+
+
+class WhileStatement(Node):
+    """'while' '(' condition ')' '{' statements '}'"""
+    __slots__ = fields = ('condition', 'statements')
+
+
+class DoStatement(Node):
+    """'do' call ';'"""
+    __slots__ = fields = ('call',)
+
+
+class ReturnStatement(Node):
+    """'return' value? ';' (value is None if no value is returned)"""
+    __slots__ = fields = ('value',)
+
+
+class IntegerConstant(Node):
+    """integerConstant (value is an int, and text its spelling in the source,
+    None if the constant is computed, e.g. by folding)
+    """
+    __slots__ = ('value', 'text')
+    fields = ('value',)
+
+    def __init__(self, value, text=None):
+        super().__init__(value)
+        self.text = text
+
+
+class StringConstant(Node):
+    """stringConstant (value is the string without quotes)"""
+    __slots__ = fields = ('value',)
+
+
+class KeywordConstant(Node):
+    """'true'|'false'|'null'|'this'"""
+    __slots__ = fields = ('value',)
+
+
+class Variable(Node):
+    """varName"""
+    __slots__ = fields = ('name',)
+
+
+class ArrayAccess(Node):
+    """name '[' index ']'"""
+    __slots__ = fields = ('name', 'index')
+
+
+class SubroutineCall(Node):
+    """(receiver '.')? name '(' arguments ')'
+    (receiver is a class or variable name, or None for a method of the current object)
+    """
+    __slots__ = fields = ('receiver', 'name', 'arguments')
+
+
+class UnaryOp(Node):
+    """op ('-'|'~') operand"""
+    __slots__ = fields = ('op', 'operand')
+
+
+class BinaryOp(Node):
+    """left op right"""
+    __slots__ = fields = ('op', 'left', 'right')
+
+
+class NodeVisitor:
+    """Base class of the passes walking a syntax tree.
+
+    visit(node) calls the method named after the class of the node,
+    e.g. visit_LetStatement(node), and returns its result.
+
+    Methods:
+        visit(Node) -> any
+    """
+
+    def visit(self, node):
+        """Visit a node"""
+        return getattr(self, node.visit_method)(node)
@@ -0,0 +1,167 @@
+"""Token cache module of the compiler
+
+Classes:
+    TokenCache
+"""
+
+import hashlib
+import os
+import struct
+
+from constants import keywords, TokenType
+from tokenizer import TOKENIZER_VERSION, Token, Tokenizer, read_source, scan
+
+
+# file layout: header, one fixed size record per token, then the text of all
+# tokens concatenated and encoded as UTF-8
+HEADER = struct.Struct('<4sHII')  # magic, tokenizer version, token count, text size
+RECORD = struct.Struct('<BII')  # token type, offset, text length (in characters)
+MAGIC = b'JTOK'
+CACHE_EXT = 'tok'
+
+TOKEN_TYPES = (
+    TokenType.KEYWORD,
+    TokenType.SYMBOL,
+    TokenType.IDENTIFIER,
+    TokenType.INT_CONST,
+    TokenType.STRING_CONST,
+)
+TOKEN_TYPE_CODES = {token_type: code for code, token_type in enumerate(TOKEN_TYPES)}
+
+
+class TokenCache:
+    """TokenCache class of the Jack compiler.
+
+    Persists the token stream of each source file in a compact binary
+    format, keyed by the SHA-256 digest of the source and the tokenizer
+    version, so unchanged files do not have to be scanned again.
+
+    Entries are read back with a single read. Whenever the cache directory
+    grows beyond its maximum size, the least recently used entries are
+    evicted.
+
+    Properties:
+        directory: path of the cache directory
+        max_size: maximum total size of the cache entries, in bytes
+
+    Methods:
+        tokenizer(str, NameTable) -> Tokenizer
+        load(str, NameTable) -> list
+        store(str, list) -> None
+    """
+
+    def __init__(self, directory, max_size=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def tokenizer(self, filename, names=None):
+        """Return a Tokenizer for the given source file, reading its tokens
+        from the cache if possible, and adding them to it otherwise.
+        If a name table is given, identifiers are interned in it.
+        """
+        source = read_source(filename)
+        tokens = self.load(source, names)
+
+        if tokens is None:
+            tokens = list(scan(source, names=names))
+            self.store(source, tokens)
+
+        return Tokenizer.from_tokens(tokens)
+
+    def load(self, source, names=None):
+        """Return the cached tokens of the given source, or None if they are
+        not cached or their entry is unreadable.
+        If a name table is given, identifiers are interned in it.
+        """
+        path = self._entry_path(source)
+
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            tokens = _decode(data, names)
+        except (struct.error, ValueError, IndexError, KeyError):
+            tokens = None  # a truncated or corrupt entry, rebuilt by the caller
+        if tokens is not None:
+            # mark the entry as recently used
+            os.utime(path)
+        return tokens
+
+    def store(self, source, tokens):
+        """Add the tokens of the given source to the cache"""
+        text = ''.join(token.text for token in tokens).encode('utf-8')
+        records = b''.join(
+            RECORD.pack(TOKEN_TYPE_CODES[token.type], token.offset, len(token.text))
+            for token in tokens
+        )
+
+        # write to a temporary file first, so that an interrupted write
+        # never leaves a truncated entry behind
+        path = self._entry_path(source)
+        temp_path = f'{path}.{os.getpid()}'
+        with open(temp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, TOKENIZER_VERSION, len(tokens), len(text)))
+            file.write(records)
+            file.write(text)
+        os.replace(temp_path, path)
+
+        self._evict()
+
+    def _entry_path(self, source):
+        digest = hashlib.sha256(f'{TOKENIZER_VERSION}\n'.encode('utf-8'))
+        digest.update(source.encode('utf-8'))
+        return os.path.join(self.directory, f'{digest.hexdigest()}.{CACHE_EXT}')
+
+    def _evict(self):
+        """Remove the least recently used entries until the cache fits its maximum size"""
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.name.endswith(f'.{CACHE_EXT}')]
+        stats = {entry.path: entry.stat() for entry in entries}
+        total_size = sum(stat.st_size for stat in stats.values())
+
+        for path in sorted(stats, key=lambda path: stats[path].st_mtime):
+            if total_size <= self.max_size:
+                break
+            os.remove(path)
+            total_size -= stats[path].st_size
+
+
+def _decode(data, names):
+    """Return the tokens of a cache entry, or None if it was written by
+    another tokenizer version. Raises struct.error, ValueError, IndexError
+    or KeyError if the entry is corrupt.
+    """
+    magic, version, count, text_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != TOKENIZER_VERSION:
+        return None
+
+    text_start = HEADER.size + count * RECORD.size
+    if len(data) != text_start + text_size:
+        raise ValueError('truncated cache entry')
+    text = data[text_start:].decode('utf-8')
+
+    tokens = []
+    position = 0
+    for code, offset, length in RECORD.iter_unpack(data[HEADER.size:text_start]):
+        token_type = TOKEN_TYPES[code]
+        token_text = text[position:position + length]
+        position += length
+
+        if token_type == TokenType.KEYWORD:
+            value = keywords[token_text]
+        elif token_type == TokenType.STRING_CONST:
+            value = token_text[1:-1]
+        elif token_type == TokenType.IDENTIFIER and names is not None:
+            token_text = value = names.intern(token_text)
+        else:
+            value = token_text
+
+        tokens.append(Token(token_type, value, token_text, offset))
+
+    if position != len(text):
+        raise ValueError('corrupt cache entry')
+    return tokens
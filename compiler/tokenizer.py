@@ -1,104 +1,439 @@
 """Tokenizer module of the compiler
 
 Classes:
+    Token
+    SliceToken
+    Edit
     Tokenizer
+    IncrementalTokenizer
+
+Functions:
+    read_source(str|file) -> str
+    read_buffer(str|file) -> bytes-like
+    scan(str, int, NameTable, bool) -> generator of Token
+    scan_buffer(bytes-like, int) -> generator of SliceToken
 """
 
+import io
+import mmap
+import os
+import re
+import sys
+from bisect import bisect_left, bisect_right
+from collections import deque
+
 from constants import keywords, symbols, TokenType
 
 
+# version of the token stream produced by scan(); must be increased whenever
+# a change to the scanner alters the tokens produced for some source
+TOKENIZER_VERSION = 1
+
+# Master pattern of the scanner. Skips any run of white space and comments,
+# then captures the next token (if any) into the group named after its type.
+TOKEN_PATTERN = re.compile(r'''
+    (?:
+        \s+                         # white space
+      | //[^\n]*                    # line comment
+      | /\*.*?(?:\*/|\Z)            # block comment (possibly unterminated)
+    )*
+    (?:
+        (?P<STRING_CONST>"[^"\n]*")
+      | (?P<INT_CONST>[0-9]+)
+      | (?P<IDENTIFIER>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<SYMBOL>[{}()\[\].,;+\-*/&|<>=~])
+    )?
+''', re.VERBOSE | re.DOTALL)
+
+# the same pattern, for scanning UTF-8 encoded sources held in bytes-like buffers
+BYTES_TOKEN_PATTERN = re.compile(
+    TOKEN_PATTERN.pattern.encode('ascii'),
+    TOKEN_PATTERN.flags & ~re.UNICODE
+)
+
+# shared text of the tokens that are always spelled the same way
+SYMBOL_TEXTS = {ord(symbol): symbol for symbol in symbols}
+KEYWORD_TEXTS = {keyword.encode('ascii'): keyword for keyword in keywords}
+
+
+class Token:
+    """A single token of the Jack source code, classified once when lexed.
+
+    Properties:
+        type: TokenType of the token
+        value: decoded value of the token, as returned by Tokenizer.get_token()
+        text: the token exactly as it appears in the source
+        offset: offset of the first character of the token in the source
+    """
+
+    __slots__ = ('type', 'value', 'text', 'offset')
+
+    def __init__(self, token_type, value, text, offset):
+        self.type = token_type
+        self.value = value
+        self.text = text
+        self.offset = offset
+
+    def __repr__(self):
+        return f'Token({self.type}, {self.text!r}, {self.offset})'
+
+
+class SliceToken:
+    """A single token of a Jack source held in a bytes-like buffer.
+
+    The token is stored as the slice of the buffer it spans, and its text
+    is only decoded the first time it is asked for. Symbols and keywords
+    share a single copy of their text from the start.
+
+    Properties:
+        type: TokenType of the token
+        offset: offset (in bytes) of the first byte of the token in the buffer
+        end: offset (in bytes) just past the last byte of the token
+        buffer: memoryview of the whole source
+        text: the token exactly as it appears in the source
+        value: decoded value of the token, as returned by Tokenizer.get_token()
+    """
+
+    __slots__ = ('type', 'offset', 'end', 'buffer', '_text')
+
+    def __init__(self, token_type, offset, end, buffer, text=None):
+        self.type = token_type
+        self.offset = offset
+        self.end = end
+        self.buffer = buffer
+        self._text = text
+
+    def __repr__(self):
+        return f'SliceToken({self.type}, {self.offset}, {self.end})'
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = str(self.buffer[self.offset:self.end], 'utf-8')
+        return self._text
+
+    @property
+    def value(self):
+        if self.type == TokenType.KEYWORD:
+            return keywords[self.text]
+        if self.type == TokenType.STRING_CONST:
+            return self.text[1:-1]
+        return self.text
+
+
+class Edit:
+    """A change to a Jack source: the characters from offset start up to
+    (but not including) offset end are replaced with text.
+    """
+
+    __slots__ = ('start', 'end', 'text')
+
+    def __init__(self, start, end, text):
+        self.start = start
+        self.end = end
+        self.text = text
+
+    def __repr__(self):
+        return f'Edit({self.start}, {self.end}, {self.text!r})'
+
+
+def read_source(source):
+    """Return the Jack source code from a file name or a readable text stream"""
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as file:
+            return file.read()
+    return source.read()
+
+
+def read_buffer(source):
+    """Return a bytes-like buffer holding the UTF-8 encoded Jack source code
+    from a file name (which is memory mapped) or a readable binary stream
+    """
+    if not isinstance(source, str):
+        return source.read()
+
+    with open(source, 'rb') as file:
+        if not os.fstat(file.fileno()).st_size:
+            return b''  # empty files cannot be mapped
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def scan(source, position=0, names=None, errors=False):
+    """Generate the tokens of the given Jack source code, in order,
+    starting from the given offset (which must not be inside a token or comment).
+    If a name table is given, identifiers are interned in it. If errors is
+    true, a character that cannot start any token, or an unterminated string
+    constant up to the end of its line, is generated as an ERROR token
+    instead of ending the program.
+    """
+    end = len(source)
+
+    while match := TOKEN_PATTERN.match(source, position):
+        position = match.end()
+        token_type = match.lastgroup
+
+        if token_type is None:
+            # the pattern only stops short of the end of input at a character
+            # that cannot start any token
+            if position >= end:
+                return
+            if not errors:
+                print(f'Invalid character: {source[position]!r}')
+                sys.exit(1)
+
+            error_end = position + 1
+            if source[position] == '"':
+                error_end = source.find('\n', position)
+                if error_end < 0:
+                    error_end = end
+            text = source[position:error_end]
+            yield Token(TokenType.ERROR, text, text, position)
+            position = error_end
+            continue
+
+        offset = match.start(token_type)
+        text = match.group(token_type)
+        value = text
+        if token_type == TokenType.IDENTIFIER:
+            if text in keywords:
+                token_type = TokenType.KEYWORD
+                value = keywords[text]
+            elif names is not None:
+                text = value = names.intern(text)
+        elif token_type == TokenType.STRING_CONST:
+            value = text[1:-1]
+
+        yield Token(token_type, value, text, offset)
+
+
+def scan_buffer(buffer, position=0):
+    """Generate the tokens of the Jack source code held in a bytes-like
+    buffer, in order, as slices of that buffer. Scanning starts from the
+    given offset (which must not be inside a token or comment).
+    """
+    view = memoryview(buffer)
+    end = len(view)
+
+    while match := BYTES_TOKEN_PATTERN.match(view, position):
+        position = match.end()
+        token_type = match.lastgroup
+
+        if token_type is None:
+            if position < end:
+                print(f'Invalid character: {bytes(view[position:position + 1])!r}')
+                sys.exit(1)
+            return
+
+        offset = match.start(token_type)
+        text = None
+        if token_type == TokenType.SYMBOL:
+            text = SYMBOL_TEXTS[view[offset]]
+        elif token_type == TokenType.IDENTIFIER:
+            text = KEYWORD_TEXTS.get(view[offset:position])
+            if text:
+                token_type = TokenType.KEYWORD
+
+        yield SliceToken(token_type, offset, position, view, text)
+
+
 class Tokenizer:
     """Tokenizer class of Jack compiler.
-    
+
     Handles the parsing of input stream/file into tokens:
 
     Ignores all comments and white space in the input steam
     and enables accessing the input one token at a time.
     Also parses and provides the type of each token.
 
+    The source is read once, front to back, so any readable stream
+    (including pipes) can be tokenized. Tokens are produced lazily by scan(),
+    and up to `lookahead` tokens past the current one are buffered so that
+    the parser can peek at them.
+
+    In binary mode the source is scanned as raw bytes (memory mapped when
+    read from a file) by scan_buffer(), and the text of a token is only
+    decoded once it is asked for. Otherwise, identifiers can be interned
+    in a name table shared by the whole compilation.
+
     Properties:
-        file: file object containing the Jack source code
+        tokens: generator of the remaining tokens in the source
+        buffer: ring buffer of tokens read ahead of the current token
+        lookahead: maximum number of tokens that can be peeked at
+        token: Token record of the current token (None before the first
+            advance, and after the end of input)
         current_token: the Jack token currenly being processed
 
     Methods:
+        from_tokens(iterable) -> Tokenizer
         advance() -> bool
-        token_type() -> strz
+        peek(int) -> Token
+        token_type() -> str
         get_token() -> str
     """
 
-    def __init__(self, filename):
-        self.file = open(filename, encoding='utf-8')
-        self.current_token = ''
+    def __init__(self, source, lookahead=2, binary=False, names=None):
+        # source may be either the name of a file or a readable stream
+        if binary:
+            self.tokens = scan_buffer(read_buffer(source))
+        else:
+            self.tokens = scan(read_source(source), names=names)
+        self.buffer = deque(maxlen=lookahead)
+        self.lookahead = lookahead
+        self.token = None
+
+    @property
+    def current_token(self):
+        """Text of the current token ('' if there is none)"""
+        return self.token.text if self.token else ''
 
-    def __del__(self):
-        self.file.close()
+    @classmethod
+    def from_tokens(cls, tokens, lookahead=2):
+        """Create a tokenizer over already lexed tokens"""
+        tokenizer = cls(io.StringIO(), lookahead)
+        tokenizer.tokens = iter(tokens)
+        return tokenizer
 
     def advance(self):
         """Get the next token from the input, and make it the current token.
         Return True if a token was found, False otherwise.
         """
-        self.current_token = ''
-
-        while char := self.file.read(1):
-            # handle string constants
-            if self.current_token and self.current_token.startswith('"'):
-                self.current_token += char
-                if char == '"':
-                    return True
-                continue
-
-            # ignore whitespace
-            if char in (' ', '\n', '\t'):
-                if self.current_token:
-                    return True
-                continue
-
-            # look ahead next character
-            current_position = self.file.tell()
-            next_char = self.file.read(1)
-            self.file.seek(current_position)
-
-            # ignore comments
-            if f'{char}{next_char}'  in ('//', '/*'):
-                if self.current_token:
-                    return True
-                if f'{char}{next_char}' == '/*':
-                    while char:= self.file.read(1):
-                        if char == '*':
-                            if self.file.read(1) == '/':
-                                break;
-                else:
-                    self.file.readline()
-                continue
-
-            # check for symbols
-            if char in symbols:
-                self.current_token = char
-                return True
-            elif next_char in symbols:
-                self.current_token += char
-                return True
-
-            self.current_token += char
-
-        return False
+        if self.buffer:
+            self.token = self.buffer.popleft()
+        else:
+            self.token = next(self.tokens, None)
+
+        return self.token is not None
+
+    def peek(self, n=1):
+        """Return the token n positions after the current token,
+        without advancing. Return None if the input ends before it.
+        """
+        if not 0 < n <= self.lookahead:
+            raise ValueError(f'can only peek 1 to {self.lookahead} tokens ahead')
+
+        while len(self.buffer) < n:
+            token = next(self.tokens, None)
+            if token is None:
+                return None
+            self.buffer.append(token)
+
+        return self.buffer[n - 1]
 
     def token_type(self):
         """Return the type of the current token."""
-        if self.current_token.startswith('"'):
-            return TokenType.STRING_CONST
-        if self.current_token in keywords:
-            return TokenType.KEYWORD
-        if self.current_token in symbols:
-            return TokenType.SYMBOL
-        if self.current_token[0].isdigit():
-            return TokenType.INT_CONST
-        return TokenType.IDENTIFIER
+        return self.token.type
 
     def get_token(self):
         """Return the current token."""
-        if self.token_type() == TokenType.STRING_CONST:
-            return self.current_token.strip('"')
-        if self.token_type() == TokenType.KEYWORD:
-            return keywords[self.current_token]
-        return self.current_token
+        return self.token.value
+
+
+class IncrementalTokenizer(Tokenizer):
+    """Tokenizer that keeps the token table of the whole source, so that
+    after an edit only the damaged region has to be lexed again.
+
+    Re-lexing starts right after the last token that ends before the edit,
+    and stops as soon as a new token lines up with an old token that comes
+    after the edited text. From that point on the source is unchanged, so
+    the rest of the table is reused with shifted offsets. An edit that opens
+    or closes a block comment or a string constant simply extends the
+    damaged region up to the point where the two token streams meet again.
+    Text that cannot be lexed, such as an invalid character or a string
+    constant not yet terminated, is kept in the table as ERROR tokens, so
+    that the edit fixing it is re-lexed like any other.
+
+    This is an API for tools that keep a source open across edits, such as
+    editors; the analyzers and the compiler read each file once, and use
+    the Tokenizer.
+
+    Properties:
+        source: the current Jack source code
+        table: Token records of the whole source, ordered by offset
+        line_starts: offset of the first character of each line
+
+    Methods:
+        reset() -> None
+        update(Edit) -> range
+        offset_of(int, int) -> int
+        line_of(int) -> int
+        token_index(int) -> int
+    """
+
+    def __init__(self, source, lookahead=2):
+        self.source = read_source(source)
+        self.table = list(scan(self.source, errors=True))
+        self.line_starts = [0] + [match.end() for match in re.finditer('\n', self.source)]
+        self.lookahead = lookahead
+        self.reset()
+
+    def reset(self):
+        """Restart reading tokens from the beginning of the table"""
+        self.tokens = iter(self.table)
+        self.buffer = deque(maxlen=self.lookahead)
+        self.token = None
+
+    def update(self, edit):
+        """Apply an edit to the source and bring the token table up to date.
+        Return the range of table indexes holding the re-lexed tokens.
+        The tokenizer is rewound to the beginning of the source.
+        """
+        source = self.source[:edit.start] + edit.text + self.source[edit.end:]
+        delta = len(edit.text) - (edit.end - edit.start)
+        edit_end = edit.start + len(edit.text)  # end of the edit in the new source
+        table = self.table
+
+        # the first damaged token is the first one that does not end strictly
+        # before the edit, since the edit may extend the token it touches
+        first = bisect_left(table, edit.start, key=_token_end)
+        restart = _token_end(table[first - 1]) if first else 0
+
+        # re-lex until a new token starts where an old token after the edit starts
+        old = first
+        relexed = []
+        for token in scan(source, restart, errors=True):
+            if token.offset >= edit_end:
+                while old < len(table) and table[old].offset + delta < token.offset:
+                    old += 1
+                if old < len(table) and table[old].offset + delta == token.offset:
+                    break
+            relexed.append(token)
+        else:
+            old = len(table)
+
+        for token in table[old:]:
+            token.offset += delta
+        table[first:old] = relexed
+
+        self._update_line_starts(edit, delta)
+        self.source = source
+        self.reset()
+
+        return range(first, first + len(relexed))
+
+    def offset_of(self, line, column):
+        """Return the source offset of a (zero-based) line and column"""
+        return self.line_starts[line] + column
+
+    def line_of(self, offset):
+        """Return the (zero-based) line containing the given source offset"""
+        return bisect_right(self.line_starts, offset) - 1
+
+    def token_index(self, offset):
+        """Return the index in the table of the first token ending after the offset"""
+        return bisect_right(self.table, offset, key=_token_end)
+
+    def _update_line_starts(self, edit, delta):
+        # line starts up to the edit are kept, those inside the replaced text
+        # are recomputed, and the ones after it are shifted
+        line_starts = self.line_starts
+        first = bisect_right(line_starts, edit.start)
+        last = bisect_right(line_starts, edit.end)
+        line_starts[first:last] = [
+            edit.start + match.end() for match in re.finditer('\n', edit.text)
+        ]
+        for line in range(first + edit.text.count('\n'), len(line_starts)):
+            line_starts[line] += delta
+
+
+def _token_end(token):
+    return token.offset + len(token.text)
@@ -23,6 +23,7 @@ class VmWriter:
         write_call(str, int) -> None
         write_call(str, int) -> None
         write_return() -> None
+        write_instruction(tuple) -> None
         close() -> None
     """
 
@@ -65,6 +66,10 @@ class VmWriter:
         """Write a VM return command"""
         self.output.write('return\n')
 
+    def write_instruction(self, instruction):
+        """Write a VM command given as an instruction (see InstructionBuffer)"""
+        self.output.write(' '.join(map(str, instruction)) + '\n')
+
     def close(self):
         """Close the output file"""
         self.output.close()
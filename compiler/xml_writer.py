@@ -0,0 +1,291 @@
+"""XML writer module of the compiler
+
+Classes:
+    XmlWriter
+"""
+
+from functools import partial
+
+from constants import TerminalElement
+from syntax_tree import BinaryOp, NodeVisitor
+
+
+TYPE_KEYWORDS = ('int', 'char', 'boolean', 'void')
+ESCAPED_SYMBOLS = {'<': '&lt;', '>': '&gt;', '&': '&amp;'}
+
+
+class XmlWriter(NodeVisitor):
+    """XmlWriter class of the Jack compiler.
+
+    Walks the syntax tree of a class built by the CompilationEngine,
+    and writes the structured representation of the source code
+    wrapped in XML tags, as emitted by the syntax analyzer.
+
+    The parentheses around expressions and the spelling of integer
+    constants are kept in the tree, so the XML follows the source. Trees
+    changed by other passes are written with the parentheses their
+    structure needs.
+
+    Identifiers are written by _identifier, along with what they name
+    (a class, a subroutine or nothing yet known for variables) and whether
+    they are declared or used there, which subclasses can report.
+
+    Properties:
+        output: file object of the output
+
+    Methods:
+        write(ClassDec) -> None
+        close() -> None
+    """
+
+    def __init__(self, filename):
+        self.output = open(filename, 'w')
+
+    def write(self, tree):
+        """Write the XML representation of a class"""
+        self.visit(tree)
+
+    def close(self):
+        """Close the output file"""
+        self.output.close()
+
+    def _open(self, tag):
+        self.output.write(f'<{tag}>\n')
+
+    def _close(self, tag):
+        self.output.write(f'</{tag}>\n')
+
+    def _terminal(self, element, text):
+        self.output.write(f'<{element}> {text} </{element}>\n')
+
+    def _keyword(self, text):
+        self._terminal(TerminalElement.KEYWORD, text)
+
+    def _symbol(self, text):
+        self._terminal(TerminalElement.SYMBOL, ESCAPED_SYMBOLS.get(text, text))
+
+    def _identifier(self, text, category=None, declared=False):
+        self._terminal(TerminalElement.IDENTIFIER, text)
+
+    def _type(self, text):
+        if text in TYPE_KEYWORDS:
+            self._keyword(text)
+        else:
+            self._identifier(text)
+
+    def _names(self, names):
+        self._identifier(names[0], declared=True)
+        for name in names[1:]:
+            self._symbol(',')
+            self._identifier(name, declared=True)
+
+    def visit_ClassDec(self, node):
+        self._open('class')
+        self._keyword('class')
+        self._identifier(node.name, 'class', True)
+        self._symbol('{')
+        for class_var_dec in node.class_var_decs:
+            self.visit(class_var_dec)
+        for subroutine in node.subroutines:
+            self.visit(subroutine)
+        self._symbol('}')
+        self._close('class')
+
+    def visit_ClassVarDec(self, node):
+        self._open('classVarDec')
+        self._keyword(node.kind)
+        self._type(node.type)
+        self._names(node.names)
+        self._symbol(';')
+        self._close('classVarDec')
+
+    def visit_SubroutineDec(self, node):
+        self._open('subroutineDec')
+        self._keyword(node.kind)
+        self._type(node.return_type)
+        self._identifier(node.name, 'subroutine', True)
+        self._symbol('(')
+
+        self._open('parameterList')
+        for i, parameter in enumerate(node.parameters):
+            if i:
+                self._symbol(',')
+            self.visit(parameter)
+        self._close('parameterList')
+
+        self._symbol(')')
+        self._open('subroutineBody')
+        self._symbol('{')
+        for var_dec in node.var_decs:
+            self.visit(var_dec)
+        self._statements(node.statements)
+        self._symbol('}')
+        self._close('subroutineBody')
+        self._close('subroutineDec')
+
+    def visit_Parameter(self, node):
+        self._type(node.type)
+        self._identifier(node.name, declared=True)
+
+    def visit_VarDec(self, node):
+        self._open('varDec')
+        self._keyword('var')
+        self._type(node.type)
+        self._names(node.names)
+        self._symbol(';')
+        self._close('varDec')
+
+    def _statements(self, statements):
+        self._open('statements')
+        for statement in statements:
+            self.visit(statement)
+        self._close('statements')
+
+    def _block(self, statements):
+        self._symbol('{')
+        self._statements(statements)
+        self._symbol('}')
+
+    def visit_LetStatement(self, node):
+        self._open('letStatement')
+        self._keyword('let')
+        self._identifier(node.name)
+        if node.index is not None:
+            self._symbol('[')
+            self._write_nested(partial(self._expression, node.index))
+            self._symbol(']')
+        self._symbol('=')
+        self._write_nested(partial(self._expression, node.value))
+        self._symbol(';')
+        self._close('letStatement')
+
+    def visit_IfStatement(self, node):
+        self._open('ifStatement')
+        self._keyword('if')
+        self._symbol('(')
+        self._write_nested(partial(self._expression, node.condition))
+        self._symbol(')')
+        self._block(node.statements)
+        if node.else_statements is not None:
+            self._keyword('else')
+            self._block(node.else_statements)
+        self._close('ifStatement')
+
+    def visit_WhileStatement(self, node):
+        self._open('whileStatement')
+        self._keyword('while')
+        self._symbol('(')
+        self._write_nested(partial(self._expression, node.condition))
+        self._symbol(')')
+        self._block(node.statements)
+        self._close('whileStatement')
+
+    def visit_DoStatement(self, node):
+        self._open('doStatement')
+        self._keyword('do')
+        self._write_nested(partial(self._subroutine_call, node.call))
+        self._symbol(';')
+        self._close('doStatement')
+
+    def visit_ReturnStatement(self, node):
+        self._open('returnStatement')
+        self._keyword('return')
+        if node.value is not None:
+            self._write_nested(partial(self._expression, node.value))
+        self._symbol(';')
+        self._close('returnStatement')
+
+    def _write_nested(self, item):
+        """Write an expression or subroutine call.
+
+        Writing a part of an expression returns the writes of its nested
+        parts, in order, which are then processed with an explicit stack
+        instead of recursion, so the depth of an expression is not limited
+        by the recursion limit.
+        """
+        stack = [item]
+        while stack:
+            items = stack.pop()()
+            if items:
+                stack.extend(reversed(items))
+
+    def _expression(self, node, parens=None):
+        """Write an expression, whose node has the given number of
+        parentheses around it still to be written (all of them if None)
+        """
+        if parens is None:
+            parens = getattr(node, 'parens', 0)
+
+        # (op term)* is left associative, so the chain is the left spine
+        # of the tree, up to a parenthesized operation
+        operations = []
+        while isinstance(node, BinaryOp) and not parens:
+            operations.append((node.op, node.right))
+            node = node.left
+            parens = getattr(node, 'parens', 0)
+
+        self._open('expression')
+        items = [partial(self._term, node, parens)]
+        for op, term in reversed(operations):
+            items.append(partial(self._symbol, op))
+            items.append(partial(self._term, term))
+        items.append(partial(self._close, 'expression'))
+        return items
+
+    def _term(self, node, parens=None):
+        """Write a term, whose node has the given number of parentheses
+        around it still to be written (all of them if None)
+        """
+        if parens is None:
+            parens = getattr(node, 'parens', 0)
+
+        self._open('term')
+        if parens or isinstance(node, BinaryOp):  # '('expression')'
+            self._symbol('(')
+            items = [partial(self._expression, node, max(parens - 1, 0)),
+                     partial(self._symbol, ')')]
+        else:
+            items = [partial(self.visit, node)]
+        items.append(partial(self._close, 'term'))
+        return items
+
+    def visit_IntegerConstant(self, node):
+        self._terminal(TerminalElement.INT_CONST, node.value if node.text is None else node.text)
+
+    def visit_StringConstant(self, node):
+        self._terminal(TerminalElement.STRING_CONST, node.value)
+
+    def visit_KeywordConstant(self, node):
+        self._keyword(node.value)
+
+    def visit_Variable(self, node):
+        self._identifier(node.name)
+
+    def visit_ArrayAccess(self, node):
+        self._identifier(node.name)
+        self._symbol('[')
+        return [partial(self._expression, node.index), partial(self._symbol, ']')]
+
+    def visit_SubroutineCall(self, node):
+        return self._subroutine_call(node)
+
+    def visit_UnaryOp(self, node):
+        self._symbol(node.op)
+        return [partial(self._term, node.operand)]
+
+    def _subroutine_call(self, node):
+        if node.receiver is not None:
+            self._identifier(node.receiver)
+            self._symbol('.')
+        self._identifier(node.name)
+        self._symbol('(')
+        self._open('expressionList')
+
+        items = []
+        for i, argument in enumerate(node.arguments):
+            if i:
+                items.append(partial(self._symbol, ','))
+            items.append(partial(self._expression, argument))
+        items.append(partial(self._close, 'expressionList'))
+        items.append(partial(self._symbol, ')'))
+        return items
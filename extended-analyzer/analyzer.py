@@ -5,7 +5,7 @@ import sys
 
 from tokenizer import Tokenizer
 from compilation_engine import CompilationEngine
-from symbol_table import SymbolTable
+from symbol_xml_writer import SymbolXmlWriter
 
 
 SOURCE_EXT = 'jack'
@@ -44,10 +44,12 @@ def main():
         # create tokenizer instance for each source file
         tokenizer = Tokenizer(source_file)
 
-        # compile tokens
+        # parse the class, and write its tree
         if tokenizer.advance():
-            compilation_engine = CompilationEngine(tokenizer, f'{filename}.{TARGET_EXT}')
-            compilation_engine.compile_class()
+            tree = CompilationEngine(tokenizer).compile_class()
+            xml_writer = SymbolXmlWriter(f'{filename}.{TARGET_EXT}')
+            xml_writer.write(tree)
+            xml_writer.close()
 
 
 def _parse_filename(file):
@@ -6,406 +6,435 @@ Classes:
 
 import sys
 
-from constants import TerminalElement, TokenType
-from enums.symbol_table_field import SymbolTableField
-from enums.variable_kind import VariableKind
-from symbol_table import SymbolTable
+from constants import TokenType
+from syntax_tree import (
+    ArrayAccess,
+    BinaryOp,
+    ClassDec,
+    ClassVarDec,
+    DoStatement,
+    IfStatement,
+    IntegerConstant,
+    KeywordConstant,
+    LetStatement,
+    Parameter,
+    ReturnStatement,
+    StringConstant,
+    SubroutineCall,
+    SubroutineDec,
+    UnaryOp,
+    VarDec,
+    Variable,
+    WhileStatement,
+)
+
+
+BINARY_OPS = frozenset(('+', '-', '*', '/', '&', '|', '<', '>', '='))
+UNARY_OPS = frozenset(('-', '~'))
+KEYWORD_CONSTANTS = frozenset(('true', 'false', 'null', 'this'))
+
+# node of a constant term, by token type
+CONSTANT_NODES = {
+    TokenType.INT_CONST: lambda token: IntegerConstant(int(token.text), token.text),
+    TokenType.STRING_CONST: lambda token: StringConstant(token.value),
+    TokenType.KEYWORD: lambda token: KeywordConstant(token.text),
+}
+
+# kinds of the frames on the stack used for parsing nested expressions
+EXPRESSION, TERM, UNARY, PARENTHESES, ARRAY_INDEX, ARGUMENTS = range(6)
 
 
 class CompilationEngine:
     """CompilationEngine class of the Jack compiler.
 
-    Emits a structured representation of the input source code
-    wrapped in XML tags.
+    Parses the input source code into a syntax tree (see syntax_tree),
+    which is then handed to the code generator or any other pass.
 
-    Gets input from a Tokenizer and emits output to a file.
-    Output is generated by a series of compile_xxx functions, each designed to
+    Gets input from a Tokenizer and returns the nodes of the tree.
+    The tree is built by a series of compile_xxx functions, each designed to
     handle the compilation of a specific Jack langugage construct xxx.
     Each compile_xxx function should get from the input, and handle,
     all the tokens that make up xxx, advance the Tokenizer exactly beyond these
-    tokens, and output the parsing of xxx.
+    tokens, and return the node (or list of nodes) representing xxx.
 
     Properties:
         input: input stream of tokens
-        output: file object of the output
-        symbol_tables: class level and subroutine level symbol tables
+        statement_compilers: compile_xxx function of each statement, by its keyword
 
     Methods:
-        compile_class() -> None
-        compile_class_var_dec() -> None
-        compile_subroutine() -> None
-        compile_parameter_list() -> None
-        compile_subroutine_body() -> None
-        compile_var_dec() -> None
-        compile_statements() -> None
-        compile_let() -> None
-        compile_if() -> None
-        compile_while() -> None
-        compile_do() -> None
-        compile_return() -> None
-        compile_expression_list() -> int
+        compile_class() -> ClassDec
+        compile_class_var_dec() -> ClassVarDec
+        compile_subroutine() -> SubroutineDec
+        compile_parameter_list() -> list of Parameter
+        compile_subroutine_body() -> (list of VarDec, list of statements)
+        compile_var_dec() -> VarDec
+        compile_statements() -> list of statements
+        compile_let() -> LetStatement
+        compile_if() -> IfStatement
+        compile_while() -> WhileStatement
+        compile_do() -> DoStatement
+        compile_return() -> ReturnStatement
+        compile_expression() -> expression node
+        compile_term() -> expression node
+        compile_expression_list() -> list of expression nodes
     """
 
-    def __init__(self, tokenizer, filename):
+    def __init__(self, tokenizer):
         self.input = tokenizer
-        self.symbol_tables = {'class': SymbolTable(), 'subroutine': SymbolTable()}
-        self.output = open(filename, 'w')
-
-    def __del__(self):
-        self.output.close()
-
-    def _eat(self, token, identifier_category=None, declaration=False):
-        token_type = getattr(TerminalElement, self.input.token_type())
-
-        if self.input.current_token != token:
-            print(f'Invalid token: {token} is not {self.input.current_token}.')
-            sys.exit(1)
-
-        if self.input.token_type() == TokenType.STRING_CONST:
-            token = token.strip('"')
-        elif token == '<':
-            token = '&lt;'
-        elif token == '>':
-            token = '&gt;'
-        elif token == '&':
-            token = '&amp;'
-
-        if token_type == TerminalElement.IDENTIFIER:
-            self.output.write('<identifier>\n')
-            self.output.write(f'<name> {token} </name>\n')
-
-            if identifier_category in ('class', 'subroutine'):
-                self.output.write(f'<category> {identifier_category} </category>\n')
-            else:
-                # check which symbol table contains the variable
-                if self.symbol_tables['subroutine'].index_of(token) >= 0:
-                    level = 'subroutine'
-                elif self.symbol_tables['class'].index_of(token) >= 0:
-                    level = 'class'
-                else:
-                    level = None
-
-                if level:
-                    kind = self.symbol_tables[level].kind_of(token).name.lower()
-                    self.output.write(f'<category> {kind} </category>\n')
-                    self.output.write(
-                        f'<index> {self.symbol_tables[level].index_of(token)} </index>\n'
-                    )
-
-            self.output.write(f'<usage> {"declared" if declaration else "used" } </usage>\n')
-            self.output.write('</identifier>\n')
-        else:
-            self.output.write(f'<{token_type}> {token} </{token_type}>\n')
 
+    def _eat(self, token):
+        # advance over a token the grammar expects, e.g. a keyword or a symbol;
+        # names and constants, which are taken as they are, are simply advanced over
+        current = self.input.token
+        if current is None or current.text != token:
+            self._invalid(token)
         self.input.advance()
 
+    def _invalid(self, expected):
+        # report that the current token is not what the grammar expects
+        print(f'Invalid token: {expected} is not {self.input.current_token}.')
+        sys.exit(1)
+
     def compile_class(self):
         """Compile a complete class"""
-        self.output.write('<class>\n')
-
         self._eat('class')
-        self._eat(
-            self.input.current_token,
-            identifier_category='class',
-            declaration=True
-        )  # className
+        classname = self.input.current_token
+        self.input.advance()  # className
         self._eat('{')
 
+        class_var_decs = []
         while self.input.current_token in ('static', 'field'):
-            self.compile_class_var_dec()
+            class_var_decs.append(self.compile_class_var_dec())
+        subroutines = []
         while self.input.current_token in ('constructor', 'function', 'method'):
-            self.compile_subroutine()
+            subroutines.append(self.compile_subroutine())
 
         self._eat('}')
-
-        self.output.write('</class>\n')
+        return ClassDec(classname, class_var_decs, subroutines)
 
     def compile_class_var_dec(self):
         """Compile a static or field variable declaration"""
-        self.output.write('<classVarDec>\n')
-
-        # data for populating the symbol table
-        var_props = {}
-
-        # variable kind
-        if self.input.current_token == 'static':
-            var_props[SymbolTableField.KIND] = VariableKind.STATIC
-        else:
-            var_props[SymbolTableField.KIND] = VariableKind.FIELD
-        self._eat(self.input.current_token)  # 'static'|'field'
-
-        # variable type
-        var_props[SymbolTableField.TYPE] = self.input.current_token
-        self._eat(self.input.current_token)  # type
-
-        # variable name
-        self.symbol_tables["class"].define(
-            self.input.current_token,
-            var_props[SymbolTableField.TYPE],
-            var_props[SymbolTableField.KIND]
-        )  # populate symbol table
-        self._eat(self.input.current_token, declaration=True)  # varName
+        kind = self.input.current_token
+        self.input.advance()  # 'static'|'field'
+        var_type = self.input.current_token
+        self.input.advance()  # type
+        names = [self.input.current_token]
+        self.input.advance()  # varName
 
         # if a comma is present, that means there are more variables
         while self.input.current_token == ',':
             self._eat(',')
-            self.symbol_tables["class"].define(
-                self.input.current_token,
-                var_props[SymbolTableField.TYPE],
-                var_props[SymbolTableField.KIND]
-            )  # populate symbol table
-            self._eat(self.input.current_token, declaration=True)  # varName
+            names.append(self.input.current_token)
+            self.input.advance()  # varName
 
         self._eat(';')
-
-        self.output.write('</classVarDec>\n')
+        return ClassVarDec(kind, var_type, names)
 
     def compile_subroutine(self):
         """Compile a complete method, function, or constructor"""
-        self.output.write('<subroutineDec>\n')
-
-        # reset subroutine level symbol table
-        self.symbol_tables['subroutine'].reset()
-
-        self._eat(self.input.current_token)  # 'constructor'|'function'|'method'
-        self._eat(self.input.current_token)  # 'void'|type
-        self._eat(
-            self.input.current_token,
-            identifier_category='subroutine',
-            declaration=True
-        )  # subroutineName
+        kind = self.input.current_token
+        self.input.advance()  # 'constructor'|'function'|'method'
+        return_type = self.input.current_token
+        self.input.advance()  # 'void'|type
+        name = self.input.current_token
+        self.input.advance()  # subroutineName
         self._eat('(')
-        self.compile_parameter_list()
+        parameters = self.compile_parameter_list()
         self._eat(')')
-        self.compile_subroutine_body()
+        var_decs, statements = self.compile_subroutine_body()
 
-        self.output.write('</subroutineDec>\n')
+        return SubroutineDec(kind, return_type, name, parameters, var_decs, statements)
 
     def compile_parameter_list(self):
         """Compile a (possibly empty) parameter list"""
-        self.output.write('<parameterList>\n')
+        parameters = []
 
         if self.input.current_token != ')':
             arg_type = self.input.current_token
-            self._eat(self.input.current_token)  # type
-            self.symbol_tables['subroutine'].define(
-                self.input.current_token,
-                arg_type,
-                VariableKind.ARG
-            )  # populate symbol table
-            self._eat(self.input.current_token, declaration=True)  # varName
+            self.input.advance()  # type
+            parameters.append(Parameter(arg_type, self.input.current_token))
+            self.input.advance()  # varName
 
             # the presence of a comma means that there are more parameters
             while self.input.current_token == ',':
                 self._eat(',')
                 arg_type = self.input.current_token
-                self._eat(self.input.current_token)  # type
-                self.symbol_tables['subroutine'].define(
-                    self.input.current_token,
-                    arg_type,
-                    VariableKind.ARG
-                )  # populate symbol table
-                self._eat(self.input.current_token, declaration=True)  # varName
+                self.input.advance()  # type
+                parameters.append(Parameter(arg_type, self.input.current_token))
+                self.input.advance()  # varName
 
-        self.output.write('</parameterList>\n')
+        return parameters
 
     def compile_subroutine_body(self):
         """Compile a subroutine's body"""
-        self.output.write('<subroutineBody>\n')
-
         self._eat('{')
+        var_decs = []
         while self.input.current_token == 'var':
-            self.compile_var_dec()
-        self.compile_statements()
+            var_decs.append(self.compile_var_dec())
+        statements = self.compile_statements()
         self._eat('}')
 
-        self.output.write('</subroutineBody>\n')
+        return var_decs, statements
 
     def compile_var_dec(self):
         """Compile a variable declaration"""
-        self.output.write('<varDec>\n')
-
         self._eat('var')
         var_type = self.input.current_token
-        self._eat(self.input.current_token)  # type
-        self.symbol_tables['subroutine'].define(
-            self.input.current_token,
-            var_type,
-            VariableKind.VAR
-        )  # populate symbol table
-        self._eat(self.input.current_token, declaration=True)  # varName
+        self.input.advance()  # type
+        names = [self.input.current_token]
+        self.input.advance()  # varName
 
         # check for and compile more variable names
         while self.input.current_token == ',':
             self._eat(',')
-            self.symbol_tables['subroutine'].define(
-                self.input.current_token,
-                var_type,
-                VariableKind.VAR
-            )  # populate symbol table
-            self._eat(self.input.current_token, declaration=True)  # varName
+            names.append(self.input.current_token)
+            self.input.advance()  # varName
 
         self._eat(';')
-
-        self.output.write('</varDec>\n')
+        return VarDec(var_type, names)
 
     def compile_statements(self):
         """Compile a sequence of statements"""
-        self.output.write('<statements>\n')
+        statements = []
 
         while self.input.current_token != '}':
-            if self.input.current_token == 'let':
-                self.compile_let()
-            elif self.input.current_token == 'if':
-                self.compile_if()
-            elif self.input.current_token == 'while':
-                self.compile_while()
-            elif self.input.current_token == 'do':
-                self.compile_do()
-            elif self.input.current_token == 'return':
-                self.compile_return()
-
-        self.output.write('</statements>\n')
+            compile_statement = self.statement_compilers.get(self.input.current_token)
+            if compile_statement is None:
+                print(f'Invalid statement: {self.input.current_token}')
+                sys.exit(1)
+            statements.append(compile_statement(self))
+
+        return statements
 
     def compile_let(self):
         """Compile a let statement"""
-        self.output.write('<letStatement>\n')
-
         self._eat('let')
-        self._eat(self.input.current_token)  # varName
-        
+        variable = self.input.current_token
+        self.input.advance()  # varName
+
+        # check if array element assignment or variable assignment
+        index = None
         if self.input.current_token == '[':  # varName'['expression']'
             self._eat('[')
-            self.compile_expression()
+            index = self.compile_expression()
             self._eat(']')
 
         self._eat('=')
-        self.compile_expression()
+        value = self.compile_expression()
         self._eat(';')
 
-        self.output.write('</letStatement>\n')
+        return LetStatement(variable, index, value)
 
     def compile_if(self):
         """Compile an if statement, possibly with a trailing else clause"""
-        self.output.write('<ifStatement>\n')
-
         self._eat('if')
         self._eat('(')
-        self.compile_expression()
+        condition = self.compile_expression()
         self._eat(')')
         self._eat('{')
-        self.compile_statements()
+        statements = self.compile_statements()
         self._eat('}')
 
         # handle optional else clause
+        else_statements = None
         if self.input.current_token == 'else':
             self._eat('else')
             self._eat('{')
-            self.compile_statements()
+            else_statements = self.compile_statements()
             self._eat('}')
 
-        self.output.write('</ifStatement>\n')
+        return IfStatement(condition, statements, else_statements)
 
     def compile_while(self):
         """Compile a while statement"""
-        self.output.write('<whileStatement>\n')
-
         self._eat('while')
         self._eat('(')
-        self.compile_expression()
+        condition = self.compile_expression()
         self._eat(')')
         self._eat('{')
-        self.compile_statements()
+        statements = self.compile_statements()
         self._eat('}')
 
-        self.output.write('</whileStatement>\n')
-
+        return WhileStatement(condition, statements)
 
     def compile_do(self):
         """Compile a do statement"""
-        self.output.write('<doStatement>\n')
-
         self._eat('do')
-        self._compile_subroutine_call()
+        call = self._compile_subroutine_call()
         self._eat(';')
 
-        self.output.write('</doStatement>\n')
+        return DoStatement(call)
 
     def compile_return(self):
         """Compile a return statement"""
-        self.output.write('<returnStatement>\n')
-
         self._eat('return')
+        value = None
         if self.input.current_token != ';':
-            self.compile_expression()
+            value = self.compile_expression()
         self._eat(';')
 
-        self.output.write('</returnStatement>\n')
+        return ReturnStatement(value)
 
     def compile_expression(self):
         """Compile an expression"""
-        self.output.write('<expression>\n')
-
-        self.compile_term()  # term
-        # (op term)
-        if self.input.current_token in ('+', '-', '*', '/', '&', '|', '<', '>', '='):
-            self._eat(self.input.current_token)
-            self.compile_term()
-
-        self.output.write('</expression>\n')
+        return self._compile_nested([[EXPRESSION, None, None]])
 
     def compile_term(self):
         """Compile a term"""
-        self.output.write('<term>\n')
-
-        # (unaryOp term)
-        if self.input.current_token in ('-', '~'):
-            self._eat(self.input.current_token)
-            self.compile_term()
-
-        # '('expression')'
-        elif self.input.current_token == '(':
-            self._eat('(')
-            self.compile_expression()
-            self._eat(')')
-
-        # integerConstant|stringConstant|keywordConstant|varName
-        else:
-            self._eat(self.input.current_token)
-
-            if self.input.current_token == '.':  # subroutineCall
-                self._eat('.')
-                self._compile_subroutine_call()
-            elif self.input.current_token == '[':  # varName'['expression']'
-                self._eat('[')
-                self.compile_expression()
-                self._eat(']')
-
-        self.output.write('</term>\n')
+        return self._compile_nested([(TERM,)])
 
     def compile_expression_list(self):
         """Compile an (possibly empty) comma-separated list of expressions.
-        Return the number of expressions in the list.
+        Return the list of expressions.
         """
-        self.output.write('<expressionList>\n')
+        expressions = []
 
         if self.input.current_token != ')':
-            self.compile_expression()
+            expressions.append(self.compile_expression())
         while self.input.current_token == ',':
             self._eat(',')
-            self.compile_expression()
+            expressions.append(self.compile_expression())
+
+        return expressions
 
-        self.output.write('</expressionList>\n')
+    def _compile_nested(self, stack):
+        """Compile the expression or term described by the bottom frame of the stack.
+
+        Instead of recursing, each construct opening a nested expression or
+        term pushes a frame, which is popped again once the nested part is
+        complete, so the depth of an expression is not limited by the
+        recursion limit.
+        """
+        while True:
+            # parse the start of a term, until a complete term is found
+            # or a nested expression or term is opened
+            token = self.input.token
+            if token is None:
+                self._invalid('term')
+
+            if token.type == TokenType.SYMBOL:
+                if token.text == '(':  # '('expression')'
+                    stack.append((PARENTHESES,))
+                    stack.append([EXPRESSION, None, None])
+                elif token.text in UNARY_OPS:  # (unaryOp term)
+                    stack.append((UNARY, token.text))
+                else:
+                    self._invalid('term')
+                self.input.advance()
+                continue
+
+            # integerConstant|stringConstant|keywordConstant
+            if token.type != TokenType.IDENTIFIER:
+                constant_node = CONSTANT_NODES.get(token.type)
+                if constant_node is None or (token.type == TokenType.KEYWORD
+                                             and token.text not in KEYWORD_CONSTANTS):
+                    self._invalid('term')
+                self.input.advance()
+                node = constant_node(token)
+
+            # subroutineCall
+            elif self._at_subroutine_call():
+                receiver, name = self._compile_subroutine_name()
+                self._eat('(')
+                if self.input.current_token != ')':
+                    stack.append((ARGUMENTS, receiver, name, []))
+                    stack.append([EXPRESSION, None, None])
+                    continue
+                self._eat(')')
+                node = SubroutineCall(receiver, name, [])
+
+            # varName|varName'['expression']'
+            else:
+                self.input.advance()
+                if self.input.current_token == '[':
+                    self._eat('[')
+                    stack.append((ARRAY_INDEX, token.text))
+                    stack.append([EXPRESSION, None, None])
+                    continue
+                node = Variable(token.text)
+
+            # a term is complete, pop the frames it completes
+            while True:
+                frame = stack[-1]
+
+                if frame[0] == UNARY:
+                    stack.pop()
+                    node = UnaryOp(frame[1], node)
+                    continue
+
+                if frame[0] == TERM:
+                    return node
+
+                # (op term), applied from left to right
+                frame[1] = node if frame[2] is None else BinaryOp(frame[2], frame[1], node)
+                op = self.input.current_token
+                if op in BINARY_OPS:
+                    frame[2] = op
+                    self.input.advance()
+                    break  # parse the next term
+
+                # the expression is complete, close the construct that opened it
+                stack.pop()
+                node = frame[1]
+                if not stack:
+                    return node
+
+                frame = stack[-1]
+                if frame[0] == PARENTHESES:
+                    self._eat(')')
+                    stack.pop()
+                    node.parens = getattr(node, 'parens', 0) + 1
+                elif frame[0] == ARRAY_INDEX:
+                    self._eat(']')
+                    stack.pop()
+                    node = ArrayAccess(frame[1], node)
+                else:  # ARGUMENTS
+                    frame[3].append(node)
+                    if self.input.current_token == ',':
+                        self._eat(',')
+                        stack.append([EXPRESSION, None, None])
+                        break  # parse the next argument
+                    self._eat(')')
+                    stack.pop()
+                    node = SubroutineCall(frame[1], frame[2], frame[3])
+
+    def _at_subroutine_call(self):
+        """Return True if the current identifier starts a subroutine call,
+        that is, if it is followed by '(' or '.'.
+        """
+        next_token = self.input.peek()
+        return next_token is not None and next_token.text in ('(', '.')
 
     def _compile_subroutine_call(self):
         """Compile a subroutine call"""
-        self._eat(self.input.current_token)
+        receiver, name = self._compile_subroutine_name()
+        self._eat('(')
+        arguments = self.compile_expression_list()
+        self._eat(')')
+
+        return SubroutineCall(receiver, name, arguments)
+
+    def _compile_subroutine_name(self):
+        """Compile the name of a called subroutine.
+        Return the receiver (None if there is none) and the subroutine name.
+        """
+        receiver = None
+        name = self.input.current_token
+        self.input.advance()  # subroutineName|className|varName
 
         if self.input.current_token == '.':
             self._eat('.')
-            self._eat(self.input.current_token)  # varName
-
-        if self.input.current_token == '(':
-            self._eat('(')
-            self.compile_expression_list()
-            self._eat(')')
+            receiver = name
+            name = self.input.current_token
+            self.input.advance()  # subroutineName
+
+        return receiver, name
+
+    # statement compiler, by the keyword starting the statement
+    statement_compilers = {
+        'let': compile_let,
+        'if': compile_if,
+        'while': compile_while,
+        'do': compile_do,
+        'return': compile_return,
+    }
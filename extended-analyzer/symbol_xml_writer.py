@@ -0,0 +1,74 @@
+"""Symbol XML writer module of the compiler
+
+Classes:
+    SymbolXmlWriter
+"""
+
+from enums.variable_kind import VariableKind
+from symbol_table import SymbolTable
+from xml_writer import XmlWriter
+
+
+class SymbolXmlWriter(XmlWriter):
+    """SymbolXmlWriter class of the Jack compiler.
+
+    Writes the same XML as the XmlWriter, except that each identifier is
+    written with what it names: its category (class, subroutine, or the
+    kind of the variable) and, for variables, its index in the symbol
+    table, along with whether it is declared or used there. Variables are
+    added to the symbol tables as their declarations are written.
+
+    Properties:
+        symbol_tables: class level and subroutine level symbol tables
+        declaring: symbol table level, type and kind of the variables
+            being declared
+
+    Methods:
+        write(ClassDec) -> None
+        close() -> None
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.symbol_tables = {'class': SymbolTable(), 'subroutine': SymbolTable()}
+        self.declaring = None
+
+    def visit_ClassVarDec(self, node):
+        kind = VariableKind.STATIC if node.kind == 'static' else VariableKind.FIELD
+        self.declaring = ('class', node.type, kind)
+        super().visit_ClassVarDec(node)
+
+    def visit_SubroutineDec(self, node):
+        self.symbol_tables['subroutine'].reset()
+        super().visit_SubroutineDec(node)
+
+    def visit_Parameter(self, node):
+        self.declaring = ('subroutine', node.type, VariableKind.ARG)
+        super().visit_Parameter(node)
+
+    def visit_VarDec(self, node):
+        self.declaring = ('subroutine', node.type, VariableKind.VAR)
+        super().visit_VarDec(node)
+
+    def _identifier(self, text, category=None, declared=False):
+        if declared and category is None:
+            level, var_type, kind = self.declaring
+            self.symbol_tables[level].define(text, var_type, kind)
+
+        self.output.write('<identifier>\n')
+        self.output.write(f'<name> {text} </name>\n')
+
+        if category is not None:
+            self.output.write(f'<category> {category} </category>\n')
+        else:
+            # check which symbol table contains the variable
+            for level in ('subroutine', 'class'):
+                index = self.symbol_tables[level].index_of(text)
+                if index >= 0:
+                    kind = self.symbol_tables[level].kind_of(text).name.lower()
+                    self.output.write(f'<category> {kind} </category>\n')
+                    self.output.write(f'<index> {index} </index>\n')
+                    break
+
+        self.output.write(f'<usage> {"declared" if declared else "used"} </usage>\n')
+        self.output.write('</identifier>\n')
@@ -0,0 +1,12 @@
+"""Tests of the Jack compiler
+
+The compiler modules import each other by their bare names, as when the
+compiler is run from its directory, so the directory is added to the path.
+"""
+
+import os
+import sys
+
+COMPILER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'compiler')
+if COMPILER_DIR not in sys.path:
+    sys.path.insert(0, COMPILER_DIR)
@@ -0,0 +1,186 @@
+"""Program generator module of the tests
+
+Classes:
+    ProgramGenerator
+"""
+
+import random
+
+CONSTANTS = (0, 1, 2, 3, 4, 7, 8, 15, 16, 31, 64, 100, 255, 256, 1000, 1024, 32767)
+DIVISORS = (1, 2, 3, 4, 5, 8, 16, 64, 1024)
+OPERATORS = ('+', '-', '*', '/', '&', '|', '<', '>', '=', '+', '-', '*')
+STRINGS = ('', 'a', 'ab', 's=', 'xyz', 'a b')
+# fewest calls each tail recursive subroutine makes of itself
+TAIL_CALLS = 40
+
+# a class with fields, methods calling each other and themselves, also as
+# tail calls on this object or on another one, and a method assigning the
+# fields of another object, which may be this one
+OBJ_CLASS = '''class Obj {
+    field int v, w;
+    constructor Obj new(int a) { let v = a; let w = a * 3; return this; }
+    constructor Obj empty() { let v = 1; let w = 2; return this; }
+    method int get() { return v + w; }
+    method void bump(int d) { let v = v + d; return; }
+    method int sum(int n) { if (n < 1) { return 0; } return get() + sum(n - 1); }
+    method int countdown(int n, int acc) {
+        var int last;
+        let acc = acc + last + v;
+        let last = n;
+        if (n < 1) { return acc; }
+        return countdown(n - 1, acc);
+    }
+    method int chain(Obj other, int n) {
+        var int seen;
+        let seen = seen + v;
+        if (n < 1) { return seen + w; }
+        return other.chain(this, n - 1);
+    }
+    method void setV(int a) { let v = a; return; }
+    method int run(Obj other) {
+        var int i, s;
+        let i = 0; let s = 0;
+        while (i < 3) { do other.setV(i); let s = s + (v + 1); let i = i + 1; }
+        return s;
+    }
+}
+'''
+
+
+class ProgramGenerator:
+    """ProgramGenerator class of the tests.
+
+    Generates random Jack programs, the same for the same seed, that end
+    and print what they compute: the Main class has a few functions calling
+    the ones before them, a function without arguments counting its calls
+    in a static, a tail recursive function, and a main function using
+    them, an array and objects of the Obj class. Divisions are only by numbers that are never
+    zero, and loops only count up to a small constant.
+
+    Properties:
+        random: random number generator
+        last_function: index of the last function the code generated may call
+
+    Methods:
+        program() -> dict
+    """
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.last_function = -1
+
+    def program(self):
+        """Return the source of each class of a new program, by class name"""
+        functions = []
+        for index in range(3):
+            self.last_function = index - 1
+            variables = ['a', 'b', 'x', 'y']
+            body = self._statements(variables, [], ['i', 'j'], count=self.random.randint(1, 4))
+            functions.append(f'function int f{index}(int a, int b) {{ var int x, y, i, j; '
+                             f'let x = a; let y = b; {body} return {self._expression(variables, [])}; }}')
+
+        self.last_function = 2
+        variables = ['p', 'q', 's', 't', 'u']
+        body = self._statements(variables, ['arr'], ['i', 'j', 'k'], count=self.random.randint(5, 12))
+        functions.append('function int fact(int n) { if (n < 2) { return 1; } return n * Main.fact(n - 1); }')
+        functions.append('function int count(int n, int acc) { var int next; '
+                         'let next = next + acc + n; if (n < 1) { return next; } '
+                         'return Main.count(n - 1, next); }')
+        functions.append('function int tick() { var int last; let last = calls; let calls = last + 1; '
+                         'return calls; }')
+        depths = [self.random.randint(TAIL_CALLS, TAIL_CALLS + 20) for _ in range(3)]
+        functions.append('function void main() { var int p, q, s, t, u, i, j, k; var Array arr; var Obj o, e; '
+                         'let arr = Array.new(4); let arr[0] = 0; let arr[1] = 0; let arr[2] = 0; '
+                         'let arr[3] = 0; let p = 3; let q = 5; let s = 0; let t = 7; let u = 11; '
+                         'let o = Obj.new(p); let e = Obj.empty(); '
+                         f'do Output.printInt(Main.count({depths[0]}, p)); '
+                         f'do Output.printInt(o.countdown({depths[1]}, q)); '
+                         f'do Output.printInt(o.chain(e, {depths[2]})); '
+                         f'{body} let o = Obj.new(p); do o.bump(q); do Output.printInt(o.get()); '
+                         'do Output.printInt(o.sum(3)); do Output.printInt(o.run(o)); '
+                         'do Output.printInt(Main.fact(5)); '
+                         'let e = Obj.empty(); do Output.printInt(e.get()); do Output.printInt(Main.tick()); '
+                         'do Output.printInt(p + q + s + t + u); return; }')
+        main_class = 'class Main {\n    static int calls;\n' + ''.join(f'    {function}\n' for function in functions) + '}\n'
+        return {'Main': main_class, 'Obj': OBJ_CLASS}
+
+    def _constant(self):
+        """Return an integer constant"""
+        return str(self.random.choice(CONSTANTS + (self.random.randint(0, 500),)))
+
+    def _index(self, variables):
+        """Return an expression indexing the array"""
+        return self.random.choice(['0', '1', '2', '3', f'{self.random.choice(variables)} & 3'])
+
+    def _expression(self, variables, arrays, depth=0):
+        """Return an expression of the variables and the arrays"""
+        choice = self.random.random()
+        if depth > 3 or self.random.random() < 0.3:
+            if choice < 0.35 or not variables:
+                return self._constant()
+            if choice < 0.75:
+                return self.random.choice(variables)
+            if choice < 0.85 and arrays:
+                return f'{self.random.choice(arrays)}[{self._index(variables)}]'
+            if choice < 0.88:
+                return self.random.choice(['true', 'false', 'null'])
+            if choice < 0.92 or self.last_function < 0:
+                return 'Main.tick()'
+            return (f'Main.f{self.random.randint(0, self.last_function)}('
+                    f'{self._expression(variables, arrays, depth + 1)}, '
+                    f'{self._expression(variables, arrays, depth + 1)})')
+
+        if choice < 0.15:
+            return f'(-{self._expression(variables, arrays, depth + 1)})'
+        if choice < 0.22:
+            return f'(~{self._expression(variables, arrays, depth + 1)})'
+
+        op = self.random.choice(OPERATORS)
+        left = self._expression(variables, arrays, depth + 1)
+        if op != '/':
+            right = self._expression(variables, arrays, depth + 1)
+        elif self.random.random() < 0.5:
+            right = str(self.random.choice(DIVISORS))
+        else:
+            right = f'({self._expression(variables, arrays, depth + 1)} | 1)'
+
+        if self.random.random() < 0.5:
+            return f'({left} {op} {right})'
+        return f'{left} {op} {right}'
+
+    def _statements(self, variables, arrays, loop_variables, depth=0, count=None):
+        """Return a sequence of statements, the loops counting with the loop variables"""
+        statements = []
+        for _ in range(count or self.random.randint(1, 5)):
+            choice = self.random.random()
+            if choice < 0.35 and variables:
+                statements.append(f'let {self.random.choice(variables)} = '
+                                  f'{self._expression(variables, arrays)};')
+            elif choice < 0.45 and arrays:
+                statements.append(f'let {self.random.choice(arrays)}[{self._index(variables)}] = '
+                                  f'{self._expression(variables, arrays)};')
+            elif choice < 0.5:
+                statements.append(f'do Output.printInt({self._expression(variables, arrays)});')
+            elif choice < 0.6:
+                statements.append(f'do Output.printString("{self.random.choice(STRINGS)}");')
+            elif choice < 0.72 and depth < 2:
+                condition = self._expression(variables, arrays)
+                body = self._statements(variables, arrays, loop_variables, depth + 1)
+                if self.random.random() < 0.5:
+                    otherwise = self._statements(variables, arrays, loop_variables, depth + 1)
+                    statements.append(f'if ({condition}) {{ {body} }} else {{ {otherwise} }}')
+                else:
+                    statements.append(f'if ({condition}) {{ {body} }}')
+            elif choice < 0.82 and depth < 2 and loop_variables:
+                variable = loop_variables[0]
+                body = self._statements(variables, arrays, loop_variables[1:], depth + 1)
+                statements.append(f'let {variable} = 0; while ({variable} < {self.random.randint(0, 6)}) '
+                                  f'{{ {body} let {variable} = {variable} + 1; }}')
+            elif choice < 0.87 and self.random.random() < 0.3:
+                statements.append(f'if ({self._expression(variables, arrays)}) '
+                                  f'{{ return {self._expression(variables, arrays)}; }}')
+            elif choice < 0.87:
+                statements.append('do Output.println();')
+            else:
+                statements.append(f'do Output.printInt({self._expression(variables, arrays)});')
+        return ' '.join(statements)
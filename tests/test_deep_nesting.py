@@ -0,0 +1,143 @@
+"""Stress tests of deeply nested expressions
+
+Expressions nested thousands deep are parsed, optimized by every pass,
+written as XML and compiled to VM code below the default recursion limit,
+and the code compiled must print what the expressions evaluate to.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from tests import COMPILER_DIR
+from tests.test_differential import CONFIGURATIONS, compile_and_run
+
+DEPTH = 3000
+# the operands of right nested expressions and the arrays of nested
+# indices all wait on the stack, which only has room for so many
+STACK_DEPTH = 1500
+RECURSION_LIMIT = 1000
+
+REPOSITORY_DIR = os.path.dirname(COMPILER_DIR)
+ANALYZERS = ('analyzer', 'extended-analyzer')
+
+# options that only report or change how the sources are read
+REPORTS = ['--xml', '--pass-report', '--peephole-report', '--dead-code-report',
+           '--whole-program-report', '--memory-report', '--binary-source']
+
+# each expression, with the value it evaluates to
+EXPRESSIONS = [
+    ('(' * DEPTH + 'x' + ' + 1)' * DEPTH, DEPTH),
+    ('1 + (' * STACK_DEPTH + 'x' + ')' * STACK_DEPTH, STACK_DEPTH),
+    ('-~' * (DEPTH // 2) + 'x', DEPTH // 2),
+    ('Main.inc(' * DEPTH + 'x' + ')' * DEPTH, DEPTH),
+    ('a[' * STACK_DEPTH + 'x' + ']' * STACK_DEPTH, 0),
+    ('x' + ' + 1' * DEPTH, DEPTH),
+    ('(((x * 1) + 0) | 0)' + ' - (x / 2) * 0' * DEPTH, 0),
+]
+
+MAIN_CLASS = '''class Main {
+    function int inc(int n) { return n + 1; }
+    function void main() {
+        var int x;
+        var Array a;
+        let x = 0;
+        let a = Array.new(2);
+        let a[0] = 1;
+        let a[1] = 0;
+%s
+        return;
+    }
+}
+'''
+
+
+def write_program(source_dir):
+    """Write the program printing each expression, and return what it must print"""
+    statements = ''.join(f'        do Output.printString("v=");\n'
+                         f'        do Output.printInt({expression});\n'
+                         f'        do Output.println();\n'
+                         for expression, _ in EXPRESSIONS)
+    with open(os.path.join(source_dir, 'Main.jack'), 'w') as file:
+        file.write(MAIN_CLASS % statements)
+    return ''.join(f'v={value}\n' for _, value in EXPRESSIONS)
+
+
+class DeepNestingTest(unittest.TestCase):
+    def setUp(self):
+        self.recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(RECURSION_LIMIT)
+        self.source_dir = tempfile.TemporaryDirectory()
+        self.expected = write_program(self.source_dir.name)
+
+    def tearDown(self):
+        sys.setrecursionlimit(self.recursion_limit)
+        self.source_dir.cleanup()
+
+    def test_unoptimized(self):
+        self.assertEqual(compile_and_run(self.source_dir.name, []), self.expected)
+
+    def test_optimized(self):
+        for flags in CONFIGURATIONS:
+            with self.subTest(flags=' '.join(flags)):
+                self.assertEqual(compile_and_run(self.source_dir.name, flags), self.expected)
+
+    def test_reports(self):
+        source_dir = self.source_dir.name
+        stack_report = os.path.join(source_dir, 'stack.json')
+        cfg_export = os.path.join(source_dir, 'cfg.json')
+        cache_dir = os.path.join(source_dir, 'cache')
+        flags = ['-O', '2', '--pool-strings', *REPORTS, '--stack-report', stack_report,
+                 '--cfg-export', cfg_export, '--cache-dir', cache_dir]
+
+        # the second compile reads the tokens from the cache
+        for _ in range(2):
+            self.assertEqual(compile_and_run(source_dir, flags), self.expected)
+        for report in (stack_report, cfg_export):
+            with open(report) as file:
+                self.assertIn('Main.main', json.dumps(json.load(file)))
+        with open(os.path.join(source_dir, 'Main.xml')) as file:
+            self.assertGreaterEqual(_nesting(file.read()), 2 * DEPTH)
+
+    def test_analyzers(self):
+        source_dir = self.source_dir.name
+        xml_file = os.path.join(source_dir, 'Main.xml')
+        compile_and_run(source_dir, ['--xml'])
+        with open(xml_file) as file:
+            compiled_xml = file.read()
+
+        # the analyzers run below the default recursion limit
+        for analyzer in ANALYZERS:
+            with self.subTest(analyzer=analyzer):
+                analyzer_script = os.path.join(REPOSITORY_DIR, analyzer, 'analyzer.py')
+                result = subprocess.run([sys.executable, analyzer_script,
+                                         os.path.join(source_dir, 'Main.jack')],
+                                        capture_output=True, text=True)
+                self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+                with open(xml_file) as file:
+                    xml = file.read()
+                self.assertGreaterEqual(_nesting(xml), 2 * DEPTH)
+                if analyzer == 'analyzer':
+                    self.assertEqual(xml, compiled_xml)
+
+
+def _nesting(xml):
+    """Return the deepest nesting of the elements of an XML file, written
+    one tag or element per line, checking that every element is closed
+    """
+    depth = deepest = 0
+    for line in xml.splitlines():
+        if line.startswith('</'):
+            depth -= 1
+        elif '</' not in line:
+            depth += 1
+            deepest = max(deepest, depth)
+    assert depth == 0, 'unclosed elements'
+    return deepest
+
+
+if __name__ == '__main__':
+    unittest.main()
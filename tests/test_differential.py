@@ -0,0 +1,137 @@
+"""Differential tests of the optimizations
+
+Each random program, and each of a few programs written to probe the
+optimizations, is compiled without optimizations and with each
+optimization, on its own and in the optimization levels, and the VM code
+of both is run on the VM emulator: the optimized code must print the same,
+or fail with the same error.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from tests import COMPILER_DIR  # noqa: F401, adds the compiler to the path
+from tests.program_generator import TAIL_CALLS, ProgramGenerator
+from tests.vm_emulator import VmEmulator, VmError
+
+import compiler
+from pass_manager import CODE_GENERATOR_OPTIONS, INSTRUCTION_PASSES, PROGRAM_PASSES, TREE_PASSES
+
+PROGRAMS = 25
+
+# every optimization on its own, then the levels and the modes they leave out
+OPTIONS = sorted({*PROGRAM_PASSES, *TREE_PASSES, *INSTRUCTION_PASSES, *CODE_GENERATOR_OPTIONS})
+CONFIGURATIONS = [[f'--{name}'] for name in OPTIONS] + [
+    ['--strength-reduction', 'size'],
+    ['--strength-reduction', 'speed'],
+    ['-O', '1'],
+    ['-O', '2'],
+    ['-O', '2', '--pool-strings', '--whole-program', '--inline-budget', '40'],
+]
+
+# a class whose method ignores its argument, called with the expression
+DROPPED_ARGUMENT = '''class Main {
+    field int x;
+    constructor Main new() { let x = 51; return this; }
+    method int get(int unused) { return x; }
+    method int div(int a, int b) { return a / b; }
+    function void main() {
+        var Main p;
+        var int z;
+        let p = Main.new();
+        let z = 0;
+        do Output.printInt(p.get(%s));
+        return;
+    }
+}
+'''
+
+# programs probing the cases the random programs leave out, by name
+PROBES = {
+    # arguments dropped by the inliner must not divide by zero
+    'dropped division': DROPPED_ARGUMENT % '7 / z',
+    'dropped inlined division': DROPPED_ARGUMENT % 'p.div(7, z)',
+    # branches on constant conditions, resolved by the dead code eliminator
+    'constant branches': '''class Main {
+    function void main() {
+        var int i;
+        let i = 0;
+        if (false) { do Output.printInt(1); } else { do Output.printInt(2); }
+        while (true) {
+            let i = i + 1;
+            if (~(i < 3)) { do Output.printInt(i); return; }
+        }
+        return;
+    }
+}
+''',
+}
+
+
+def compile_and_run(source_dir, flags):
+    """Compile the program of a directory with the flags, and return what it prints"""
+    return compile_and_emulate(source_dir, flags)[0]
+
+
+def compile_and_emulate(source_dir, flags):
+    """Compile the program of a directory with the flags, and return what it
+    prints and the emulator which ran it
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        compiler.main([*flags, source_dir])
+    emulator = VmEmulator(source_dir)
+    try:
+        return emulator.run(), emulator
+    except VmError as error:
+        return f'error: {error}', emulator
+
+
+def write_program(source_dir, classes):
+    """Write the source of each class of a program, given by class name"""
+    for class_name, source in classes.items():
+        with open(os.path.join(source_dir, f'{class_name}.jack'), 'w') as file:
+            file.write(source)
+
+
+class DifferentialTest(unittest.TestCase):
+    def test_optimized_programs_print_the_same(self):
+        for seed in range(PROGRAMS):
+            with tempfile.TemporaryDirectory() as source_dir:
+                write_program(source_dir, ProgramGenerator(seed).program())
+                expected = compile_and_run(source_dir, [])
+                if expected.startswith('error: step limit'):
+                    continue  # runs too long to compare
+
+                for flags in CONFIGURATIONS:
+                    with self.subTest(seed=seed, flags=' '.join(flags)):
+                        self.assertEqual(compile_and_run(source_dir, flags), expected)
+
+    def test_tail_calls_keep_the_call_depth(self):
+        for seed in range(PROGRAMS):
+            with tempfile.TemporaryDirectory() as source_dir:
+                write_program(source_dir, ProgramGenerator(seed).program())
+                expected, reference = compile_and_emulate(source_dir, [])
+                for flags in (['--tail-calls'], ['-O', '2']):
+                    with self.subTest(seed=seed, flags=' '.join(flags)):
+                        output, emulator = compile_and_emulate(source_dir, flags)
+                        self.assertEqual(output, expected)
+                        # the tail recursive subroutines no longer nest their calls
+                        self.assertGreater(reference.max_depth, TAIL_CALLS)
+                        self.assertLess(emulator.max_depth, TAIL_CALLS)
+                        self.assertLess(emulator.max_stack, reference.max_stack)
+
+    def test_optimized_probes_print_the_same(self):
+        for name, source in PROBES.items():
+            with tempfile.TemporaryDirectory() as source_dir:
+                write_program(source_dir, {'Main': source})
+                expected = compile_and_run(source_dir, [])
+                for flags in CONFIGURATIONS:
+                    with self.subTest(probe=name, flags=' '.join(flags)):
+                        self.assertEqual(compile_and_run(source_dir, flags), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Tests of the incremental tokenizer
+
+Edits that leave text which cannot be lexed, such as an invalid character
+or a string constant not yet terminated, must keep the token table equal
+to the tokens of the whole edited source, so that the edits fixing the
+text are re-lexed like any other.
+"""
+
+import io
+import unittest
+
+from tests import COMPILER_DIR  # noqa: F401, adds the compiler to the path
+
+from constants import TokenType
+from tokenizer import Edit, IncrementalTokenizer, scan
+
+SOURCE = '''class Main {
+    function void main() {
+        do Output.printString("hello"); // a comment
+        return;
+    }
+}
+'''
+
+
+class IncrementalTokenizerTest(unittest.TestCase):
+    def setUp(self):
+        self.tokenizer = IncrementalTokenizer(io.StringIO(SOURCE))
+        self.source = SOURCE
+
+    def edit(self, start, end, text):
+        """Apply an edit to the tokenizer and to the source, and check the table"""
+        self.tokenizer.update(Edit(start, end, text))
+        self.source = self.source[:start] + text + self.source[end:]
+        self.assertEqual(_tokens(self.tokenizer.table), _tokens(scan(self.source, errors=True)))
+
+    def test_unterminated_string(self):
+        closing_quote = SOURCE.index('hello') + len('hello')
+        self.edit(closing_quote, closing_quote + 1, '')
+        errors = [token for token in self.tokenizer.table if token.type == TokenType.ERROR]
+        self.assertEqual([token.text for token in errors], ['"hello); // a comment'])
+
+        self.edit(closing_quote, closing_quote, '"')
+        self.assertEqual(_tokens(self.tokenizer.table), _tokens(scan(SOURCE)))
+
+    def test_invalid_character(self):
+        semicolon = SOURCE.index('return;') + len('return')
+        self.edit(semicolon, semicolon + 1, '#')
+        self.assertEqual(self.tokenizer.table[self.tokenizer.token_index(semicolon)].type,
+                         TokenType.ERROR)
+
+        self.edit(semicolon, semicolon + 1, ';')
+        self.assertEqual(_tokens(self.tokenizer.table), _tokens(scan(SOURCE)))
+
+
+def _tokens(tokens):
+    """Return the type, text and offset of each token"""
+    return [(token.type, token.text, token.offset) for token in tokens]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Tests of the sources the compiler rejects
+
+A term that cannot start with its first token, or that the file ends
+before, must be reported as an invalid token, and the compiler must exit
+with status 1 rather than fail with a traceback.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from tests import COMPILER_DIR  # noqa: F401, adds the compiler to the path
+
+import compiler
+
+MAIN_CLASS = '''class Main {
+    function void main() {
+        var int x;
+        %s'''
+END = '''
+        return;
+    }
+}
+'''
+
+# each invalid statement, with the message the compiler prints
+STATEMENTS = [
+    ('let x = ) ;' + END, 'Invalid token: term is not ).'),
+    ('let x = 1 + ;' + END, 'Invalid token: term is not ;.'),
+    ('let x = * 2;' + END, 'Invalid token: term is not *.'),
+    ('let x = while;' + END, 'Invalid token: term is not while.'),
+    ('let x = 1 +', 'Invalid token: term is not .'),
+    ('let x = -', 'Invalid token: term is not .'),
+]
+
+
+class InvalidSourcesTest(unittest.TestCase):
+    def test_invalid_terms(self):
+        for statement, message in STATEMENTS:
+            with self.subTest(statement=statement), tempfile.TemporaryDirectory() as source_dir:
+                with open(os.path.join(source_dir, 'Main.jack'), 'w') as file:
+                    file.write(MAIN_CLASS % statement)
+
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output), self.assertRaises(SystemExit) as context:
+                    compiler.main([source_dir])
+                self.assertEqual(context.exception.code, 1)
+                self.assertIn(message, output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,306 @@
+"""VM emulator module of the tests
+
+Classes:
+    VmError
+    VmEmulator
+"""
+
+import os
+
+# segments addressed through a pointer, by the address of the pointer
+POINTER_SEGMENTS = {'local': 1, 'argument': 2, 'this': 3, 'that': 4}
+
+# addresses of the stack, the static variables and the heap, which the
+# stack must not run into
+STACK_BASE = 256
+STATIC_BASE = 16
+HEAP_BASE = 2048
+RAM_SIZE = 32768
+
+ARITHMETIC = {
+    'add': lambda a, b: a + b,
+    'sub': lambda a, b: a - b,
+    'and': lambda a, b: a & b,
+    'or': lambda a, b: a | b,
+    'eq': lambda a, b: -1 if a == b else 0,
+    'gt': lambda a, b: -1 if a > b else 0,
+    'lt': lambda a, b: -1 if a < b else 0,
+}
+
+
+class VmError(Exception):
+    """Error raised when the VM code of a program fails or runs too long"""
+
+
+class VmEmulator:
+    """VmEmulator class of the tests.
+
+    Runs the VM code of a program, the subroutines of the Jack OS it calls
+    being implemented in Python: the memory is allocated without ever being
+    freed, and the output is collected as text. Enough to compare what two
+    compilations of a program print, not to measure how fast they run.
+
+    Properties:
+        ram: the 16 bit words of the memory, as signed integers
+        code: instructions of all the functions, as tuples
+        labels: index of each label in the code, by function and label
+        functions: index of each function in the code, by name
+        static_bases: address of the static variables of each class
+        heap: address of the next allocated block
+        output: text printed by the program
+        steps: number of instructions run
+        max_steps: number of instructions after which the program is stopped
+        calls: number of calls of functions of the program run
+        max_depth: deepest nesting of the calls of functions of the program
+        max_stack: largest number of words on the stack
+
+    Methods:
+        run(str) -> str
+    """
+
+    def __init__(self, vm_dir, max_steps=2_000_000):
+        self.ram = [0] * RAM_SIZE
+        self.code = []
+        self.labels = {}
+        self.functions = {}
+        self.static_bases = {}
+        self.heap = HEAP_BASE
+        self.output = []
+        self.steps = 0
+        self.max_steps = max_steps
+        self.calls = 0
+        self.max_depth = 0
+        self.max_stack = 0
+
+        static_base = STATIC_BASE
+        for filename in sorted(os.listdir(vm_dir)):
+            if filename.endswith('.vm'):
+                class_name = filename[:-len('.vm')]
+                self.static_bases[class_name] = static_base
+                static_base += self._load(os.path.join(vm_dir, filename), class_name)
+
+    def _load(self, path, class_name):
+        """Add the functions of a class to the code, and return the number of its statics"""
+        statics = 0
+        function = None
+        with open(path) as file:
+            for line in file:
+                words = line.split('//')[0].split()
+                if not words:
+                    continue
+
+                command = words[0]
+                if command == 'function':
+                    function = words[1]
+                    self.functions[function] = len(self.code)
+                    self.code.append((command, int(words[2])))
+                elif command == 'label':
+                    self.labels[(function, words[1])] = len(self.code)
+                elif command in ('goto', 'if-goto'):
+                    self.code.append((command, (function, words[1])))
+                elif command in ('push', 'pop'):
+                    segment, index = words[1], int(words[2])
+                    if segment == 'static':
+                        statics = max(statics, index + 1)
+                    self.code.append((command, segment, index, class_name))
+                elif command == 'call':
+                    self.code.append((command, words[1], int(words[2])))
+                else:
+                    self.code.append((command,))
+        return statics
+
+    def run(self, entry='Main.main'):
+        """Run the program from its entry function, and return what it printed"""
+        ram = self.ram
+        code = self.code
+        ram[1] = ram[2] = sp = peak = STACK_BASE
+        pc = self.functions[entry]
+        depth = 0
+
+        while True:
+            self.steps += 1
+            if self.steps > self.max_steps:
+                raise VmError(f'step limit of {self.max_steps} reached')
+            instruction = code[pc]
+            command = instruction[0]
+            pc += 1
+
+            if command == 'push':
+                ram[sp] = self._read(instruction[1], instruction[2], instruction[3])
+                sp += 1
+            elif command == 'pop':
+                sp -= 1
+                self._write(instruction[1], instruction[2], instruction[3], ram[sp])
+            elif command in ARITHMETIC:
+                sp -= 1
+                ram[sp - 1] = _word(ARITHMETIC[command](ram[sp - 1], ram[sp]))
+            elif command == 'neg':
+                ram[sp - 1] = _word(-ram[sp - 1])
+            elif command == 'not':
+                ram[sp - 1] = _word(~ram[sp - 1])
+            elif command == 'goto':
+                pc = self.labels[instruction[1]]
+            elif command == 'if-goto':
+                sp -= 1
+                if ram[sp]:
+                    pc = self.labels[instruction[1]]
+            elif command == 'function':
+                for _ in range(instruction[1]):
+                    ram[sp] = 0
+                    sp += 1
+            elif command == 'call':
+                name, count = instruction[1], instruction[2]
+                if name not in self.functions:
+                    arguments = ram[sp - count:sp]
+                    sp -= count
+                    result = self._call_os(name, arguments)
+                    if result is None:  # the program halted
+                        break
+                    ram[sp] = result
+                    sp += 1
+                    continue
+
+                # push the frame of the caller
+                for value in (pc, ram[1], ram[2], ram[3], ram[4]):
+                    ram[sp] = value
+                    sp += 1
+                ram[2] = sp - 5 - count
+                ram[1] = sp
+                pc = self.functions[name]
+                depth += 1
+                self.calls += 1
+                self.max_depth = max(self.max_depth, depth)
+            elif command == 'return':
+                frame = ram[1]
+                argument = ram[2]
+                # without arguments, the return value takes the place of the return address
+                return_address = ram[frame - 5]
+                ram[argument] = ram[sp - 1]
+                if not depth:
+                    break
+                depth -= 1
+                sp = argument + 1
+                pc = return_address
+                ram[1], ram[2], ram[3], ram[4] = ram[frame - 4:frame]
+            else:
+                raise VmError(f'unknown command {command}')
+
+            if sp > peak:
+                peak = sp
+                self.max_stack = peak - STACK_BASE
+                if sp >= HEAP_BASE:
+                    raise VmError('stack overflow')
+
+        return ''.join(self.output)
+
+    def _read(self, segment, index, class_name):
+        """Return the value of a segment entry"""
+        ram = self.ram
+        if segment == 'constant':
+            return index
+        if segment in POINTER_SEGMENTS:
+            return ram[ram[POINTER_SEGMENTS[segment]] + index]
+        if segment == 'pointer':
+            return ram[3 + index]
+        if segment == 'temp':
+            return ram[5 + index]
+        if segment == 'static':
+            return ram[self.static_bases[class_name] + index]
+        raise VmError(f'unknown segment {segment}')
+
+    def _write(self, segment, index, class_name, value):
+        """Set the value of a segment entry"""
+        ram = self.ram
+        if segment in POINTER_SEGMENTS:
+            ram[ram[POINTER_SEGMENTS[segment]] + index] = value
+        elif segment == 'pointer':
+            ram[3 + index] = value
+        elif segment == 'temp':
+            ram[5 + index] = value
+        elif segment == 'static':
+            ram[self.static_bases[class_name] + index] = value
+        else:
+            raise VmError(f'cannot pop to segment {segment}')
+
+    def _alloc(self, size):
+        """Return the address of a new block of memory"""
+        address = self.heap
+        self.heap += max(size, 1)
+        if self.heap > RAM_SIZE:
+            raise VmError('heap overflow')
+        return address
+
+    def _call_os(self, name, arguments):
+        """Return the result of a subroutine of the OS, or None if it halts the program"""
+        ram = self.ram
+        if name == 'Math.multiply':
+            return _word(arguments[0] * arguments[1])
+        if name == 'Math.divide':
+            dividend, divisor = arguments
+            if divisor == 0:
+                raise VmError('division by zero')
+            quotient = abs(dividend) // abs(divisor)
+            return _word(quotient if (dividend < 0) == (divisor < 0) else -quotient)
+        if name == 'Math.abs':
+            return _word(abs(arguments[0]))
+        if name == 'Math.min':
+            return min(arguments)
+        if name == 'Math.max':
+            return max(arguments)
+        if name == 'Math.sqrt':
+            return int(max(arguments[0], 0) ** 0.5)
+        if name in ('Memory.alloc', 'Array.new'):
+            return self._alloc(arguments[0])
+        if name in ('Memory.deAlloc', 'Array.dispose', 'String.dispose'):
+            return 0
+        if name == 'Memory.peek':
+            return ram[arguments[0]]
+        if name == 'Memory.poke':
+            ram[arguments[0]] = arguments[1]
+            return 0
+
+        # a string is its length and its capacity followed by its characters
+        if name == 'String.new':
+            string = self._alloc(arguments[0] + 2)
+            ram[string] = 0
+            ram[string + 1] = arguments[0]
+            return string
+        if name == 'String.appendChar':
+            string, character = arguments
+            if ram[string] >= ram[string + 1]:
+                raise VmError('string full')
+            ram[string + 2 + ram[string]] = character
+            ram[string] += 1
+            return string
+        if name == 'String.length':
+            return ram[arguments[0]]
+        if name == 'String.charAt':
+            return ram[arguments[0] + 2 + arguments[1]]
+        if name == 'String.setCharAt':
+            ram[arguments[0] + 2 + arguments[1]] = arguments[2]
+            return 0
+
+        if name == 'Output.printInt':
+            self.output.append(str(arguments[0]))
+            return 0
+        if name == 'Output.printChar':
+            self.output.append(chr(arguments[0]))
+            return 0
+        if name == 'Output.printString':
+            string = arguments[0]
+            self.output.append(''.join(map(chr, ram[string + 2:string + 2 + ram[string]])))
+            return 0
+        if name == 'Output.println':
+            self.output.append('\n')
+            return 0
+        if name == 'Sys.halt':
+            return None
+        if name == 'Sys.error':
+            raise VmError(f'Sys.error {arguments[0]}')
+        raise VmError(f'unknown function {name}')
+
+
+def _word(value):
+    """Return a value wrapped to a signed 16 bit word"""
+    value &= 0xFFFF
+    return value - 0x10000 if value & 0x8000 else value